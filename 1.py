@@ -5,15 +5,33 @@ import logging
 import os
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Set, Any
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
 
+import httpx
 import openpyxl
 import pandas as pd
 import pytz
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
-from playwright.async_api import async_playwright, Browser
+
+# 添加脚本所在目录到Python路径（共享模块 job_schema 与脚本放在一起）
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from job_schema import (JOB_HASH_FIELDS, JOB_RECORD_FIELDS, POSTING_KEY_FIELDS, JobRecord, compile_extractor,
+                        generate_job_hash)
+from snapshot_store import SnapshotStore
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+try:
+    import psutil
+except ImportError:  # 可选依赖：缺失时不做内存阈值回收
+    psutil = None
 
 # 北京时区
 BEIJING_TZ = pytz.timezone('Asia/Shanghai')
@@ -30,7 +48,35 @@ logging.basicConfig(
 # 文件名及路径配置（文件保存在当前用户"文稿"文件夹下）
 DOCUMENTS_PATH = Path.home() / "Documents"
 OUTPUT_FILENAME = DOCUMENTS_PATH / "bytedance_jobs_tracker.xlsx"
-JSON_CACHE_FILENAME = DOCUMENTS_PATH / "bytedance_jobs_cache.json"
+JSON_CACHE_FILENAME = DOCUMENTS_PATH / "bytedance_jobs_cache.json"  # 旧版JSON存档，仅用于迁移读取
+SNAPSHOT_DIR = DOCUMENTS_PATH / "bytedance_jobs_snapshots"
+
+# 抓取方式：api（接口直连）/ browser（无头浏览器）/ auto（接口优先，失败时回退浏览器）
+CRAWLER_ENGINE = os.getenv('CRAWLER_ENGINE', 'auto').strip().lower()
+# 职位接口地址（可指向本地回放服务，便于离线测试）
+API_BASE_URL = os.getenv('CRAWLER_API_BASE', 'https://jobs.bytedance.com').strip().rstrip('/')
+# 分页抓取：每页条数，以及遇到整页均为已知条目时是否提前结束
+CRAWL_PAGE_SIZE = int(os.getenv('CRAWL_PAGE_SIZE', '200'))
+CRAWL_STOP_ON_KNOWN_PAGE = os.getenv('CRAWL_STOP_ON_KNOWN_PAGE', 'True').strip() == 'True'
+# 提前结束翻页时无法发现已下线的职位：每个类型距上次完整翻页超过该小时数时不提前结束（0 表示每次都完整翻页）
+CRAWL_FULL_SWEEP_HOURS = float(os.getenv('CRAWL_FULL_SWEEP_HOURS', '24'))
+
+# 单类型隔离：每个类型的整理时限（秒）、单页请求时限（秒）、单页失败后的重试次数，
+# 以及首次重试前的等待（秒，之后每次翻倍）。超时或失败只影响该类型，已抓到的页面仍会保留
+CRAWL_TASK_TIMEOUT = float(os.getenv('CRAWL_TASK_TIMEOUT', '180'))
+CRAWL_PAGE_TIMEOUT = float(os.getenv('CRAWL_PAGE_TIMEOUT', '45'))
+CRAWL_PAGE_RETRIES = int(os.getenv('CRAWL_PAGE_RETRIES', '2'))
+CRAWL_RETRY_BACKOFF = float(os.getenv('CRAWL_RETRY_BACKOFF', '2'))
+
+# 浏览器池配置：最大并发页面数、单个浏览器最多复用次数、浏览器进程内存上限（MB）
+BROWSER_POOL_MAX_PAGES = int(os.getenv('BROWSER_POOL_MAX_PAGES', '3'))
+BROWSER_POOL_MAX_USES = int(os.getenv('BROWSER_POOL_MAX_USES', '50'))
+BROWSER_POOL_MAX_RSS_MB = int(os.getenv('BROWSER_POOL_MAX_RSS_MB', '800'))
+
+# Excel清单导出：sync（整理后同步写出）/ async（后台线程写出，不阻塞整理结果返回）/ off（仅使用存档与数据库）
+EXCEL_EXPORT_MODE = os.getenv('EXCEL_EXPORT', 'sync').strip().lower()
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
 
 # 任务配置（保持原结构，后续通过代称映射隐藏真实用途）
 TASK_CONFIGS: List[Dict[str, Any]] = [
@@ -38,39 +84,334 @@ TASK_CONFIGS: List[Dict[str, Any]] = [
         'id': 1,
         'name': '实习招聘',
         'sheet_name': 'intern',
-        'url': "https://jobs.bytedance.com/campus/position?keywords=&category=6704215864629004552%2C6704215864591255820%2C6704216224387041544%2C6704215924712409352&location=CT_125&project=7481474995534301447%2C7468181472685164808%2C7194661644654577981%2C7194661126919358757&type=&job_hot_flag=&current=1&limit=2000&functionCategory=&tag=",
+        'url': "https://jobs.bytedance.com/campus/position?keywords=&category=6704215864629004552%2C6704215864591255820%2C6704216224387041544%2C6704215924712409352&location=CT_125&project=7481474995534301447%2C7468181472685164808%2C7194661644654577981%2C7194661126919358757&type=&job_hot_flag=&functionCategory=&tag=",
         'api_url_mark': "api/v1/search/job/posts",
+        'api_portal_type': 3,
         'extra_fields': []
     },
     {
         'id': 2,
         'name': '校园招聘',
         'sheet_name': 'campus',
-        'url': "https://jobs.bytedance.com/campus/position?keywords=&category=6704215864629004552%2C6704215864591255820%2C6704216224387041544%2C6704215924712409352&location=CT_125&project=7525009396952582407&type=&job_hot_flag=&current=1&limit=2000&functionCategory=&tag=",
+        'url': "https://jobs.bytedance.com/campus/position?keywords=&category=6704215864629004552%2C6704215864591255820%2C6704216224387041544%2C6704215924712409352&location=CT_125&project=7525009396952582407&type=&job_hot_flag=&functionCategory=&tag=",
         'api_url_mark': "api/v1/search/job/posts",
+        'api_portal_type': 3,
         'extra_fields': ['location', 'department']
     },
     {
         'id': 3,
         'name': '社会招聘',
         'sheet_name': 'experienced',
-        'url': "https://jobs.bytedance.com/experienced/position?keywords=&category=6704215864629004552%2C6704215864591255820%2C6704215924712409352%2C6704216224387041544&location=CT_125&project=&type=&job_hot_flag=&current=1&limit=600&functionCategory=&tag=",
+        'url': "https://jobs.bytedance.com/experienced/position?keywords=&category=6704215864629004552%2C6704215864591255820%2C6704215924712409352%2C6704216224387041544&location=CT_125&project=&type=&job_hot_flag=&functionCategory=&tag=",
         'api_url_mark': "api/v1/search/job/posts",
+        'api_portal_type': 2,
         'extra_fields': ['location', 'department']
     }
 ]
 
 # --- 2. 核心逻辑区 ---
 
+class JobApiClient:
+    """职位搜索接口客户端：复用连接池，Cookie/CSRF令牌只获取一次"""
+
+    CSRF_PATH = "/api/v1/csrf/token"
+    SEARCH_PATH = "/api/v1/search/job/posts"
+    CSRF_COOKIE = "atsx-csrf-token"
+    # 清单页面URL查询参数 → 搜索接口参数
+    LIST_PARAMS = {
+        'category': 'job_category_id_list',
+        'location': 'location_code_list',
+        'project': 'subject_id_list',
+        'type': 'recruitment_id_list',
+        'functionCategory': 'job_function_id_list',
+        'tag': 'tag_id_list',
+    }
+
+    def __init__(self, base_url: str = API_BASE_URL, timeout: float = 30.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        # transport 可替换为回放录制响应的传输层（见 tests/replay.py），离线测试翻页与重试逻辑
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            transport=transport,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            headers={'User-Agent': USER_AGENT, 'Accept': 'application/json, text/plain, */*'},
+        )
+        self._csrf_token: Optional[str] = None
+        self._csrf_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "JobApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+
+    async def _ensure_csrf_token(self) -> str:
+        """首次请求前获取CSRF令牌，后续请求复用"""
+        async with self._csrf_lock:
+            if self._csrf_token is None:
+                response = await self._client.post(self.CSRF_PATH, json={'portal_entrance': 1})
+                response.raise_for_status()
+                token = self._client.cookies.get(self.CSRF_COOKIE)
+                if not token:
+                    token = (response.json().get('data') or {}).get('token')
+                self._csrf_token = unquote(token) if token else ''
+        return self._csrf_token
+
+    @classmethod
+    def build_payload(cls, task_config: Dict[str, Any], current: int, limit: int) -> Dict[str, Any]:
+        """根据任务的清单页面URL构造搜索接口请求体"""
+        query = parse_qs(urlparse(task_config['url']).query)
+        payload: Dict[str, Any] = {
+            'keyword': query.get('keywords', [''])[0],
+            'limit': limit,
+            'offset': (current - 1) * limit,
+            'portal_type': task_config.get('api_portal_type', 2),
+            'portal_entrance': 1,
+        }
+        for param, field in cls.LIST_PARAMS.items():
+            value = query.get(param, [''])[0]
+            payload[field] = [item for item in value.split(',') if item]
+        if query.get('job_hot_flag', [''])[0]:
+            payload['job_hot_flag'] = query['job_hot_flag'][0]
+        return payload
+
+    async def search(self, task_config: Dict[str, Any], current: int, limit: int) -> Dict[str, Any]:
+        """请求一页职位数据，返回接口 data 字段"""
+        token = await self._ensure_csrf_token()
+        website_path = urlparse(task_config['url']).path.strip('/').split('/')[0]
+        headers = {
+            'Referer': task_config['url'],
+            'website-path': website_path,
+            'portal-channel': 'saas-career',
+            'portal-platform': 'pc',
+        }
+        if token:
+            headers['x-csrf-token'] = token
+        
+        response = await self._client.post(
+            self.SEARCH_PATH,
+            json=self.build_payload(task_config, current, limit),
+            headers=headers,
+        )
+        response.raise_for_status()
+        body = response.json()
+        if body.get('code', 0) != 0:
+            raise RuntimeError(f"接口返回错误: {body.get('message')}")
+        return body.get('data') or {}
+
+
+# 各类型上次完整翻页的时间（time.monotonic()，进程内有效；进程启动后的首次整理完整翻页）
+_FULL_SWEEP_AT: Dict[str, float] = {}
+
+
+def _describe_error(error: BaseException) -> str:
+    """异常的单行描述（超时等异常的 str() 为空，此时使用异常类型名）"""
+    message = str(error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
+
+
+class BrowserPool:
+    """长驻浏览器池：复用已启动的Chromium与上下文，按使用次数或内存阈值回收"""
+
+    def __init__(self, headless: bool = True, max_pages: int = BROWSER_POOL_MAX_PAGES,
+                 max_uses: int = BROWSER_POOL_MAX_USES, max_rss_mb: int = BROWSER_POOL_MAX_RSS_MB):
+        self.headless = headless
+        self.max_pages = max_pages
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._idle_contexts: List[BrowserContext] = []
+        self._uses = 0
+        self._active_pages = 0
+        self._launch_count = 0
+        # 信号量和锁在首次使用时创建，确保绑定到运行浏览器池的事件循环
+        self._page_slots: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _launch_options(self) -> Dict[str, Any]:
+        """浏览器启动配置（支持Docker环境）"""
+        # Docker环境中，Playwright可能需要明确的浏览器路径
+        # 检查环境变量 PLAYWRIGHT_BROWSERS_PATH
+        if os.getenv('PLAYWRIGHT_BROWSERS_PATH'):
+            logging.info(f"使用Playwright浏览器路径: {os.getenv('PLAYWRIGHT_BROWSERS_PATH')}")
+        
+        return {
+            'headless': self.headless,
+            'args': [
+                '--no-sandbox',
+                '--disable-setuid-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-gpu',
+            ]
+        }
+
+    @staticmethod
+    def _browser_rss_mb() -> Optional[float]:
+        """统计当前进程下所有浏览器子进程的常驻内存（需要psutil）"""
+        if psutil is None:
+            return None
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                if 'chrom' in child.name().lower():
+                    total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def _needs_recycle(self) -> Optional[str]:
+        """健康检查：返回需要回收的原因，健康时返回None"""
+        if self._browser is None:
+            return None
+        if not self._browser.is_connected():
+            return "浏览器连接已断开"
+        if self.max_uses and self._uses >= self.max_uses:
+            return f"已复用 {self._uses} 次"
+        rss_mb = self._browser_rss_mb()
+        if self.max_rss_mb and rss_mb is not None and rss_mb > self.max_rss_mb:
+            return f"内存占用 {rss_mb:.0f}MB"
+        return None
+
+    async def _close_browser(self) -> None:
+        contexts, self._idle_contexts = self._idle_contexts, []
+        for context in contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+        self._uses = 0
+
+    async def _acquire_context(self) -> tuple[Browser, BrowserContext]:
+        """借出浏览器上下文；空闲时对不健康或到期的浏览器进行回收"""
+        async with self._lock:
+            reason = self._needs_recycle()
+            if reason and self._active_pages == 0:
+                logging.info(f"♻️ 回收浏览器：{reason}")
+                await self._close_browser()
+            if self._browser is None:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(**self._launch_options())
+                self._launch_count += 1
+                logging.info(f"🚀 浏览器已启动（第 {self._launch_count} 次）")
+            
+            browser = self._browser
+            self._active_pages += 1
+            self._uses += 1
+            if self._idle_contexts:
+                return browser, self._idle_contexts.pop()
+        
+        try:
+            return browser, await browser.new_context(user_agent=USER_AGENT)
+        except Exception:
+            self._active_pages -= 1
+            raise
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """借出一个页面，用完后归还上下文供下次复用"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._page_slots = asyncio.Semaphore(self.max_pages)
+        
+        async with self._page_slots:
+            browser, context = await self._acquire_context()
+            page = None
+            healthy = False
+            try:
+                page = await context.new_page()
+                yield page
+                healthy = True
+            finally:
+                self._active_pages -= 1
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        healthy = False
+                if healthy and browser is self._browser and browser.is_connected():
+                    self._idle_contexts.append(context)
+                else:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """浏览器池状态（用于监控）"""
+        return {
+            'running': self._browser is not None and self._browser.is_connected(),
+            'uses': self._uses,
+            'active_pages': self._active_pages,
+            'idle_contexts': len(self._idle_contexts),
+            'launch_count': self._launch_count,
+            'rss_mb': self._browser_rss_mb() if self._browser is not None else None,
+        }
+
+    async def close(self) -> None:
+        """关闭浏览器及Playwright驱动"""
+        await self._close_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_excel_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_excel_executor() -> ThreadPoolExecutor:
+    """后台导出Excel的单线程执行器（首次使用时创建）"""
+    global _excel_executor
+    if _excel_executor is None:
+        _excel_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='excel-export')
+    return _excel_executor
+
+
 class JobMonitor:
     """丝瓜清单管理器（异步版），封装整理、数据处理、保存和通知逻辑"""
 
-    def __init__(self, tasks: List[Dict[str, Any]], filename: Path, headless: bool = True):
+    def __init__(self, tasks: List[Dict[str, Any]], filename: Path, headless: bool = True,
+                 engine: str = CRAWLER_ENGINE, api_base: str = API_BASE_URL,
+                 browser_pool: Optional[BrowserPool] = None,
+                 page_size: int = CRAWL_PAGE_SIZE, stop_on_known_page: bool = CRAWL_STOP_ON_KNOWN_PAGE,
+                 excel_export: str = EXCEL_EXPORT_MODE,
+                 on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 on_task_done: Optional[Callable[[str, List[Dict[str, Any]], Dict[str, Any]], None]] = None,
+                 task_timeout: float = CRAWL_TASK_TIMEOUT, page_timeout: float = CRAWL_PAGE_TIMEOUT,
+                 page_retries: int = CRAWL_PAGE_RETRIES, retry_backoff: float = CRAWL_RETRY_BACKOFF,
+                 full_sweep_hours: float = CRAWL_FULL_SWEEP_HOURS):
         self.tasks = tasks
         self.filename = filename
         self.json_cache_filename = JSON_CACHE_FILENAME
+        self.snapshot_store = SnapshotStore(SNAPSHOT_DIR)
+        self.excel_export = excel_export
         self.headless = headless
-        self.results: List[tuple[str, str, List[Dict[str, Any]]]] = []
+        self.engine = engine
+        self.api_base = api_base
+        # 外部传入的浏览器池（后端长驻复用）；为空时每次整理临时创建
+        self.browser_pool = browser_pool
+        self.page_size = page_size
+        self.stop_on_known_page = stop_on_known_page
+        self.task_timeout = task_timeout
+        self.page_timeout = page_timeout
+        self.page_retries = page_retries
+        self.retry_backoff = retry_backoff
+        self.full_sweep_hours = full_sweep_hours
+        # 各类型合并后的结果：(sheet_name, 合并后的清单或None, 整理结果摘要)
+        self.results: List[tuple[str, Optional[pd.DataFrame], Dict[str, Any]]] = []
+        # 进度回调 on_progress(事件名, 数据)，后端用于推送实时同步进度
+        self.on_progress = on_progress
+        # 单个类型整理并合并完成后的回调 on_task_done(sheet_name, 记录, 摘要)，后端据此立即导入该类型
+        self.on_task_done = on_task_done
         # 核心：招聘类型→丝瓜代称映射（关键隐晦化配置）
         self.job_to_sponge = {
             '实习招聘': '新丝瓜',
@@ -78,37 +419,110 @@ class JobMonitor:
             '社会招聘': '熟丝瓜'
         }
 
+    def _emit(self, event: str, **data: Any) -> None:
+        """触发进度回调，回调出错不影响整理"""
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress(event, data)
+        except Exception as e:
+            logging.warning(f"进度回调失败: {e}")
+
     @staticmethod
     def _generate_job_hash(job_data: Dict[str, Any]) -> str:
-        """为丝瓜条目生成唯一标识，用于识别重复条目"""
-        key_fields = ['code', 'title', 'description', 'requirement']
-        hash_string = ''.join(str(job_data.get(field, '')) for field in key_fields)
-        return hashlib.md5(hash_string.encode('utf-8')).hexdigest()
+        """为丝瓜条目生成唯一标识，用于识别重复条目（空值按空字符串处理）"""
+        return generate_job_hash(job_data)
+
+    @staticmethod
+    def _records_to_dataframe(records: List[Any]) -> pd.DataFrame:
+        """将整理后的条目（JobRecord 或字典）按列构造为DataFrame，去掉全空列"""
+        if not records or not isinstance(records[0], JobRecord):
+            return pd.DataFrame(records)
+        columns = {name: [getattr(record, name) for record in records] for name in JOB_RECORD_FIELDS}
+        return pd.DataFrame(columns).dropna(axis=1, how='all')
+
+    @staticmethod
+    def _hash_dataframe(df: pd.DataFrame) -> pd.Series:
+        """列式拼接关键字段后批量生成标识，结果与 _generate_job_hash 一致"""
+        combined = pd.Series('', index=df.index, dtype=object)
+        for field in JOB_HASH_FIELDS:
+            if field in df.columns:
+                combined = combined + df[field].astype(object).where(df[field].notna(), '').astype(str)
+        md5 = hashlib.md5
+        return pd.Series(
+            [md5(value.encode('utf-8')).hexdigest() for value in combined],
+            index=df.index, dtype=object
+        )
+    
+    @staticmethod
+    def _clear_new_flags(df: pd.DataFrame) -> pd.DataFrame:
+        """沿用的旧清单：上次标记的新条目不再算新"""
+        return df.assign(is_new=False) if 'is_new' in df.columns else df
+    
+    @staticmethod
+    def _posting_keys(df: pd.DataFrame) -> pd.Series:
+        """列式计算职位稳定标识，结果与 job_schema.posting_key 一致（job_id → code → job_hash）"""
+        keys = df['job_hash'].astype(object)
+        for field in reversed(POSTING_KEY_FIELDS):
+            if field in df.columns:
+                values = df[field].astype(object)
+                present = values.notna() & (values != '')
+                keys = values.where(present, keys)
+        return keys.astype(str)
+    
+    @staticmethod
+    def _dataframes_to_records(data_frames: Dict[str, pd.DataFrame]) -> Dict[str, List[Dict[str, Any]]]:
+        """将各类型清单转换为可JSON序列化的记录列表（空值为None，时间转为字符串）"""
+        records_by_sheet: Dict[str, List[Dict[str, Any]]] = {}
+        for sheet_name, df in data_frames.items():
+            df = df.copy()
+            for column in df.columns:
+                if pd.api.types.is_datetime64_any_dtype(df[column]):
+                    df[column] = df[column].astype(str).where(df[column].notna(), None)
+            records_by_sheet[sheet_name] = df.astype(object).where(df.notna(), None).to_dict('records')
+        return records_by_sheet
+    
+    @staticmethod
+    def _migrate_legacy_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """兼容旧字段名，将highlight_time迁移到采摘时间"""
+        if 'highlight_time' in df.columns and '采摘时间' not in df.columns:
+            df['采摘时间'] = df['highlight_time']
+            df = df.drop(columns=['highlight_time'], errors='ignore')
+        elif 'highlight_time' in df.columns:
+            # 如果两个字段都存在，优先用采摘时间，然后删除旧字段
+            df = df.drop(columns=['highlight_time'], errors='ignore')
+        return df
     
-    def _save_json_cache(self, data_frames: Dict[str, pd.DataFrame]) -> None:
-        """将数据保存为JSON缓存文件"""
+    def _save_snapshot(self, data_frames: Dict[str, pd.DataFrame]) -> None:
+        """将本次整理结果写入一个新的列式快照"""
         try:
-            cache_data = {}
-            for sheet_name, df in data_frames.items():
-                records = df.to_dict('records')
-                for record in records:
-                    # 处理JSON不可序列化的值
-                    for key, value in record.items():
-                        if pd.isna(value):
-                            record[key] = None
-                        elif isinstance(value, (pd.Timestamp, datetime)):
-                            record[key] = str(value)
-                cache_data[sheet_name] = records
-            
-            with open(self.json_cache_filename, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            
-            logging.info(f"💾 丝瓜清单已存档")
+            snapshot = self.snapshot_store.write(data_frames)
+            logging.info(f"💾 丝瓜清单已存档（快照 {snapshot.id}）")
         except Exception as e:
             logging.error(f"⚠️ 存档时遇到问题: {e}")
     
+    def _load_snapshot(self) -> Dict[str, pd.DataFrame]:
+        """从最新快照按类型加载数据（包括本次不整理的类型，保存时原样带入新快照）"""
+        cache_dataframes: Dict[str, pd.DataFrame] = {}
+        
+        try:
+            # 共享锁：加载期间其他写入方不会清理该快照；最新快照校验失败时自动回退到上一份
+            with self.snapshot_store.lock(shared=True):
+                snapshot = self.snapshot_store.latest()
+                if snapshot is None:
+                    return cache_dataframes
+                
+                for sheet_name in snapshot.sheet_names():
+                    df = self._migrate_legacy_columns(snapshot.read_frame(sheet_name))
+                    cache_dataframes[sheet_name] = df
+                    logging.info(f"已从存档加载 {self._get_sponge_by_sheet(sheet_name)} 的 {len(df)} 条。")
+        except Exception as e:
+            logging.warning(f"读取存档快照时遇到问题: {e}。")
+        
+        return cache_dataframes
+    
     def _load_json_cache(self) -> Dict[str, pd.DataFrame]:
-        """从JSON缓存文件加载数据"""
+        """从旧版JSON缓存文件加载数据（迁移到快照存储前的存档）"""
         cache_dataframes: Dict[str, pd.DataFrame] = {}
         
         if not self.json_cache_filename.exists():
@@ -121,15 +535,7 @@ class JobMonitor:
             
             for sheet_name, records in cache_data.items():
                 if records:
-                    df = pd.DataFrame(records)
-                    # 兼容旧字段名，将highlight_time迁移到采摘时间
-                    if 'highlight_time' in df.columns and '采摘时间' not in df.columns:
-                        df['采摘时间'] = df['highlight_time']
-                        df = df.drop(columns=['highlight_time'], errors='ignore')
-                    elif 'highlight_time' in df.columns:
-                        # 如果两个字段都存在，优先用采摘时间，然后删除旧字段
-                        df = df.drop(columns=['highlight_time'], errors='ignore')
-                    cache_dataframes[sheet_name] = df
+                    cache_dataframes[sheet_name] = self._migrate_legacy_columns(pd.DataFrame(records))
                     # 日志用"丝瓜条目"替代"记录"
                     logging.info(f"已从存档加载 {self._get_sponge_by_sheet(sheet_name)} 的 {len(records)} 条。")
             
@@ -157,26 +563,21 @@ class JobMonitor:
         existing_hashes: Dict[str, Set[str]] = {}
         existing_dataframes: Dict[str, pd.DataFrame] = {}
         
-        # 优先从存档加载
-        cache_dataframes = self._load_json_cache()
+        # 优先从存档快照加载，其次兼容旧版JSON存档
+        has_snapshots = self.snapshot_store.manifest_path.exists()
+        cache_dataframes = self._load_snapshot() or ({} if has_snapshots else self._load_json_cache())
         if cache_dataframes:
             logging.info("已使用存档数据。")
             existing_dataframes = cache_dataframes
+        elif has_snapshots:
+            # 已启用快照存档时只在快照之间回退，不再从Excel重新整理标识
+            logging.warning("存档快照均不可用，将重新整理。")
         elif self.filename.exists():
             logging.info("从清单文件加载数据。")
             try:
                 with pd.ExcelFile(self.filename, engine='openpyxl') as xls:
                     for sheet_name in xls.sheet_names:
-                        df = pd.read_excel(xls, sheet_name=sheet_name)
-                        
-                        # 兼容旧字段名，将highlight_time迁移到采摘时间
-                        if 'highlight_time' in df.columns and '采摘时间' not in df.columns:
-                            df['采摘时间'] = df['highlight_time']
-                            df = df.drop(columns=['highlight_time'], errors='ignore')
-                        elif 'highlight_time' in df.columns:
-                            # 如果两个字段都存在，优先用采摘时间，然后删除旧字段
-                            df = df.drop(columns=['highlight_time'], errors='ignore')
-                        
+                        df = self._migrate_legacy_columns(pd.read_excel(xls, sheet_name=sheet_name))
                         existing_dataframes[sheet_name] = df
                         sponge_type = self._get_sponge_by_sheet(sheet_name)
                         logging.info(f"已加载 {sponge_type} 的 {len(df)} 条。")
@@ -185,234 +586,360 @@ class JobMonitor:
         else:
             logging.info(f"首次整理，将创建新清单。")
         
-        # 生成各类型丝瓜的标识
+        # 生成各类型丝瓜的标识（存档中已保存的job_hash直接复用，只为缺失的行补算）
         for sheet_name, df in existing_dataframes.items():
-            hashes = {self._generate_job_hash(row.to_dict()) for _, row in df.iterrows()}
+            if 'job_hash' not in df.columns:
+                df['job_hash'] = self._hash_dataframe(df)
+            else:
+                missing = df['job_hash'].isna()
+                if missing.any():
+                    df.loc[missing, 'job_hash'] = self._hash_dataframe(df[missing])
+            hashes = set(df['job_hash'])
             existing_hashes[sheet_name] = hashes
             sponge_type = self._get_sponge_by_sheet(sheet_name)
             logging.info(f"已整理 {sponge_type} {len(hashes)} 条标识。")
         
         return existing_hashes, existing_dataframes
 
-    async def _run_single_task_async(self, task_config: Dict[str, Any], browser: Browser) -> None:
-        """异步执行单个丝瓜清单整理任务"""
-        task_name = task_config['name']
-        sponge_type = self.job_to_sponge.get(task_name, task_name)
-        sheet_name = task_config['sheet_name']
-        scraped_jobs: List[Dict[str, Any]] = []
-        context = None
-        
-        try:
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
-            )
-            page = await context.new_page()
-            logging.info(f"🔍 正在查看 {sponge_type}...")
+    @staticmethod
+    def _page_url(task_config: Dict[str, Any], current: int, limit: int) -> str:
+        """生成带分页参数（current/limit）的清单页面URL"""
+        parsed = urlparse(task_config['url'])
+        query = parse_qs(parsed.query, keep_blank_values=True)
+        query['current'] = [str(current)]
+        query['limit'] = [str(limit)]
+        return parsed._replace(query=urlencode(query, doseq=True)).geturl()
 
+    async def _fetch_page_via_browser(self, task_config: Dict[str, Any], browser_pool: BrowserPool,
+                                      current: int, limit: int) -> Dict[str, Any]:
+        """浏览器方式：打开指定页的清单页面并截获职位接口响应"""
+        async with browser_pool.page() as page:
             async with page.expect_response(lambda r: task_config['api_url_mark'] in r.url, timeout=30000) as response_info:
-                await page.goto(task_config['url'], wait_until="domcontentloaded")
+                await page.goto(self._page_url(task_config, current, limit), wait_until="domcontentloaded")
             
             response = await response_info.value
-            if response.status == 200:
-                data = await response.json()
-                job_list = data.get("data", {}).get("job_post_list", [])
-                
-                # 调试日志（保持原功能，仅修改表述）
-                if job_list and logging.getLogger().isEnabledFor(logging.DEBUG):
-                    logging.debug(f"{sponge_type} 清单第一条详情: {json.dumps(job_list[0], ensure_ascii=False, indent=2)}")
-                
-                for job in job_list:
-                    # 将时间戳转换为北京时间
-                    publish_time = datetime.fromtimestamp(job["publish_time"] / 1000, tz=BEIJING_TZ)
-                    
-                    # 职位信息整理（保持原数据结构，不修改字段名避免功能异常）
-                    job_info = {
-                        "title": job.get("title"),
-                        "sub_title": job.get("sub_title"),
-                        "description": job.get("description"),
-                        "requirement": job.get("requirement"),
-                        "publish_time": publish_time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "code": job.get("code"),
-                        "job_id": job.get("id"),
-                        "job_type": job.get("job_type"),
-                        "job_category": job.get("job_category", {}).get("name") if isinstance(job.get("job_category"), dict) else job.get("job_category"),
-                        "job_function": job.get("job_function", {}).get("name") if isinstance(job.get("job_function"), dict) else job.get("job_function"),
-                        "department_id": job.get("department_id"),
-                        "job_process_id": job.get("job_process_id"),
-                        "recruit_type_name": job.get("recruit_type", {}).get("name") if isinstance(job.get("recruit_type"), dict) else None,
-                        "recruit_type_parent": job.get("recruit_type", {}).get("parent", {}).get("name") if isinstance(job.get("recruit_type"), dict) and job.get("recruit_type", {}).get("parent") else None,
-                        "job_subject_name": job.get("job_subject", {}).get("name", {}).get("zh_cn") if isinstance(job.get("job_subject"), dict) and isinstance(job.get("job_subject", {}).get("name"), dict) else job.get("job_subject", {}).get("name") if isinstance(job.get("job_subject"), dict) else None,
-                        "city_list": ", ".join([city.get("name", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
-                        "city_codes": ", ".join([city.get("code", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
-                        "address": job.get("address"),
-                        "degree": job.get("degree"),
-                        "experience": job.get("experience"),
-                        "min_salary": job.get("min_salary"),
-                        "max_salary": job.get("max_salary"),
-                        "currency": job.get("currency"),
-                        "head_count": job.get("head_count"),
-                        "job_hot_flag": job.get("job_hot_flag"),
-                        "is_urgent": job.get("is_urgent"),
-                        "job_active_status": job.get("job_active_status"),
-                        "recommend_id": job.get("recommend_id"),
-                        "team_name": job.get("team_name"),
-                        "brand_name": job.get("brand_name"),
-                        "ats_online_apply": job.get("ats_online_apply"),
-                        "pc_job_url": job.get("pc_job_url"),
-                        "wap_job_url": job.get("wap_job_url"),
-                        "storefront_mode": job.get("storefront_mode"),
-                        "process_type": job.get("process_type"),
-                    }
-                    
-                    # 处理额外字段
-                    for field in task_config['extra_fields']:
-                        value = job.get(field)
-                        job_info[field] = value.get('name') if isinstance(value, dict) else value
-                    
-                    # 清理空值
-                    job_info = {k: v for k, v in job_info.items() if v is not None and v != ''}
-                    
-                    scraped_jobs.append(job_info)
-                
-                logging.info(f"✅ {sponge_type} 查看完成，共找到 {len(scraped_jobs)} 条。")
-            else:
-                logging.error(f"❌ {sponge_type} 查看遇到问题，状态: {response.status}")
+            if response.status != 200:
+                raise RuntimeError(f"查看遇到问题，状态: {response.status}")
+            
+            data = await response.json()
+        
+        return data.get("data") or {}
 
-        except Exception as e:
-            logging.error(f"❌ {sponge_type} 整理遇到问题: {e}", exc_info=False)
-        finally:
-            if context:
-                await context.close()
-            self.results.append((sheet_name, task_name, scraped_jobs))
+    async def _fetch_page(self, task_config: Dict[str, Any], api_client: Optional[JobApiClient],
+                          browser_pool: Optional[BrowserPool], current: int, use_api: bool,
+                          stats: Dict[str, int]) -> tuple[Dict[str, Any], bool]:
+        """抓取一页，返回 (数据, 之后是否继续使用接口直连)
+        
+        每次请求限时 page_timeout 秒；接口直连失败且有浏览器池时改用浏览器，
+        其余失败按 retry_backoff * 2^n 秒指数退避后重试，最多 page_retries 次。
+        """
+        sponge_type = self.job_to_sponge.get(task_config['name'], task_config['name'])
+        attempt = 0
+        while True:
+            try:
+                if use_api:
+                    try:
+                        data = await asyncio.wait_for(
+                            api_client.search(task_config, current=current, limit=self.page_size), self.page_timeout
+                        )
+                        return data, True
+                    except Exception as e:
+                        if browser_pool is None:
+                            raise
+                        logging.warning(f"⚠️ {sponge_type} 接口直连失败: {_describe_error(e)}，改用浏览器查看。")
+                        use_api = False
+                data = await asyncio.wait_for(
+                    self._fetch_page_via_browser(task_config, browser_pool, current, self.page_size), self.page_timeout
+                )
+                return data, False
+            except Exception as e:
+                if attempt >= self.page_retries:
+                    if isinstance(e, asyncio.TimeoutError):
+                        # 与整个类型的整理时限区分开
+                        raise RuntimeError(f"第 {current} 页请求超过 {self.page_timeout:g} 秒") from e
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                attempt += 1
+                stats['retries'] += 1
+                logging.warning(f"⚠️ {sponge_type} 第 {current} 页遇到问题: {_describe_error(e)}，"
+                                f"{delay:g}秒后第 {attempt} 次重试。")
+                await asyncio.sleep(delay)
 
-    def _process_results(self, existing_hashes: Dict[str, Set[str]], existing_dataframes: Dict[str, pd.DataFrame]) -> Dict:
-        """处理整理结果，合并新旧丝瓜条目并标记新条目"""
-        final_data_frames: Dict[str, pd.DataFrame] = {}
-        summary_info: List[Dict[str, Any]] = []
-        current_time = datetime.now(BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S")
+    async def _iter_job_pages(self, task_config: Dict[str, Any],
+                              api_client: Optional[JobApiClient],
+                              browser_pool: Optional[BrowserPool],
+                              known_hashes: Set[str],
+                              stats: Optional[Dict[str, int]] = None) -> AsyncIterator[List[JobRecord]]:
+        """逐页抓取并整理职位，每页产出已带 job_hash 的条目（优先接口直连，失败时回退浏览器）
+        
+        stats 记录已抓取的页数（pages）、重试次数（retries），以及是否翻到了最后一页（complete）。
+        """
+        sponge_type = self.job_to_sponge.get(task_config['name'], task_config['name'])
+        extract = compile_extractor(tuple(task_config['extra_fields']))
+        use_api = api_client is not None
+        stats = stats if stats is not None else {'pages': 0, 'retries': 0, 'complete': False}
+        current = 1
+        fetched = 0
         
-        for sheet_name, task_name, new_jobs_data in self.results:
-            sponge_type = self.job_to_sponge.get(task_name, task_name)
-            previous_hashes = existing_hashes.get(sheet_name, set())
-            existing_df = existing_dataframes.get(sheet_name, pd.DataFrame())
+        while True:
+            data, use_api = await self._fetch_page(task_config, api_client, browser_pool, current, use_api, stats)
+            stats['pages'] += 1
             
-            if not new_jobs_data:
-                # 无新数据时保留旧清单
-                if not existing_df.empty:
-                    final_data_frames[sheet_name] = self._sort_jobs_dataframe(existing_df)
-                summary_info.append({'task_name': task_name, 'new_count': 0, 'total_count': len(existing_df)})
-                logging.info(f"ℹ️ {sponge_type} 无新增，保留原有 {len(existing_df)} 条。")
-                continue
+            job_list = data.get("job_post_list") or []
             
-            # 标记新条目并添加记录时间
-            for job in new_jobs_data:
-                job_hash = self._generate_job_hash(job)
-                is_new = job_hash not in previous_hashes
-                job['is_new'] = is_new
-                job['job_hash'] = job_hash  # 临时添加hash用于后续匹配
-                # 新条目设置当前时间，旧条目暂时不设置（后面从历史数据中获取）
-                job['采摘时间'] = current_time if is_new else None
+            # 调试日志（保持原功能，仅修改表述）
+            if current == 1 and job_list and logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(f"{sponge_type} 清单第一条详情: {json.dumps(job_list[0], ensure_ascii=False, indent=2)}")
             
-            new_df = pd.DataFrame(new_jobs_data)
+            page_jobs = [extract(job) for job in job_list]
+            for record in page_jobs:
+                record.compute_hash()
+            if page_jobs:
+                yield page_jobs
             
-            # 合并新旧清单
+            fetched += len(job_list)
+            total = data.get("count") or 0
+            if not job_list or len(job_list) < self.page_size or (total and fetched >= total):
+                stats['complete'] = True
+                break
+            if self.stop_on_known_page and known_hashes and all(record.job_hash in known_hashes for record in page_jobs):
+                logging.info(f"ℹ️ {sponge_type} 第 {current} 页均为已知条目，提前结束翻页。")
+                break
+            current += 1
+
+    async def _run_single_task_async(self, task_config: Dict[str, Any],
+                                     api_client: Optional[JobApiClient] = None,
+                                     browser_pool: Optional[BrowserPool] = None,
+                                     known_hashes: Optional[Set[str]] = None) -> tuple[List[JobRecord], Dict[str, Any]]:
+        """异步执行单个丝瓜清单整理任务，返回 (抓到的条目, 整理结果)
+        
+        整理结果 status：ok（全部完成）/ partial（超时或出错前已抓到部分页面，保留这些条目）/ failed（未抓到条目）；
+        complete 表示翻到了最后一页（可据此识别已下线的职位）。
+        整个类型限时 task_timeout 秒，卡住的页面不会拖住其他类型。
+        距上次完整翻页超过 full_sweep_hours 小时时不提前结束翻页。
+        """
+        task_name = task_config['name']
+        sponge_type = self.job_to_sponge.get(task_name, task_name)
+        sheet_name = task_config['sheet_name']
+        scraped_jobs: List[JobRecord] = []
+        stats = {'pages': 0, 'retries': 0, 'complete': False}
+        start = time.monotonic()
+        error = None
+        if time.monotonic() - _FULL_SWEEP_AT.get(sheet_name, float('-inf')) >= self.full_sweep_hours * 3600:
+            known_hashes = None
+        
+        async def collect() -> None:
+            async for page_jobs in self._iter_job_pages(task_config, api_client, browser_pool,
+                                                        known_hashes or set(), stats):
+                scraped_jobs.extend(page_jobs)
+        
+        logging.info(f"🔍 正在查看 {sponge_type}...")
+        self._emit('crawl_task_started', task=sheet_name, name=sponge_type)
+        try:
+            await asyncio.wait_for(collect(), self.task_timeout)
+            logging.info(f"✅ {sponge_type} 查看完成，共找到 {len(scraped_jobs)} 条。")
+        except asyncio.TimeoutError:
+            error = f"超过整理时限 {self.task_timeout:g} 秒"
+            logging.error(f"❌ {sponge_type} {error}，已抓到 {len(scraped_jobs)} 条。")
+        except Exception as e:
+            error = _describe_error(e)
+            logging.error(f"❌ {sponge_type} 整理遇到问题: {error}，已抓到 {len(scraped_jobs)} 条。", exc_info=False)
+        
+        if error is None:
+            status = 'ok'
+        else:
+            status = 'partial' if scraped_jobs else 'failed'
+        complete = error is None and stats['complete']
+        if complete:
+            _FULL_SWEEP_AT[sheet_name] = time.monotonic()
+        task_result = {
+            'status': status,
+            'complete': complete,
+            'count': len(scraped_jobs),
+            'pages': stats['pages'],
+            'retries': stats['retries'],
+            'duration': round(time.monotonic() - start, 3),
+            'error': error
+        }
+        self._emit('crawl_task_finished', task=sheet_name, name=sponge_type, **task_result)
+        return scraped_jobs, task_result
+
+    async def _crawl_task_async(self, task_config: Dict[str, Any],
+                                api_client: Optional[JobApiClient], browser_pool: Optional[BrowserPool],
+                                existing_hashes: Dict[str, Set[str]], existing_dataframes: Dict[str, pd.DataFrame],
+                                current_time: str) -> None:
+        """整理单个类型并立即与旧清单合并，未失败时通过 on_task_done 交出该类型的记录（不等待其他类型）"""
+        sheet_name = task_config['sheet_name']
+        scraped_jobs, task_result = await self._run_single_task_async(
+            task_config, api_client, browser_pool, existing_hashes.get(sheet_name)
+        )
+        final_df, info = self._merge_sheet(sheet_name, task_config['name'], scraped_jobs,
+                                           existing_dataframes, current_time, complete=task_result['complete'])
+        info.update(task_result)
+        self.results.append((sheet_name, final_df, info))
+        
+        if self.on_task_done is not None and final_df is not None and task_result['status'] != 'failed':
+            try:
+                self.on_task_done(sheet_name, self._dataframes_to_records({sheet_name: final_df})[sheet_name], info)
+            except Exception as e:
+                logging.warning(f"类型整理完成回调失败: {e}")
+
+    def _merge_sheet(self, sheet_name: str, task_name: str, new_jobs_data: List[JobRecord],
+                     existing_dataframes: Dict[str, pd.DataFrame], current_time: str,
+                     complete: bool = False) -> tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+        """合并单个类型的新旧丝瓜条目并标记新条目，返回 (合并后的清单或None, 摘要)
+        
+        新旧条目按职位稳定标识（job_id/code）对应：描述被编辑的职位替换旧版本，不算新条目。
+        complete 为True（本次翻页到了最后一页）时，本次未出现的旧条目视为已下线，不再保留。
+        """
+        sponge_type = self.job_to_sponge.get(task_name, task_name)
+        existing_df = existing_dataframes.get(sheet_name, pd.DataFrame())
+        
+        if not new_jobs_data:
+            # 无新数据（含整理失败）时保留旧清单，上次的新条目标记不再沿用
+            logging.info(f"ℹ️ {sponge_type} 无新增，保留原有 {len(existing_df)} 条。")
+            final_df = None
             if not existing_df.empty:
-                # 确保旧清单有必要字段
-                if 'is_new' not in existing_df.columns:
-                    existing_df['is_new'] = False
-                if '采摘时间' not in existing_df.columns:
-                    existing_df['采摘时间'] = None
-                
-                # 为旧数据生成hash以便匹配
-                existing_df['job_hash'] = existing_df.apply(lambda row: self._generate_job_hash(row.to_dict()), axis=1)
-                
-                # 为新数据中的旧条目（is_new=False）从历史数据中恢复采摘时间
-                old_hash_to_time = dict(zip(existing_df['job_hash'], existing_df['采摘时间']))
-                for idx, row in new_df.iterrows():
-                    if not row['is_new'] and row['job_hash'] in old_hash_to_time:
-                        # 保留原有的采摘时间
-                        new_df.at[idx, '采摘时间'] = old_hash_to_time[row['job_hash']]
-                
-                # 去重：使用新抓取的数据覆盖旧数据，但采摘时间已经保留
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                combined_df = combined_df.drop_duplicates(subset=['job_hash'], keep='last')
-                combined_df = combined_df.drop(columns=['job_hash'])
-                final_df = combined_df
-            else:
-                # 首次运行，删除临时hash列
-                final_df = new_df.drop(columns=['job_hash'], errors='ignore')
+                final_df = self._sort_jobs_dataframe(self._clear_new_flags(existing_df))
+            return final_df, {'task_name': task_name, 'sheet_name': sheet_name,
+                              'new_count': 0, 'removed_count': 0, 'total_count': len(existing_df)}
+        
+        # 标记新条目（抓取时已逐页生成job_hash，缺失时再批量补算）
+        new_df = self._records_to_dataframe(new_jobs_data)
+        if 'job_hash' not in new_df.columns or new_df['job_hash'].isna().any():
+            new_df['job_hash'] = self._hash_dataframe(new_df)
+        new_keys = self._posting_keys(new_df)
+        removed_count = 0
+        
+        # 合并新旧清单
+        if not existing_df.empty:
+            # 确保旧清单有必要字段；上次标记的新条目在本次整理后不再算新（分页提前结束时未重新抓取）
+            existing_df['is_new'] = False
+            if '采摘时间' not in existing_df.columns:
+                existing_df['采摘时间'] = None
+            if 'job_hash' not in existing_df.columns:
+                existing_df['job_hash'] = self._hash_dataframe(existing_df)
+            existing_keys = self._posting_keys(existing_df)
+            new_df['is_new'] = ~new_keys.isin(set(existing_keys))
             
-            final_df = self._sort_jobs_dataframe(final_df)
-            final_data_frames[sheet_name] = final_df
+            # 旧条目（含被编辑的职位）通过稳定标识恢复原有采摘时间，新条目记为本次时间
+            old_key_to_time = pd.Series(existing_df['采摘时间'].values, index=existing_keys.values)
+            old_key_to_time = old_key_to_time[~old_key_to_time.index.duplicated(keep='last')]
+            new_df['采摘时间'] = new_keys.map(old_key_to_time).astype(object)
+            new_df.loc[new_df['is_new'], '采摘时间'] = current_time
             
-            # 统计新条目数量和采摘时间情况
-            new_count = final_df['is_new'].sum() if 'is_new' in final_df.columns else 0
-            has_time_count = final_df['采摘时间'].notna().sum() if '采摘时间' in final_df.columns else 0
-            summary_info.append({
-                'task_name': task_name,
-                'new_count': new_count,
-                'total_count': len(final_df)
-            })
-            logging.info(f"ℹ️ {sponge_type} 新增 {new_count} 条，当前共 {len(final_df)} 条（其中{has_time_count}条有采摘时间）。")
-        
-        return {"data_frames": final_data_frames, "summary": summary_info}
+            # 本次抓到的职位替换旧版本；翻页完整时未出现的旧条目已下线，否则沿用
+            unseen = ~existing_keys.isin(set(new_keys))
+            if complete:
+                removed_count = int(unseen.sum())
+                combined_df = new_df
+            else:
+                combined_df = pd.concat([existing_df[unseen], new_df], ignore_index=True)
+            final_df = combined_df.drop_duplicates(subset=['job_hash'], keep='last')
+        else:
+            # 首次运行，全部条目记为本次采摘
+            new_df['is_new'] = True
+            new_df['采摘时间'] = current_time
+            final_df = new_df
+        
+        final_df = self._sort_jobs_dataframe(final_df)
+        
+        # 统计新条目数量和采摘时间情况
+        new_count = final_df['is_new'].sum() if 'is_new' in final_df.columns else 0
+        has_time_count = final_df['采摘时间'].notna().sum() if '采摘时间' in final_df.columns else 0
+        logging.info(f"ℹ️ {sponge_type} 新增 {new_count} 条，下线 {removed_count} 条，"
+                     f"当前共 {len(final_df)} 条（其中{has_time_count}条有采摘时间）。")
+        return final_df, {
+            'task_name': task_name,
+            'sheet_name': sheet_name,
+            'new_count': int(new_count),
+            'removed_count': removed_count,
+            'total_count': len(final_df)
+        }
+
+    def _process_results(self, existing_dataframes: Dict[str, pd.DataFrame]) -> Dict:
+        """汇总各类型的合并结果（按 TASK_CONFIGS 排序）
+        
+        crawled_sheets 为本次整理成功（ok/partial）的类型；只整理了部分类型或有类型失败时，
+        其余类型沿用存档数据（清除新条目标记，Excel只高亮本次整理发现的新条目），保证快照和Excel仍包含全部类型。
+        """
+        sheet_order = [task['sheet_name'] for task in TASK_CONFIGS]
+        order = lambda sheet_name: sheet_order.index(sheet_name) if sheet_name in sheet_order else len(sheet_order)
+        
+        final_data_frames: Dict[str, pd.DataFrame] = {}
+        for sheet_name, final_df, _ in self.results:
+            if final_df is not None:
+                final_data_frames[sheet_name] = final_df
+        for sheet_name, existing_df in existing_dataframes.items():
+            if sheet_name not in final_data_frames and not existing_df.empty:
+                final_data_frames[sheet_name] = self._clear_new_flags(existing_df)
+        final_data_frames = dict(sorted(final_data_frames.items(), key=lambda item: order(item[0])))
+        
+        summary_info = sorted((info for _, _, info in self.results), key=lambda info: order(info['sheet_name']))
+        crawled_sheets = {sheet_name for sheet_name, _, info in self.results if info['status'] != 'failed'}
+        return {"data_frames": final_data_frames, "summary": summary_info, "crawled_sheets": crawled_sheets}
 
     def _save_and_highlight(self, data_frames: Dict[str, pd.DataFrame]) -> None:
-        """保存清单到Excel并高亮新条目"""
+        """保存存档快照，并按配置导出Excel清单（高亮新条目）"""
         if not data_frames:
             logging.info("暂无数据需要保存。")
             return
-            
+        
+        # 存档快照是下次识别新条目的依据，始终先写
+        self._save_snapshot(data_frames)
+        
+        if self.excel_export == 'off':
+            return
+        if self.excel_export == 'async':
+            # 单线程执行器：多次导出按顺序写出，不阻塞整理结果返回
+            _get_excel_executor().submit(self._export_excel, data_frames)
+        else:
+            self._export_excel(data_frames)
+
+    def _export_excel(self, data_frames: Dict[str, pd.DataFrame]) -> None:
+        """以只写模式单遍写出Excel清单，逐行写出时直接为新条目套用高亮"""
+        # 先写同目录下的临时文件再原子替换，崩溃或并发写入时不会留下半份清单
+        tmp_path = self.filename.with_name(f".{self.filename.stem}.{os.getpid()}.tmp{self.filename.suffix}")
         try:
-            # 保存Excel文件
-            with pd.ExcelWriter(self.filename, engine='openpyxl') as writer:
-                for sheet_name, df in data_frames.items():
-                    # 隐藏is_new字段，保留采摘时间等展示字段
-                    display_df = df.drop(columns=['is_new'], errors='ignore')
-                    
-                    # 调试：确认采摘时间列是否存在
-                    sponge_type = self._get_sponge_by_sheet(sheet_name)
-                    if '采摘时间' in display_df.columns:
-                        has_time = display_df['采摘时间'].notna().sum()
-                        logging.info(f"📝 准备保存 {sponge_type}：包含采摘时间列，{has_time}条有时间记录")
-                        # 确保采摘时间列在靠前位置（方便查看）
-                        cols = ['采摘时间'] + [col for col in display_df.columns if col != '采摘时间']
-                        display_df = display_df[cols]
-                    else:
-                        logging.warning(f"⚠️ {sponge_type} 数据中缺少采摘时间列！")
-                    
-                    display_df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            # 为新条目添加黄色高亮
-            workbook = openpyxl.load_workbook(self.filename)
+            workbook = openpyxl.Workbook(write_only=True)
             highlight_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
             
             for sheet_name, df in data_frames.items():
-                if sheet_name in workbook.sheetnames and 'is_new' in df.columns:
-                    worksheet = workbook[sheet_name]
-                    sponge_type = self._get_sponge_by_sheet(sheet_name)
-                    new_count = 0
-                    for row_idx, is_new in enumerate(df['is_new'], start=2):  # 跳过表头
-                        if is_new:
-                            new_count += 1
-                            for col_idx in range(1, worksheet.max_column + 1):
-                                worksheet.cell(row=row_idx, column=col_idx).fill = highlight_fill
-                    if new_count > 0:
-                        logging.info(f"✨ {sponge_type} 已标记 {new_count} 条新条目。")
+                worksheet = workbook.create_sheet(title=sheet_name)
+                sponge_type = self._get_sponge_by_sheet(sheet_name)
+                is_new = df['is_new'].fillna(False).astype(bool).tolist() if 'is_new' in df.columns else [False] * len(df)
+                
+                # 隐藏is_new和job_hash字段，采摘时间列放在最前（方便查看）
+                display_df = df.drop(columns=['is_new', 'job_hash'], errors='ignore')
+                if '采摘时间' in display_df.columns:
+                    display_df = display_df[['采摘时间'] + [col for col in display_df.columns if col != '采摘时间']]
+                else:
+                    logging.warning(f"⚠️ {sponge_type} 数据中缺少采摘时间列！")
+                display_df = display_df.astype(object).where(display_df.notna(), None)
+                
+                worksheet.append([str(column) for column in display_df.columns])
+                new_count = 0
+                for row, row_is_new in zip(display_df.itertuples(index=False, name=None), is_new):
+                    if row_is_new:
+                        new_count += 1
+                        cells = []
+                        for value in row:
+                            cell = WriteOnlyCell(worksheet, value=value)
+                            cell.fill = highlight_fill
+                            cells.append(cell)
+                        worksheet.append(cells)
+                    else:
+                        worksheet.append(row)
+                if new_count > 0:
+                    logging.info(f"✨ {sponge_type} 已标记 {new_count} 条新条目。")
             
-            workbook.save(self.filename)
+            workbook.save(tmp_path)
+            os.replace(tmp_path, self.filename)
             logging.info(f"💾 清单已保存。")
             
-            # 保存JSON缓存
-            self._save_json_cache(data_frames)
-            
         except Exception as e:
             logging.error(f"⚠️ 保存清单时遇到问题: {e}")
-            # 即使Excel保存失败，仍尝试保存缓存
-            try:
-                self._save_json_cache(data_frames)
-            except Exception as cache_error:
-                logging.error(f"⚠️ 存档时遇到问题: {cache_error}")
+            tmp_path.unlink(missing_ok=True)
 
     @staticmethod
     def _send_notification(summary: List[Dict[str, Any]]) -> None:
@@ -490,47 +1017,65 @@ class JobMonitor:
             logging.info(message.replace("\\n", "\n"))
             logging.info("---------------------")
 
-    async def run_async(self, silent_mode: bool = False):
-        """执行完整的清单整理流程（异步）"""
-        start_time = datetime.now(BEIJING_TZ)
-        logging.info(f"--- 开始整理 {start_time.strftime('%Y-%m-%d %H:%M:%S')} ---")
-        
+    async def crawl_async(self) -> Dict[str, Any]:
+        """整理并合并各类型丝瓜清单，直接返回记录（供后端进程内调用）"""
         # 确保输出目录存在
         DOCUMENTS_PATH.mkdir(exist_ok=True)
+        self.results = []
         
         # 加载历史清单
         existing_hashes, existing_dataframes = self._load_existing_hashes()
+        current_time = datetime.now(BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S")
         
-        # 异步抓取各类型丝瓜清单
-        async with async_playwright() as p:
-            # 浏览器启动配置（支持Docker环境）
-            launch_options = {
-                'headless': self.headless,
-                'args': [
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                ]
-            }
+        # 异步抓取各类型丝瓜清单，每个类型完成后立即合并（单个类型超时或失败不影响其他类型）
+        async with AsyncExitStack() as stack:
+            api_client = None
+            if self.engine in ('api', 'auto'):
+                api_client = await stack.enter_async_context(JobApiClient(self.api_base))
             
-            # Docker环境中，Playwright可能需要明确的浏览器路径
-            # 检查环境变量 PLAYWRIGHT_BROWSERS_PATH
-            if os.getenv('PLAYWRIGHT_BROWSERS_PATH'):
-                logging.info(f"使用Playwright浏览器路径: {os.getenv('PLAYWRIGHT_BROWSERS_PATH')}")
+            browser_pool = None
+            if self.engine in ('browser', 'auto'):
+                # 浏览器按需启动：接口直连全部成功时不会启动Chromium
+                browser_pool = self.browser_pool
+                if browser_pool is None:
+                    browser_pool = BrowserPool(headless=self.headless)
+                    stack.push_async_callback(browser_pool.close)
             
-            browser = await p.chromium.launch(**launch_options)
-            tasks_to_run = [self._run_single_task_async(task, browser) for task in self.tasks]
+            tasks_to_run = [
+                self._crawl_task_async(task, api_client, browser_pool, existing_hashes, existing_dataframes, current_time)
+                for task in self.tasks
+            ]
             await asyncio.gather(*tasks_to_run)
-            await browser.close()
 
         # 处理整理结果
-        results = self._process_results(existing_hashes, existing_dataframes)
+        results = self._process_results(existing_dataframes)
         data_frames = results["data_frames"]
-        summary = results["summary"]
         
-        # 保存并高亮新条目
+        # 保存并高亮新条目（存档仍用于下次识别新条目）
+        start = time.monotonic()
         self._save_and_highlight(data_frames)
+        self._emit('snapshot_saved', sheets=len(data_frames), duration=round(time.monotonic() - start, 3))
+        
+        # 只返回本次整理成功的类型，导入时未整理或整理失败的类型不会被误判为下线
+        crawled_sheets = results["crawled_sheets"]
+        return {
+            "records": self._dataframes_to_records(
+                {sheet_name: df for sheet_name, df in data_frames.items() if sheet_name in crawled_sheets}
+            ),
+            "summary": results["summary"]
+        }
+
+    def crawl(self) -> Dict[str, Any]:
+        """同步入口：在当前线程中完成整理并返回记录"""
+        return asyncio.run(self.crawl_async())
+
+    async def run_async(self, silent_mode: bool = False):
+        """执行完整的清单整理流程（异步）"""
+        start_time = datetime.now(BEIJING_TZ)
+        logging.info(f"--- 开始整理 {start_time.strftime('%Y-%m-%d %H:%M:%S')} ---")
+        
+        results = await self.crawl_async()
+        summary = results["summary"]
         
         # 输出整理结果日志
         total_new = sum(info.get('new_count', 0) for info in summary)
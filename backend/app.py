@@ -3,24 +3,35 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 import logging
 import os
-import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 # 导入配置
-from config import MONGO_URI, MONGO_DB_NAME, DEBUG, CORS_ORIGINS, JSON_CACHE_FILE, CRAWLER_SCRIPT_PATH
+from config import MONGO_URI, MONGO_DB_NAME, DEBUG, CORS_ORIGINS, JSON_CACHE_FILE, SNAPSHOT_DIR, CRAWLER_SCRIPT_PATH, IMPORT_BATCH_SIZE, STATS_CACHE_TTL, STATS_REFRESH_WINDOWS, STATS_CACHE_MAX_WINDOWS, COMPRESS_MIN_SIZE, QUERY_CACHE_SIZE, QUERY_CACHE_TTL, SEARCH_INDEX_ENABLED, SEARCH_INDEX_FILE, SYNC_LEASE_TTL
+from config import (CRAWL_TASK_INTERVALS, CRAWL_MIN_INTERVAL, CRAWL_MAX_INTERVAL, CRAWL_BACKOFF, CRAWL_SPEEDUP,
+                    CRAWL_JITTER, CRAWL_QUIET_HOURS, CRAWL_TICK_SECONDS)
 
 # 导入服务
 from services.db import DatabaseService
 from services.importer import DataImporter
+from services.crawler import CrawlerService
+from services.stats_cache import StatsCache
+from services.generation import DataGeneration
+from services.search_index import SearchIndex
+from services.sync_coordinator import SyncCoordinator
+from services.crawl_scheduler import CrawlScheduler
+from services.response import init_response_layer
 
 # 导入路由
 from routes.items import init_routes as init_items_routes
 from routes.stats import init_routes as init_stats_routes
 from routes.sync import init_routes as init_sync_routes
+from routes.events import init_routes as init_events_routes
 
 # 北京时区
 BEIJING_TZ = pytz.timezone('Asia/Shanghai')
@@ -35,66 +46,94 @@ logger = logging.getLogger(__name__)
 # 全局调度器实例
 scheduler = None
 
+# 全局爬虫服务实例（持有长驻浏览器池）
+crawler = None
 
-def scheduled_crawl_task(db_service, importer):
-    """定时爬取任务"""
-    try:
-        start_time = datetime.now(BEIJING_TZ)
-        logger.info(f"[定时任务] 开始执行爬取任务 - {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # 运行爬虫脚本
-        result = subprocess.run(
-            ['python3', str(CRAWLER_SCRIPT_PATH), '--auto'],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5分钟超时
-        )
-        
-        if result.returncode != 0:
-            raise Exception(f"爬虫脚本执行失败: {result.stderr}")
-        
-        logger.info("[定时任务] 爬虫脚本执行成功，开始导入数据...")
-        
-        # 导入数据到MongoDB
-        import_result = importer.import_from_json(clear_existing=False)
-        
-        if not import_result['success']:
-            raise Exception(import_result['message'])
-        
-        # 记录同步日志
-        duration = (datetime.now(BEIJING_TZ) - start_time).total_seconds()
-        db_service.add_sync_log({
-            'type': 'scheduled',
-            'status': 'success',
-            'new_count': import_result.get('imported', 0),
-            'total_count': db_service.items.count_documents({}),
-            'duration': duration,
-            'error_message': None
-        })
-        
-        end_time = datetime.now(BEIJING_TZ)
-        logger.info(f"[定时任务] 任务完成 - {end_time.strftime('%Y-%m-%d %H:%M:%S')} (耗时: {duration:.2f}秒)")
-        logger.info(f"[定时任务] {import_result['message']}")
-        
-    except Exception as e:
-        error_msg = str(e)
-        logger.error(f"[定时任务] 执行失败: {error_msg}", exc_info=True)
+
+def crawl_and_import(run, importer, crawler, crawl_scheduler):
+    """同步任务：进程内运行爬虫并导入数据（由同步协调器单飞调用），各阶段以事件汇报进度
+    
+    run.tasks 为本次整理的类型（定时任务只整理到期的类型，手动同步整理全部）；
+    每个类型整理成功（ok/partial）后立即交给单线程导入执行器导入，不等待最慢的类型；
+    整理失败的类型不导入，沿用已有数据。全部类型失败时同步失败，部分失败时结果带 failed_tasks。
+    整理结果交给调度器调整各类型的整理间隔。
+    进度划分：每个类型的抓取与导入各占一步，10→90 按完成的步数推进，完成 100。
+    """
+    task_count = max(len(run.tasks) if run.tasks is not None else len(crawler.tasks), 1)
+    progress_lock = threading.Lock()
+    steps = 0
+    
+    def step_progress():
+        nonlocal steps
+        with progress_lock:
+            steps += 1
+            return 10 + 80 * steps // (2 * task_count)
+    
+    def on_crawl_progress(event, data):
+        if event == 'crawl_task_started':
+            run.emit(event, message=f"正在抓取{data['name']}...", **data)
+        elif event == 'crawl_task_finished':
+            if data['status'] == 'failed':
+                # 失败的类型不会导入，抓取与导入两步一并计入
+                step_progress()
+                message = f"{data['name']}抓取失败: {data['error']}"
+            elif data['status'] == 'partial':
+                message = f"{data['name']}部分完成，共 {data['count']} 条（{data['error']}）"
+            else:
+                message = f"{data['name']}抓取完成，共 {data['count']} 条"
+            run.emit(event, progress=step_progress(), message=message, **data)
+        else:
+            run.emit(event, message='存档已保存', **data)
+    
+    def on_import_progress(event, data):
+        if event == 'import_batch':
+            run.emit(event, message=f"正在导入 {data['sheet']}（{data['written']}/{data['changed']}）", **data)
+    
+    def import_sheet(sheet_name, records):
+        run.emit('import_started', message=f'{sheet_name} 开始导入...', sheet=sheet_name)
+        start = time.monotonic()
+        result = importer.import_records({sheet_name: records}, clear_existing=False,
+                                         on_progress=on_import_progress)
+        run.emit('import_finished', progress=step_progress(), message=f'{sheet_name} 导入完成', sheet=sheet_name,
+                 duration=round(time.monotonic() - start, 3),
+                 **{key: result.get(key) for key in ('success', 'imported', 'updated', 'unchanged', 'removed')})
+        return result
+    
+    # 单线程执行：各类型按完成顺序依次导入，导入不占用爬虫事件循环
+    imports = {}
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='sync-import') as executor:
+        def on_task_done(sheet_name, records, info):
+            imports[sheet_name] = executor.submit(import_sheet, sheet_name, records)
         
-        # 记录失败日志
-        duration = (datetime.now(BEIJING_TZ) - start_time).total_seconds()
-        db_service.add_sync_log({
-            'type': 'scheduled',
-            'status': 'failed',
-            'new_count': 0,
-            'total_count': db_service.items.count_documents({}),
-            'duration': duration,
-            'error_message': error_msg
-        })
+        run.emit('crawl_started', progress=10, message='正在运行爬虫...', tasks=task_count)
+        try:
+            crawl_result = crawler.crawl(tasks=run.tasks, on_progress=on_crawl_progress, on_task_done=on_task_done)
+        finally:
+            # 爬虫出错时也等待已提交的导入完成
+            results = {sheet_name: future.result() for sheet_name, future in imports.items()}
+    crawl_scheduler.record(crawl_result['summary'])
+    
+    failed_tasks = [info['sheet_name'] for info in crawl_result['summary'] if info['status'] == 'failed']
+    errors = [result['message'] for result in results.values() if not result['success']]
+    if not results and failed_tasks:
+        raise Exception(f"所有类型整理失败: {', '.join(failed_tasks)}")
+    if errors:
+        raise Exception('；'.join(errors))
+    
+    counts = {key: sum(result[key] for result in results.values())
+              for key in ('imported', 'updated', 'unchanged', 'removed')}
+    message = (f"导入完成：新增 {counts['imported']} 条，更新 {counts['updated']} 条，"
+               f"未变化 {counts['unchanged']} 条，下线 {counts['removed']} 条")
+    if failed_tasks:
+        message += f"；整理失败的类型: {', '.join(failed_tasks)}"
+    logger.info(f"[{run.type}] {message}")
+    return {'success': True, 'message': message, **counts, 'failed_tasks': failed_tasks,
+            'task_results': crawl_result['summary']}
 
 
 def create_app():
     """创建Flask应用"""
-    global scheduler
+    global scheduler, crawler
     
     # 支持静态文件服务（生产环境）
     static_folder = 'static' if Path('static').exists() else None
@@ -104,6 +143,9 @@ def create_app():
     # 配置CORS
     CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}})
     
+    # orjson序列化（原生处理datetime/ObjectId）与响应压缩
+    init_response_layer(app, min_size=COMPRESS_MIN_SIZE)
+    
     # 初始化数据库服务
     # 验证MongoDB URI
     if not MONGO_URI or not MONGO_URI.startswith(('mongodb://', 'mongodb+srv://')):
@@ -112,39 +154,104 @@ def create_app():
         raise ValueError(f"Invalid MongoDB URI: '{MONGO_URI}'")
     
     logger.info(f"连接MongoDB: {MONGO_URI[:50]}...")  # 只显示前50个字符，避免泄露完整URI
-    db_service = DatabaseService(MONGO_URI, MONGO_DB_NAME)
+    db_service = DatabaseService(MONGO_URI, MONGO_DB_NAME,
+                                 query_cache_size=QUERY_CACHE_SIZE, query_cache_ttl=QUERY_CACHE_TTL)
     
     # 初始化导入服务
-    importer = DataImporter(db_service, JSON_CACHE_FILE)
+    importer = DataImporter(db_service, JSON_CACHE_FILE, batch_size=IMPORT_BATCH_SIZE, snapshot_dir=SNAPSHOT_DIR)
+    
+    # 初始化爬虫服务（进程内调用，复用预热的浏览器）
+    if crawler is None:
+        crawler = CrawlerService(CRAWLER_SCRIPT_PATH)
     
-    # 初始化定时调度器（30分钟执行一次）
+    # 同步协调器：定时任务与手动同步共用，跨线程/进程单飞执行，重复请求合并
+    sync_coordinator = SyncCoordinator(
+        db_service, lambda run: crawl_and_import(run, importer, crawler, crawl_scheduler), lease_ttl=SYNC_LEASE_TTL,
+        all_tasks=list(CRAWL_TASK_INTERVALS), on_uncovered=lambda tasks: crawl_scheduler.expedite(tasks)
+    )
+    
+    # 自适应整理调度：各类型独立间隔，按近期新增情况退避/加速，静默时段不整理
+    crawl_scheduler = CrawlScheduler(
+        db_service, sync_coordinator, CRAWL_TASK_INTERVALS,
+        min_interval=CRAWL_MIN_INTERVAL, max_interval=CRAWL_MAX_INTERVAL,
+        backoff=CRAWL_BACKOFF, speedup=CRAWL_SPEEDUP, jitter=CRAWL_JITTER, quiet_hours=CRAWL_QUIET_HOURS
+    )
+    # 启动时写入缺失类型的初始调度状态，调度查询接口只读
+    crawl_scheduler.seed()
+    
+    # 本地全文检索索引：后台加载/补齐，就绪前检索仍走 $text；导入后按变化集增量更新（须先于清空查询缓存）
+    search_index = None
+    if SEARCH_INDEX_ENABLED:
+        search_index = SearchIndex(SEARCH_INDEX_FILE)
+        db_service.attach_search_index(search_index)
+        importer.add_listener(lambda result: search_index.apply_import(db_service, result))
+        
+        def load_search_index():
+            try:
+                search_index.catch_up(db_service)
+                db_service.invalidate_caches()
+            except Exception as e:
+                logger.error(f"加载检索索引失败: {e}", exc_info=True)
+        
+        threading.Thread(target=load_search_index, name='search-index-loader', daemon=True).start()
+    
+    # 导入完成后清空列表查询缓存
+    importer.add_listener(lambda result: db_service.invalidate_caches())
+    
+    # 统计快照缓存（每次导入成功后刷新，统计接口不再逐次查询数据库）
+    stats_cache = StatsCache(db_service, ttl=STATS_CACHE_TTL, windows=STATS_REFRESH_WINDOWS,
+                             max_windows=STATS_CACHE_MAX_WINDOWS)
+    
+    def refresh_stats(result):
+        start = time.monotonic()
+        stats_cache.refresh()
+        sync_coordinator.emit('stats_refreshed', message='统计已刷新',
+                              duration=round(time.monotonic() - start, 3))
+    
+    importer.add_listener(refresh_stats)
+    
+    # 数据版本（条件请求的ETag依据）；须在派生数据刷新之后递增，避免新ETag对应旧数据
+    generation = DataGeneration(db_service)
+    importer.add_listener(generation.on_import)
+    # 其他进程（如 init_db.py）导入后，本进程的查询结果与统计快照随新版本一并失效
+    generation.on_external_change(lambda value: (db_service.invalidate_caches(), stats_cache.clear()))
+    
+    # 初始化定时调度器（每 CRAWL_TICK_SECONDS 秒检查一次到期的类型；多个worker各自的调度器由同步租约去重）
     if scheduler is None:
         scheduler = BackgroundScheduler(timezone=BEIJING_TZ)
         scheduler.add_job(
-            func=lambda: scheduled_crawl_task(db_service, importer),
-            trigger=IntervalTrigger(minutes=30),
+            func=crawl_scheduler.tick,
+            trigger=IntervalTrigger(seconds=CRAWL_TICK_SECONDS),
             id='crawl_job',
             name='定时爬取任务',
             replace_existing=True
         )
         scheduler.start()
-        logger.info("✅ 定时调度器已启动，每30分钟执行一次爬取任务")
+        logger.info(f"✅ 定时调度器已启动，各类型初始整理间隔（分钟）: {CRAWL_TASK_INTERVALS}")
     else:
         logger.info("⚠️ 定时调度器已存在，跳过初始化")
     
     # 注册路由
-    items_bp = init_items_routes(db_service)
-    stats_bp = init_stats_routes(db_service)
-    sync_bp = init_sync_routes(db_service, importer, CRAWLER_SCRIPT_PATH)
+    items_bp = init_items_routes(db_service, generation)
+    stats_bp = init_stats_routes(db_service, stats_cache, generation)
+    sync_bp = init_sync_routes(sync_coordinator, crawl_scheduler)
+    events_bp = init_events_routes(db_service, generation)
     
     app.register_blueprint(items_bp, url_prefix='/api')
     app.register_blueprint(stats_bp, url_prefix='/api')
     app.register_blueprint(sync_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
     
     # 健康检查端点
     @app.route('/health')
     def health():
-        return jsonify({'status': 'ok', 'message': '丝瓜清单系统运行正常'})
+        return jsonify({
+            'status': 'ok',
+            'message': '丝瓜清单系统运行正常',
+            'browser_pool': crawler.browser_stats(),
+            'query_cache': db_service.query_cache.stats(),
+            'search_index': search_index.stats() if search_index else None
+        })
     
     # 根路径和SPA路由支持
     @app.route('/')
@@ -160,7 +267,8 @@ def create_app():
                 'health': '/health',
                 'items': '/api/items',
                 'stats': '/api/stats',
-                'sync': '/api/sync'
+                'sync': '/api/sync',
+                'events': '/api/events'
             }
         })
     
@@ -190,6 +298,9 @@ if __name__ == '__main__':
         if scheduler:
             scheduler.shutdown()
             logger.info("定时调度器已关闭")
+        if crawler:
+            crawler.close()
+            logger.info("爬虫浏览器池已关闭")
     
     atexit.register(shutdown_scheduler)
     
@@ -1,5 +1,6 @@
 """配置文件"""
 import os
+import sys
 from pathlib import Path
 
 # MongoDB 配置（使用MongoDB Atlas，独立数据库避免冲突）
@@ -8,9 +9,48 @@ MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'paquzijie_sponge').strip()  # 独立
 
 # 文件路径配置
 DOCUMENTS_PATH = Path.home() / "Documents"
-JSON_CACHE_FILE = DOCUMENTS_PATH / "bytedance_jobs_cache.json"
+JSON_CACHE_FILE = DOCUMENTS_PATH / "bytedance_jobs_cache.json"  # 旧版JSON存档
+SNAPSHOT_DIR = DOCUMENTS_PATH / "bytedance_jobs_snapshots"  # 爬虫列式快照存储
 EXCEL_FILE = DOCUMENTS_PATH / "bytedance_jobs_tracker.xlsx"
 
+# 导入配置：每批bulk_write提交的操作数
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+
+# 统计快照缓存有效期（秒）：导入后主动刷新，TTL仅兜底其他进程写入的数据
+STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', '600'))
+# 导入后主动刷新的趋势窗口（天，逗号分隔），其他窗口按需计算；最多缓存的趋势窗口数（超出时淘汰最久未使用的）
+STATS_REFRESH_WINDOWS = tuple(int(days) for days in os.getenv('STATS_REFRESH_WINDOWS', '7,14,30,90').split(',')
+                              if days.strip())
+STATS_CACHE_MAX_WINDOWS = int(os.getenv('STATS_CACHE_MAX_WINDOWS', '16'))
+
+# 列表查询结果缓存：最多缓存的查询数与有效期（秒），导入完成后整体失效
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', '300'))
+
+# 本地全文检索索引：启用时带 search 的列表查询按相关度排序（否则使用MongoDB $text）
+SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', 'True').strip() == 'True'
+SEARCH_INDEX_FILE = DOCUMENTS_PATH / "bytedance_jobs_search_index.pkl"
+
+# 同步租约有效期（秒）：执行期间每 1/3 周期续期，进程崩溃后最多该时长后可重新同步
+SYNC_LEASE_TTL = int(os.getenv('SYNC_LEASE_TTL', '120'))
+
+# 自适应整理调度：各类型的初始整理间隔（分钟），之后按近期新增情况在上下限之间自动调整
+CRAWL_TASK_INTERVALS = {'intern': 20, 'campus': 30, 'experienced': 60}
+CRAWL_MIN_INTERVAL = float(os.getenv('CRAWL_MIN_INTERVAL', '10'))
+CRAWL_MAX_INTERVAL = float(os.getenv('CRAWL_MAX_INTERVAL', '240'))
+# 无新增时间隔乘以退避系数（近期常有新增的类型退避更慢），有新增时乘以加速系数
+CRAWL_BACKOFF = float(os.getenv('CRAWL_BACKOFF', '1.5'))
+CRAWL_SPEEDUP = float(os.getenv('CRAWL_SPEEDUP', '0.5'))
+# 下次整理时间的随机抖动比例（±）
+CRAWL_JITTER = float(os.getenv('CRAWL_JITTER', '0.1'))
+# 静默时段（北京时间 "HH:MM-HH:MM"，可跨零点），期间不发起定时整理；设为空字符串关闭
+CRAWL_QUIET_HOURS = os.getenv('CRAWL_QUIET_HOURS', '01:00-07:00').strip()
+# 调度检查间隔（秒）
+CRAWL_TICK_SECONDS = int(os.getenv('CRAWL_TICK_SECONDS', '60'))
+
+# 响应压缩阈值（字节）：超过该大小的JSON响应按 Accept-Encoding 使用brotli/gzip压缩
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+
 # 爬虫脚本路径
 # 支持本地开发和Docker部署两种环境
 _backend_dir = Path(__file__).parent  # backend目录
@@ -43,6 +83,10 @@ else:
         import logging
         logging.warning(f"警告：未找到爬虫脚本，使用默认路径 {CRAWLER_SCRIPT_PATH}")
 
+# 爬虫脚本所在目录加入Python路径（导入服务复用其中的 job_schema 共享模块）
+if str(CRAWLER_SCRIPT_PATH.parent) not in sys.path:
+    sys.path.append(str(CRAWLER_SCRIPT_PATH.parent))
+
 # Flask 配置
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production').strip()
 DEBUG = os.getenv('DEBUG', 'True').strip() == 'True'
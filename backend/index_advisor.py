@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+索引诊断脚本
+对 services/db.py 中登记的每个查询形态执行 explain()，报告全表扫描（COLLSCAN）和内存排序（SORT）
+
+用法：python3 index_advisor.py   （存在问题时以退出码1结束，可用于部署前检查）
+"""
+import sys
+from pathlib import Path
+
+# 添加backend目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import MONGO_URI, MONGO_DB_NAME
+from services.db import DatabaseService
+
+
+def main() -> int:
+    """主函数"""
+    db_service = DatabaseService(MONGO_URI, MONGO_DB_NAME)
+    reports = db_service.explain_query_shapes()
+    
+    print(f"\n数据库: {MONGO_DB_NAME}，共 {len(reports)} 个查询形态\n")
+    for report in reports:
+        status = '❌ ' + ' + '.join(report['problems']) if report['problems'] else '✅'
+        print(f"{status:<20} {report['collection']}/{report['name']}")
+        print(f"    执行计划: {' <- '.join(report['stages']) or '-'}")
+        if report['docs_examined'] is not None:
+            print(f"    扫描索引键 {report['keys_examined']}，扫描文档 {report['docs_examined']}，返回 {report['returned']}")
+    
+    problem_count = sum(1 for report in reports if report['problems'])
+    if problem_count:
+        print(f"\n⚠️ {problem_count} 个查询形态存在全表扫描或内存排序，请检查 ITEM_INDEXES")
+        return 1
+    print("\n✅ 所有查询形态均命中索引")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
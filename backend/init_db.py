@@ -5,9 +5,10 @@ from pathlib import Path
 # 添加backend目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import MONGO_URI, MONGO_DB_NAME, JSON_CACHE_FILE
+from config import MONGO_URI, MONGO_DB_NAME, JSON_CACHE_FILE, SNAPSHOT_DIR
 from services.db import DatabaseService
 from services.importer import DataImporter
+from services.generation import DataGeneration
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -20,10 +21,13 @@ def main():
     
     # 初始化服务
     db_service = DatabaseService(MONGO_URI, MONGO_DB_NAME)
-    importer = DataImporter(db_service, JSON_CACHE_FILE)
+    importer = DataImporter(db_service, JSON_CACHE_FILE, snapshot_dir=SNAPSHOT_DIR)
+    # 导入产生变化时递增数据版本，运行中的后端据此失效旧ETag和缓存
+    importer.add_listener(DataGeneration(db_service).on_import)
     
     # 询问是否清空现有数据
     print(f"\n当前数据库: {MONGO_DB_NAME}")
+    print(f"快照存档: {SNAPSHOT_DIR}")
     print(f"JSON文件: {JSON_CACHE_FILE}")
     print(f"现有条目数: {db_service.items.count_documents({})}")
     
@@ -34,7 +38,7 @@ def main():
         logger.warning("将清空现有数据！")
     
     # 执行导入
-    result = importer.import_from_json(clear_existing=clear_existing)
+    result = importer.import_from_cache(clear_existing=clear_existing)
     
     if result['success']:
         logger.info(f"✅ {result['message']}")
@@ -0,0 +1,68 @@
+"""职位变更事件API路由"""
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+import pytz
+
+# 北京时区
+BEIJING_TZ = pytz.timezone('Asia/Shanghai')
+
+events_bp = Blueprint('events', __name__)
+
+
+def _parse_since(value: str) -> datetime:
+    """解析 since 参数（ISO 8601，未带时区时按北京时间）"""
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"无效的时间: {value}") from e
+    return BEIJING_TZ.localize(since) if since.tzinfo is None else since
+
+
+def init_routes(db_service, generation):
+    """初始化路由"""
+
+    @events_bp.route('/events', methods=['GET'])
+    def get_events():
+        """获取职位变更事件（新增 added / 修改 modified / 下线 removed），按时间升序游标分页
+
+        消费方保存返回的 next_cursor，下次以 after 传入即可只读取之后的增量。
+        """
+        try:
+            # 事件只在导入时追加，数据版本未变时直接返回304
+            etag = generation.etag(request.full_path)
+            not_modified = generation.not_modified(etag)
+            if not_modified:
+                return not_modified
+
+            limit = min(int(request.args.get('limit', 100)), 500)
+            event_type = request.args.get('type')  # added/modified/removed
+            sheet_name = request.args.get('sheet')  # intern/campus/experienced
+            key = request.args.get('key')  # 职位稳定标识（job_id/code）
+            since = request.args.get('since')
+
+            result = db_service.get_posting_events(
+                after=request.args.get('after'),
+                limit=limit,
+                event_type=event_type,
+                sheet_name=sheet_name,
+                key=key,
+                since=_parse_since(since) if since else None
+            )
+
+            return generation.tag(jsonify({
+                'success': True,
+                'data': result
+            }), etag)
+
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 500
+
+    return events_bp
@@ -4,19 +4,28 @@ from flask import Blueprint, request, jsonify
 items_bp = Blueprint('items', __name__)
 
 
-def init_routes(db_service):
+def init_routes(db_service, generation):
     """初始化路由"""
     
     @items_bp.route('/items', methods=['GET'])
     def get_items():
         """获取清单列表"""
         try:
+            # 数据版本未变时直接返回304，不查询数据库
+            etag = generation.etag(request.full_path)
+            not_modified = generation.not_modified(etag)
+            if not_modified:
+                return not_modified
+            
             # 获取查询参数
             sheet_name = request.args.get('type')  # intern/campus/experienced
-            page = int(request.args.get('page', 1))
-            limit = int(request.args.get('limit', 20))
+            limit = min(int(request.args.get('limit', 20)), 100)
             search = request.args.get('search')
             is_new = request.args.get('is_new')
+            after = request.args.get('after')  # 下一页游标
+            before = request.args.get('before')  # 上一页游标
+            with_total = request.args.get('with_total', 'true').lower() == 'true'
+            fields = request.args.get('fields')  # summary（默认）/ full / 逗号分隔的字段名
             
             # 转换is_new为布尔值
             if is_new is not None:
@@ -25,17 +34,25 @@ def init_routes(db_service):
             # 查询数据
             result = db_service.get_items(
                 sheet_name=sheet_name,
-                page=page,
                 limit=limit,
                 search=search,
-                is_new=is_new
+                is_new=is_new,
+                after=after,
+                before=before,
+                with_total=with_total,
+                fields=fields
             )
             
-            return jsonify({
+            return generation.tag(jsonify({
                 'success': True,
                 'data': result
-            })
+            }), etag)
             
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         except Exception as e:
             return jsonify({
                 'success': False,
@@ -46,6 +63,11 @@ def init_routes(db_service):
     def get_item(item_id):
         """获取单个条目详情"""
         try:
+            etag = generation.etag('item', item_id)
+            not_modified = generation.not_modified(etag)
+            if not_modified:
+                return not_modified
+            
             item = db_service.get_item_by_id(item_id)
             
             if not item:
@@ -54,10 +76,10 @@ def init_routes(db_service):
                     'message': '条目不存在'
                 }), 404
             
-            return jsonify({
+            return generation.tag(jsonify({
                 'success': True,
                 'data': item
-            })
+            }), etag)
             
         except Exception as e:
             return jsonify({
@@ -1,23 +1,45 @@
 """统计相关API路由"""
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+import pytz
+
+# 北京时区
+BEIJING_TZ = pytz.timezone('Asia/Shanghai')
 
 stats_bp = Blueprint('stats', __name__)
 
 
-def init_routes(db_service):
+def init_routes(db_service, stats_cache, generation):
     """初始化路由"""
     
     @stats_bp.route('/stats', methods=['GET'])
     def get_stats():
-        """获取统计数据"""
+        """获取统计数据（返回缓存的统计快照，支持条件请求）"""
         try:
-            stats = db_service.get_stats()
+            # 趋势窗口天数，如 7/30/90
+            days = request.args.get('days', '7')
+            if not days.isdigit():
+                raise ValueError(f"无效的天数: {days}")
+            days = int(days)
             
-            return jsonify({
+            # 今日/本周/趋势随北京日期变化，ETag同时包含数据版本和日期
+            today = datetime.now(BEIJING_TZ).strftime('%Y-%m-%d')
+            etag = generation.etag('stats', days, today)
+            not_modified = generation.not_modified(etag)
+            if not_modified:
+                return not_modified
+            
+            snapshot = stats_cache.get(days)
+            return generation.tag(jsonify({
                 'success': True,
-                'data': stats
-            })
+                'data': snapshot['data']
+            }), etag)
             
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         except Exception as e:
             return jsonify({
                 'success': False,
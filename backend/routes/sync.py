@@ -1,130 +1,97 @@
 """同步相关API路由"""
-from flask import Blueprint, jsonify
-import subprocess
-import threading
-from datetime import datetime
+from bson.objectid import ObjectId
+from flask import Blueprint, Response, json, jsonify, request, stream_with_context
 import logging
-import pytz
 
 logger = logging.getLogger(__name__)
 
-# 北京时区
-BEIJING_TZ = pytz.timezone('Asia/Shanghai')
-
 sync_bp = Blueprint('sync', __name__)
 
-# 全局状态管理
-sync_status = {
-    'running': False,
-    'message': '',
-    'progress': 0
-}
-
 
-def init_routes(db_service, importer, crawler_script_path):
+def init_routes(sync_coordinator, crawl_scheduler):
     """初始化路由"""
-    
-    def run_crawler_and_import():
-        """运行爬虫并导入数据"""
-        global sync_status
-        start_time = datetime.now(BEIJING_TZ)
-        
-        try:
-            sync_status['running'] = True
-            sync_status['message'] = '正在运行爬虫脚本...'
-            sync_status['progress'] = 30
-            
-            # 运行Python爬虫脚本
-            result = subprocess.run(
-                ['python3', str(crawler_script_path)],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5分钟超时
-            )
-            
-            if result.returncode != 0:
-                raise Exception(f"爬虫脚本执行失败: {result.stderr}")
-            
-            logger.info("爬虫脚本执行成功")
-            sync_status['message'] = '爬虫完成，开始导入数据...'
-            sync_status['progress'] = 60
-            
-            # 导入数据到MongoDB
-            import_result = importer.import_from_json(clear_existing=False)
-            
-            if not import_result['success']:
-                raise Exception(import_result['message'])
-            
-            sync_status['message'] = '同步完成！'
-            sync_status['progress'] = 100
-            
-            # 记录同步日志
-            duration = (datetime.now(BEIJING_TZ) - start_time).total_seconds()
-            db_service.add_sync_log({
-                'type': 'manual',
-                'status': 'success',
-                'new_count': import_result.get('imported', 0),
-                'total_count': db_service.items.count_documents({}),
-                'duration': duration,
-                'error_message': None
-            })
-            
-            logger.info(f"同步成功：{import_result['message']}")
-            
-        except Exception as e:
-            error_msg = str(e)
-            logger.error(f"同步失败: {error_msg}", exc_info=True)
-            sync_status['message'] = f'同步失败: {error_msg}'
-            sync_status['progress'] = 0
-            
-            # 记录失败日志
-            duration = (datetime.now(BEIJING_TZ) - start_time).total_seconds()
-            db_service.add_sync_log({
-                'type': 'manual',
-                'status': 'failed',
-                'new_count': 0,
-                'total_count': db_service.items.count_documents({}),
-                'duration': duration,
-                'error_message': error_msg
-            })
-        
-        finally:
-            # 重置状态（5秒后）
-            def reset_status():
-                import time
-                time.sleep(5)
-                sync_status['running'] = False
-                sync_status['progress'] = 0
-            
-            threading.Thread(target=reset_status).start()
-    
+
     @sync_bp.route('/sync', methods=['POST'])
     def trigger_sync():
-        """触发同步"""
-        global sync_status
-        
-        if sync_status['running']:
+        """触发同步（已有同步在执行时合并到该同步，不重复启动爬虫）"""
+        try:
+            submitted = sync_coordinator.submit('manual')
+        except Exception as e:
+            logger.error(f"触发同步失败: {e}", exc_info=True)
             return jsonify({
                 'success': False,
-                'message': '同步正在进行中，请稍候'
-            }), 400
-        
-        # 在后台线程中运行同步任务
-        thread = threading.Thread(target=run_crawler_and_import)
-        thread.start()
-        
+                'message': str(e)
+            }), 500
+
+        if not submitted['coalesced']:
+            message = '同步已启动'
+        elif submitted['uncovered']:
+            message = f"同步正在进行中，已合并到当前同步；当前同步未包含 {', '.join(submitted['uncovered'])}，将在其结束后整理"
+        else:
+            message = '同步正在进行中，已合并到当前同步'
         return jsonify({
             'success': True,
-            'message': '同步已启动'
+            'message': message,
+            'data': submitted
         })
-    
+
     @sync_bp.route('/sync/status', methods=['GET'])
     def get_sync_status():
         """获取同步状态"""
         return jsonify({
             'success': True,
-            'data': sync_status
+            'data': sync_coordinator.status()
         })
-    
-    return sync_bp
 
+    @sync_bp.route('/sync/schedule', methods=['GET'])
+    def get_sync_schedule():
+        """获取各类型的整理间隔与下次整理时间"""
+        try:
+            return jsonify({
+                'success': True,
+                'data': {
+                    'quiet': crawl_scheduler.in_quiet_hours(),
+                    'tasks': crawl_scheduler.schedule()
+                }
+            })
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 500
+
+    @sync_bp.route('/sync/events', methods=['GET'])
+    def stream_sync_events():
+        """以SSE推送同步进度事件，同步结束（finished 事件）或没有可跟随的同步（idle 事件）时关闭连接
+
+        参数 run_id 指定同步（默认跟随当前同步）；断线重连时浏览器携带 Last-Event-ID，从该事件之后续传。
+        """
+        run_id = request.args.get('run_id') or None
+        if run_id is not None and not ObjectId.is_valid(run_id):
+            return jsonify({
+                'success': False,
+                'message': f'无效的同步ID: {run_id}'
+            }), 400
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or '0'
+        after = int(last_event_id) if last_event_id.isdigit() else 0
+
+        def generate():
+            yield 'retry: 3000\n\n'
+            finished = False
+            for event in sync_coordinator.events(run_id=run_id, after=after):
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                finished = event['event'] == 'finished'
+                # 不使用具名事件，事件类型在 data.event 中，客户端统一由 onmessage 处理
+                yield f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+            if not finished:
+                # 没有可跟随的同步时告知客户端关闭连接，避免浏览器反复重连
+                yield f"data: {json.dumps({'event': 'idle', 'run_id': run_id, 'message': '当前没有进行中的同步'})}\n\n"
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+
+    return sync_bp
@@ -0,0 +1,183 @@
+"""自适应整理调度：各类型独立的整理间隔，按近期新增情况自动调整
+
+- 每个类型（sheet_name）有自己的间隔与下次整理时间，状态持久化在 meta 集合中，多个 worker 共享；
+- 整理完成后按该类型是否出现新条目调整间隔：有新增时乘以加速系数；无新增时退避，
+  退避幅度按近期整理中出现新增的比例减小（经常变化的类型退避得慢），
+  限制在 [min_interval, max_interval] 分钟之间；
+- 下次整理时间加随机抖动，避免各类型与多个部署同时发起请求；
+- 静默时段内不发起定时整理，到期的类型在静默时段结束后一并整理；
+- 整理失败的类型不调整间隔，也不计入近期新增，按 min_interval 分钟后重试。
+"""
+import random
+import threading
+from datetime import datetime, time as dt_time, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+import pytz
+
+logger = logging.getLogger(__name__)
+
+# 北京时区
+BEIJING_TZ = pytz.timezone('Asia/Shanghai')
+
+# 每个类型保留的近期整理新增条数
+HISTORY_SIZE = 10
+
+
+def parse_quiet_hours(value: Optional[str]) -> Optional[Tuple[dt_time, dt_time]]:
+    """解析静默时段 "HH:MM-HH:MM"（北京时间，可跨零点），为空时返回None"""
+    if not value:
+        return None
+    try:
+        start, end = (datetime.strptime(part.strip(), '%H:%M').time() for part in value.split('-'))
+    except ValueError as e:
+        raise ValueError(f"无效的静默时段: {value}") from e
+    return start, end
+
+
+def _as_beijing(value: Optional[datetime]) -> Optional[datetime]:
+    """数据库读出的时间为UTC无时区，统一转为北京时间"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = pytz.utc.localize(value)
+    return value.astimezone(BEIJING_TZ)
+
+
+class CrawlScheduler:
+    """由定时器周期调用 tick()，把到期的类型交给同步协调器整理"""
+
+    def __init__(self, db_service, coordinator, intervals: Dict[str, float],
+                 min_interval: float = 10, max_interval: float = 240,
+                 backoff: float = 1.5, speedup: float = 0.5, jitter: float = 0.1,
+                 quiet_hours: Optional[str] = None):
+        self.db = db_service
+        self.coordinator = coordinator
+        self.intervals = intervals
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.speedup = speedup
+        self.jitter = jitter
+        self.quiet_hours = parse_quiet_hours(quiet_hours)
+        self._lock = threading.Lock()
+
+    def in_quiet_hours(self, now: Optional[datetime] = None) -> bool:
+        if self.quiet_hours is None:
+            return False
+        current = (now or datetime.now(BEIJING_TZ)).astimezone(BEIJING_TZ).time()
+        start, end = self.quiet_hours
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    def _next_run(self, now: datetime, interval: float) -> datetime:
+        factor = 1 + random.uniform(-self.jitter, self.jitter)
+        return now + timedelta(minutes=interval * factor)
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _initial_state(self, base_interval: float, next_run_at: Optional[datetime]) -> Dict:
+        return {
+            'interval': self._clamp(base_interval),
+            'next_run_at': next_run_at,
+            'last_run_at': None,
+            'idle_runs': 0,
+            'recent_new_counts': []
+        }
+
+    def schedule(self) -> Dict[str, Dict]:
+        """各类型的调度状态（只读；尚未安排的类型 next_run_at 为None，由 seed() 写入初始状态）"""
+        stored = self.db.get_crawl_schedule()
+        schedule = {}
+        for sheet_name, base_interval in self.intervals.items():
+            state = stored.get(sheet_name)
+            if state is None:
+                schedule[sheet_name] = self._initial_state(base_interval, None)
+                continue
+            schedule[sheet_name] = {
+                **state,
+                'next_run_at': _as_beijing(state.get('next_run_at')),
+                'last_run_at': _as_beijing(state.get('last_run_at'))
+            }
+        return schedule
+
+    def seed(self) -> Dict[str, Dict]:
+        """为缺失的类型写入初始状态（按初始间隔安排首次整理），返回各类型的调度状态
+
+        调度器启动时调用一次；tick()/record() 也会调用，以覆盖启动后新增的类型。
+        """
+        now = datetime.now(BEIJING_TZ)
+        schedule = self.schedule()
+        for sheet_name, state in schedule.items():
+            if state['next_run_at'] is None:
+                state = {**state, 'next_run_at': self._next_run(now, state['interval'])}
+                self.db.update_crawl_schedule(sheet_name, state)
+                schedule[sheet_name] = state
+        return schedule
+
+    def expedite(self, tasks: List[str]) -> None:
+        """把指定类型的下次整理时间提前到现在（如手动同步合并到未覆盖这些类型的同步），当前同步结束后的下次检查即整理"""
+        now = datetime.now(BEIJING_TZ)
+        schedule = self.seed()
+        for sheet_name in tasks:
+            state = schedule.get(sheet_name)
+            if state is not None:
+                self.db.update_crawl_schedule(sheet_name, {**state, 'next_run_at': now})
+        logger.info(f"[调度] 已安排尽快整理: {', '.join(tasks)}")
+
+    def tick(self) -> Optional[Dict]:
+        """检查到期的类型并请求整理，返回协调器的提交结果（无到期类型或静默时段时返回None）"""
+        with self._lock:
+            now = datetime.now(BEIJING_TZ)
+            if self.in_quiet_hours(now):
+                return None
+            due = [
+                sheet_name for sheet_name, state in self.seed().items()
+                if state['next_run_at'] <= now
+            ]
+            # 已有同步在执行时不重复请求，到期的类型保持到期，结束后的下次检查再整理
+            if not due or self.coordinator.status()['running']:
+                return None
+            submitted = self.coordinator.submit('scheduled', tasks=due)
+            if not submitted['coalesced']:
+                logger.info(f"[定时任务] 整理到期类型: {', '.join(due)}")
+            return submitted
+
+    def record(self, summary: List[Dict]) -> None:
+        """一次整理完成后（定时或手动），按各类型的新增条数调整间隔并安排下次整理"""
+        now = datetime.now(BEIJING_TZ)
+        schedule = self.seed()
+        for info in summary:
+            sheet_name = info.get('sheet_name')
+            state = schedule.get(sheet_name)
+            if state is None:
+                continue
+            if info.get('status') == 'failed':
+                # 失败不代表没有新增，保持间隔并尽快重试
+                self.db.update_crawl_schedule(sheet_name, {
+                    **state,
+                    'next_run_at': self._next_run(now, self.min_interval),
+                    'last_error': info.get('error')
+                })
+                logger.warning(f"[调度] {sheet_name} 整理失败，{self.min_interval:.0f} 分钟后重试")
+                continue
+            new_count = int(info.get('new_count', 0))
+            history = state.get('recent_new_counts', [])
+            if new_count > 0:
+                interval = self._clamp(state['interval'] * self.speedup)
+                idle_runs = 0
+            else:
+                idle_runs = state.get('idle_runs', 0) + 1
+                change_rate = sum(1 for count in history if count > 0) / len(history) if history else 0.0
+                interval = self._clamp(state['interval'] * (1 + (self.backoff - 1) * (1 - change_rate)))
+            self.db.update_crawl_schedule(sheet_name, {
+                'interval': interval,
+                'next_run_at': self._next_run(now, interval),
+                'last_run_at': now,
+                'idle_runs': idle_runs,
+                'recent_new_counts': (history + [new_count])[-HISTORY_SIZE:],
+                'last_error': None
+            })
+            logger.info(f"[调度] {sheet_name} 新增 {new_count} 条，下次间隔 {interval:.0f} 分钟")
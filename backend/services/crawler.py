@@ -0,0 +1,124 @@
+"""爬虫服务：在后端进程内加载并调用爬虫脚本"""
+import asyncio
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 爬虫脚本以模块形式加载时使用的模块名（脚本文件名 1.py 不能直接import）
+CRAWLER_MODULE_NAME = 'bytedance_job_monitor'
+
+
+def load_crawler_module(script_path: Path):
+    """按路径加载爬虫脚本模块，重复调用返回同一模块"""
+    module = sys.modules.get(CRAWLER_MODULE_NAME)
+    if module is not None:
+        return module
+
+    if not script_path.exists():
+        raise FileNotFoundError(f"爬虫脚本不存在: {script_path}")
+
+    spec = importlib.util.spec_from_file_location(CRAWLER_MODULE_NAME, script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[CRAWLER_MODULE_NAME] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(CRAWLER_MODULE_NAME, None)
+        raise
+    logger.info(f"已加载爬虫模块: {script_path}")
+    return module
+
+
+class CrawlerService:
+    """进程内爬虫调用，直接把合并后的记录交给导入服务
+
+    后端进程持有一个长驻事件循环线程和浏览器池，多次同步复用已预热的Chromium。
+    """
+
+    def __init__(self, script_path: Path, headless: bool = True):
+        self.script_path = script_path
+        self.headless = headless
+        self._module = None
+        self._load_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._browser_pool = None
+
+    def _get_module(self):
+        """延迟加载爬虫模块（pandas/playwright 只在首次爬取时导入一次）"""
+        if self._module is None:
+            with self._load_lock:
+                if self._module is None:
+                    self._module = load_crawler_module(self.script_path)
+        return self._module
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动长驻事件循环线程（Playwright对象必须始终在同一事件循环中使用）"""
+        with self._load_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name='crawler-loop', daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def _get_browser_pool(self):
+        if self._browser_pool is None:
+            self._browser_pool = self._get_module().BrowserPool(headless=self.headless)
+        return self._browser_pool
+
+    @property
+    def tasks(self):
+        """爬虫任务配置（各招聘类型）"""
+        return self._get_module().TASK_CONFIGS
+
+    def crawl(self, tasks: Optional[Iterable[str]] = None,
+              on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+              on_task_done: Optional[Callable[[str, List[Dict[str, Any]], Dict[str, Any]], None]] = None) -> Dict:
+        """执行一次整理，返回 {'records': {sheet_name: [...]}, 'summary': [...]}
+
+        tasks 为要整理的类型（sheet_name），默认全部；records 只包含本次整理成功（ok/partial）的类型，
+        未整理或整理失败的类型沿用存档数据写入新快照。summary 中每个类型带有整理结果
+        status（ok/partial/failed）、count、pages、retries、duration、error。
+        on_progress(事件名, 数据) 在各类型开始/完成抓取及保存存档后调用；
+        on_task_done(sheet_name, 记录, 摘要) 在单个类型整理成功并合并后立即调用。
+        两者都在爬虫事件循环线程中调用，耗时操作应交给其他线程。
+        """
+        module = self._get_module()
+        loop = self._ensure_loop()
+        task_configs = module.TASK_CONFIGS
+        if tasks is not None:
+            wanted = set(tasks)
+            task_configs = [task for task in task_configs if task['sheet_name'] in wanted]
+        monitor = module.JobMonitor(
+            tasks=task_configs,
+            filename=module.OUTPUT_FILENAME,
+            headless=self.headless,
+            browser_pool=self._get_browser_pool(),
+            on_progress=on_progress,
+            on_task_done=on_task_done
+        )
+        return asyncio.run_coroutine_threadsafe(monitor.crawl_async(), loop).result()
+
+    def browser_stats(self) -> Optional[Dict]:
+        """浏览器池状态，尚未启用时返回None"""
+        return self._browser_pool.stats() if self._browser_pool is not None else None
+
+    def close(self) -> None:
+        """关闭浏览器池并停止事件循环"""
+        if self._loop is None:
+            return
+        if self._browser_pool is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._browser_pool.close(), self._loop).result(timeout=30)
+            except Exception as e:
+                logger.warning(f"关闭浏览器池失败: {e}")
+            self._browser_pool = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
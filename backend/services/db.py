@@ -1,49 +1,341 @@
 """数据库服务"""
-from pymongo import MongoClient, DESCENDING, ASCENDING
+from pymongo import MongoClient, DESCENDING, ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from bson.objectid import ObjectId
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+import base64
+import json
 import logging
 import pytz
 
+from services.query_cache import QueryCache
+
 logger = logging.getLogger(__name__)
 
 # 北京时区
 BEIJING_TZ = pytz.timezone('Asia/Shanghai')
+# 统计按日分桶使用的时区（MongoDB时区名）
+STATS_TIMEZONE = 'Asia/Shanghai'
+
+# 每日趋势窗口（天）
+DEFAULT_TREND_DAYS = 7
+MAX_TREND_DAYS = 366
+
+# 列表分页排序键：(采摘时间, _id) 降序
+CURSOR_SORT_FIELD = '采摘时间'
+
+# 列表摘要投影：卡片展示所需字段，描述只取前 DESCRIPTION_EXCERPT_LENGTH 个字符；
+# 完整正文（description/requirement 等）只由详情接口返回
+DESCRIPTION_EXCERPT_LENGTH = 120
+SUMMARY_FIELDS = (
+    'title', 'sub_title', 'sheet_name', 'type_name', 'job_id', 'code', 'job_category',
+    'city_list', 'publish_time', CURSOR_SORT_FIELD, 'is_new', 'is_viewed', 'is_active',
+)
+SUMMARY_PROJECTION = {
+    **{field: 1 for field in SUMMARY_FIELDS},
+    'description': {'$substrCP': [{'$ifNull': ['$description', '']}, 0, DESCRIPTION_EXCERPT_LENGTH]},
+}
+
+# 筛选条件总数缓存有效期（秒）与条目上限
+COUNT_CACHE_TTL = 60
+COUNT_CACHE_MAX_ENTRIES = 256
+
+# 列表查询结果缓存默认容量与有效期（秒）
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_TTL = 300
+
+# 列表、总数、检索与统计只包含在架的条目（已下线或被编辑后替换的旧版本 is_active 为False；
+# 早期导入的条目没有该字段，视为在架）
+ACTIVE_FILTER = {'is_active': {'$ne': False}}
+
+# sponge_items 索引（按接口的查询形态设计，遵循 等值-排序-范围 顺序；
+# is_active 的 $ne 条件是范围条件，放在排序键之后，由索引键直接过滤）
+ITEM_INDEXES = [
+    # 条目标识（导入upsert、下线标记）
+    {'keys': [('job_hash', ASCENDING)], 'unique': True},
+    # 列表：无筛选 / 今日/本周/趋势的采摘时间范围
+    {'keys': [(CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING), ('is_active', ASCENDING)]},
+    # 列表：按类型筛选
+    {'keys': [('sheet_name', ASCENDING), (CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING),
+              ('is_active', ASCENDING)]},
+    # 列表：按类型 + 是否新条目筛选
+    {'keys': [('sheet_name', ASCENDING), ('is_new', ASCENDING), (CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING),
+              ('is_active', ASCENDING)]},
+    # 列表：仅按是否新条目筛选
+    {'keys': [('is_new', ASCENDING), (CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING), ('is_active', ASCENDING)]},
+    # 全文搜索
+    {'keys': [('title', 'text'), ('description', 'text'), ('requirement', 'text')]},
+]
+
+# posting_events（职位变更事件）索引：事件流按 (time, _id) 升序翻页，可按事件类型或职位标识筛选
+POSTING_EVENT_INDEXES = [
+    {'keys': [('time', ASCENDING), ('_id', ASCENDING)]},
+    {'keys': [('type', ASCENDING), ('time', ASCENDING), ('_id', ASCENDING)]},
+    {'keys': [('key', ASCENDING), ('time', ASCENDING), ('_id', ASCENDING)]},
+]
+POSTING_EVENT_TYPES = ('added', 'modified', 'removed')
+_EVENT_SORT = [('time', ASCENDING), ('_id', ASCENDING)]
+
+# 被取代的旧索引（启动时删除，避免每次写入重复维护）：
+# 最初的单字段索引 sheet_name_1 / 采摘时间_-1 由上面的复合索引覆盖，publish_time_-1 已无查询使用；
+# 其余为加入 is_active 之前的复合索引
+SUPERSEDED_ITEM_INDEXES = [
+    [('sheet_name', ASCENDING)],
+    [(CURSOR_SORT_FIELD, DESCENDING)],
+    [('publish_time', DESCENDING)],
+    [(CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING)],
+    [('sheet_name', ASCENDING), (CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING)],
+    [('sheet_name', ASCENDING), ('is_new', ASCENDING), (CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING)],
+    [('is_new', ASCENDING), (CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING)],
+]
+
+# 统计按类型计数只读取 sheet_name 与 is_active，指定该索引后由索引键完成计数，避免全表扫描
+STATS_TYPE_INDEX_HINT = [('sheet_name', ASCENDING), (CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING),
+                         ('is_active', ASCENDING)]
+
+
+def stats_type_pipeline() -> List[Dict]:
+    """统计聚合：在架条目按类型计数（总数为各类型之和）"""
+    return [
+        {'$match': ACTIVE_FILTER},
+        {'$group': {'_id': '$sheet_name', 'count': {'$sum': 1}}},
+    ]
+
+
+def stats_day_pipeline(start: datetime) -> List[Dict]:
+    """统计聚合：start 之后的在架条目按北京时间分日计数（前置采摘时间范围条件以命中索引）"""
+    return [
+        {'$match': {**ACTIVE_FILTER, CURSOR_SORT_FIELD: {'$gte': start}}},
+        {'$group': {
+            '_id': {'$dateTrunc': {'date': f'${CURSOR_SORT_FIELD}', 'unit': 'day', 'timezone': STATS_TIMEZONE}},
+            'count': {'$sum': 1}
+        }},
+    ]
+
+
+# 已登记的查询形态（索引诊断脚本 index_advisor.py 逐个执行 explain）
+# allow 为该形态下预期出现、不视为问题的阶段；带 pipeline 的形态按聚合执行 explain（hint 为指定索引）
+_SAMPLE_TIME = datetime(2024, 1, 1)
+_SAMPLE_ID = ObjectId('000000000000000000000000')
+_LIST_SORT = [(CURSOR_SORT_FIELD, DESCENDING), ('_id', DESCENDING)]
+QUERY_SHAPES = [
+    {'name': '列表-全部', 'collection': 'sponge_items', 'filter': ACTIVE_FILTER, 'sort': _LIST_SORT},
+    # keyset 为True时，在 filter 上叠加游标翻页条件
+    {'name': '列表-全部-翻页', 'collection': 'sponge_items', 'filter': ACTIVE_FILTER, 'sort': _LIST_SORT,
+     'keyset': True},
+    {'name': '列表-按类型', 'collection': 'sponge_items',
+     'filter': {**ACTIVE_FILTER, 'sheet_name': 'intern'}, 'sort': _LIST_SORT},
+    {'name': '列表-按类型-翻页', 'collection': 'sponge_items',
+     'filter': {**ACTIVE_FILTER, 'sheet_name': 'intern'}, 'sort': _LIST_SORT, 'keyset': True},
+    {'name': '列表-按类型和新条目', 'collection': 'sponge_items',
+     'filter': {**ACTIVE_FILTER, 'sheet_name': 'intern', 'is_new': True}, 'sort': _LIST_SORT},
+    {'name': '列表-新条目', 'collection': 'sponge_items',
+     'filter': {**ACTIVE_FILTER, 'is_new': True}, 'sort': _LIST_SORT},
+    # 全文搜索结果需要按采摘时间重新排序，内存排序是预期行为
+    {'name': '列表-全文搜索', 'collection': 'sponge_items',
+     'filter': {**ACTIVE_FILTER, '$text': {'$search': '工程师'}}, 'sort': _LIST_SORT, 'allow': ['SORT']},
+    {'name': '统计-按类型', 'collection': 'sponge_items', 'pipeline': stats_type_pipeline(),
+     'hint': STATS_TYPE_INDEX_HINT},
+    {'name': '统计-按日分桶', 'collection': 'sponge_items', 'pipeline': stats_day_pipeline(_SAMPLE_TIME)},
+    {'name': '详情', 'collection': 'sponge_items', 'filter': {'_id': _SAMPLE_ID}, 'sort': None},
+    {'name': '导入-下线标记', 'collection': 'sponge_items',
+     'filter': {'job_hash': {'$in': ['0' * 32]}, 'is_active': {'$ne': False}}, 'sort': None},
+    # 导入时加载全部指纹，全表扫描是预期行为
+    {'name': '导入-内容指纹', 'collection': 'sponge_items', 'filter': {}, 'sort': None, 'allow': ['COLLSCAN']},
+    {'name': '同步日志', 'collection': 'sync_logs', 'filter': {}, 'sort': [('sync_time', DESCENDING)]},
+    {'name': '变更事件', 'collection': 'posting_events', 'filter': {}, 'sort': _EVENT_SORT},
+    {'name': '变更事件-翻页', 'collection': 'posting_events', 'filter': {}, 'sort': _EVENT_SORT,
+     'keyset': 'time'},
+    {'name': '变更事件-按类型', 'collection': 'posting_events', 'filter': {'type': 'removed'}, 'sort': _EVENT_SORT},
+    {'name': '变更事件-按职位', 'collection': 'posting_events', 'filter': {'key': '0'}, 'sort': _EVENT_SORT},
+]
+
+# 本地检索索引读取的字段（见 services.search_index）
+SEARCH_DOCUMENT_PROJECTION = {
+    '_id': 0, 'job_hash': 1, 'title': 1, 'description': 1, 'requirement': 1,
+    'sheet_name': 1, 'is_new': 1, 'is_active': 1, 'updated_at': 1,
+}
+SEARCH_FETCH_BATCH_SIZE = 1000
+
+# 类型 → 丝瓜代称
+SHEET_TYPE_NAMES = {'intern': '新丝瓜', 'campus': '生丝瓜', 'experienced': '熟丝瓜'}
+
+
+def _encode_token(payload: Dict) -> str:
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_token(token: str, kind: str) -> Dict:
+    """解析游标并校验类型标记 k：列表与检索共用 cursor 参数，类型不符（或无标记的旧游标）时抛出ValueError"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {token}") from e
+    if not isinstance(payload, dict) or payload.get('k') != kind:
+        raise ValueError(f"分页游标与当前查询不匹配，请从第一页重新开始: {token}")
+    return payload
+
+
+def encode_cursor(item: Dict, field: str = CURSOR_SORT_FIELD, kind: str = 'keyset') -> str:
+    """由条目的排序键 (field, _id) 生成不透明的分页游标，kind 标记游标类型（列表 keyset / 事件流 event）"""
+    value = item.get(field)
+    return _encode_token({
+        'k': kind,
+        't': value.isoformat() if isinstance(value, datetime) else None,
+        'id': str(item['_id'])
+    })
+
+
+def decode_cursor(token: str, kind: str = 'keyset') -> Tuple[Optional[datetime], ObjectId]:
+    """解析分页游标，返回 (排序键时间, _id)；格式或类型不正确时抛出ValueError"""
+    payload = _decode_token(token, kind)
+    try:
+        value = datetime.fromisoformat(payload['t']) if payload.get('t') else None
+        return value, ObjectId(payload['id'])
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {token}") from e
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """检索结果按相关度排序，分页游标记录结果列表中的偏移"""
+    return _encode_token({'k': 'offset', 'o': offset})
+
+
+def decode_offset_cursor(token: str) -> int:
+    """解析检索结果的分页游标；格式或类型不正确时抛出ValueError"""
+    payload = _decode_token(token, 'offset')
+    try:
+        offset = int(payload['o'])
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {token}") from e
+    if offset < 0:
+        raise ValueError(f"无效的分页游标: {token}")
+    return offset
+
+
+def build_projection(fields: Optional[str]) -> Optional[Dict]:
+    """解析列表接口的 fields 参数：summary（默认）/ full / 逗号分隔的字段名"""
+    if not fields or fields == 'summary':
+        return SUMMARY_PROJECTION
+    if fields == 'full':
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    for name in names:
+        if name.startswith('$') or '.' in name:
+            raise ValueError(f"无效的字段名: {name}")
+    # 游标分页依赖排序键，始终返回
+    return {**{name: 1 for name in names}, CURSOR_SORT_FIELD: 1}
+
+
+def _keyset_filter(value: Optional[datetime], item_id: ObjectId, forward: bool) -> Dict:
+    """游标之后（forward）或之前的条件；采摘时间为空的条目排在最后"""
+    field = CURSOR_SORT_FIELD
+    if forward:
+        if value is None:
+            return {field: None, '_id': {'$lt': item_id}}
+        return {'$or': [
+            {field: {'$lt': value}},
+            {field: value, '_id': {'$lt': item_id}},
+            {field: None},
+        ]}
+    if value is None:
+        return {'$or': [
+            {field: {'$ne': None}},
+            {field: None, '_id': {'$gt': item_id}},
+        ]}
+    return {'$or': [
+        {field: {'$gt': value}},
+        {field: value, '_id': {'$gt': item_id}},
+    ]}
+
+
+def _ascending_keyset_filter(field: str, value: datetime, item_id: ObjectId) -> Dict:
+    """按 (field, _id) 升序翻页时游标之后的条件"""
+    return {'$or': [
+        {field: {'$gt': value}},
+        {field: value, '_id': {'$gt': item_id}},
+    ]}
 
 
 class DatabaseService:
     """MongoDB数据库服务"""
     
-    def __init__(self, mongo_uri: str, db_name: str):
+    def __init__(self, mongo_uri: str, db_name: str,
+                 query_cache_size: int = QUERY_CACHE_SIZE, query_cache_ttl: float = QUERY_CACHE_TTL):
         self.client = MongoClient(mongo_uri)
         self.db = self.client[db_name]
         self.items = self.db['sponge_items']
         self.sync_logs = self.db['sync_logs']
+        self.meta = self.db['meta']
+        self.posting_events = self.db['posting_events']
+        
+        # 列表查询结果缓存（热门筛选的首页直接从内存返回）与筛选条件总数缓存
+        self.query_cache = QueryCache(maxsize=query_cache_size, ttl=query_cache_ttl)
+        self._count_cache = QueryCache(maxsize=COUNT_CACHE_MAX_ENTRIES, ttl=COUNT_CACHE_TTL)
+        
+        # 本地检索索引（attach_search_index 之后且就绪时替代 $text 检索）
+        self.search_index = None
         
         # 创建索引
         self._create_indexes()
     
     def _create_indexes(self):
         """创建数据库索引"""
-        # 为常用查询字段创建索引
-        self.items.create_index([('sheet_name', ASCENDING)])
-        self.items.create_index([('job_hash', ASCENDING)], unique=True)
-        self.items.create_index([('采摘时间', DESCENDING)])
-        self.items.create_index([('publish_time', DESCENDING)])
-        self.items.create_index([('title', 'text'), ('description', 'text'), ('requirement', 'text')])
+        # 按查询形态创建复合索引（见 ITEM_INDEXES）
+        for index in ITEM_INDEXES:
+            self.items.create_index(index['keys'], unique=index.get('unique', False))
+        existing = {tuple(index['key'].items()): index['name'] for index in self.items.list_indexes()}
+        for keys in SUPERSEDED_ITEM_INDEXES:
+            name = existing.get(tuple(keys))
+            if name is not None:
+                self.items.drop_index(name)
+                logger.info(f"已删除被取代的索引: {name}")
         
         self.sync_logs.create_index([('sync_time', DESCENDING)])
+        
+        for index in POSTING_EVENT_INDEXES:
+            self.posting_events.create_index(index['keys'])
+    
+    def attach_search_index(self, search_index) -> None:
+        """接入本地检索索引，之后带 search 的列表查询按相关度排序"""
+        self.search_index = search_index
+        self.invalidate_caches()
     
     # ===== 数据查询 =====
     
-    def get_items(self, sheet_name: Optional[str] = None, 
-                  page: int = 1, limit: int = 20,
+    def get_items(self, sheet_name: Optional[str] = None,
+                  limit: int = 20,
                   search: Optional[str] = None,
                   is_new: Optional[bool] = None,
-                  sort_by: str = '采摘时间',
-                  sort_order: int = DESCENDING) -> Dict:
-        """获取清单列表"""
-        query = {}
+                  after: Optional[str] = None,
+                  before: Optional[str] = None,
+                  with_total: bool = True,
+                  fields: Optional[str] = None) -> Dict:
+        """获取清单列表（按 (采摘时间, _id) 降序的游标分页，结果经查询缓存）
+        
+        after/before 为上一次返回的 next_cursor/prev_cursor；
+        with_total 为False时不统计总数；fields 见 build_projection，默认只返回摘要字段。
+        本地检索索引就绪时，search 按相关度排序并附带 score / highlights，游标为结果偏移。
+        返回的结果可能与其他请求共享，调用方不得修改。
+        """
+        # 规范化查询参数作为缓存键（搜索词去除多余空白，默认投影统一为summary）
+        search = ' '.join(search.split()) if search else None
+        fields = fields or 'summary'
+        key = ('items', sheet_name, limit, search, is_new, after, before, with_total, fields, CURSOR_SORT_FIELD)
+        return self.query_cache.get_or_compute(key, lambda: self._query_items(
+            sheet_name, limit, search, is_new, after, before, with_total, fields
+        ))
+    
+    def _query_items(self, sheet_name: Optional[str], limit: int, search: Optional[str],
+                     is_new: Optional[bool], after: Optional[str], before: Optional[str],
+                     with_total: bool, fields: str) -> Dict:
+        if search and self.search_index is not None and self.search_index.ready:
+            return self._search_items(sheet_name, limit, search, is_new, after, before, with_total, fields)
+        
+        projection = build_projection(fields)
+        query = dict(ACTIVE_FILTER)
         
         # 筛选条件
         if sheet_name:
@@ -53,77 +345,158 @@ class DatabaseService:
         if search:
             query['$text'] = {'$search': search}
         
-        # 计算分页
-        skip = (page - 1) * limit
+        page_query = dict(query)
+        forward = before is None
+        cursor_token = after if forward else before
+        if cursor_token:
+            value, item_id = decode_cursor(cursor_token)
+            page_query = {'$and': [query, _keyset_filter(value, item_id, forward)]}
         
-        # 查询
-        cursor = self.items.find(query).sort(sort_by, sort_order).skip(skip).limit(limit)
+        # 多取一条用于判断是否还有下一页；向前翻页时反向排序后再倒回
+        direction = DESCENDING if forward else ASCENDING
+        cursor = self.items.find(page_query, projection).sort(
+            [(CURSOR_SORT_FIELD, direction), ('_id', direction)]
+        ).limit(limit + 1)
         items = list(cursor)
+        has_more = len(items) > limit
+        items = items[:limit]
+        if not forward:
+            items.reverse()
         
-        # 转换ObjectId为字符串
-        for item in items:
-            item['_id'] = str(item['_id'])
+        if forward:
+            next_cursor = encode_cursor(items[-1]) if has_more and items else None
+            prev_cursor = encode_cursor(items[0]) if after and items else None
+        else:
+            next_cursor = encode_cursor(items[-1]) if items else None
+            prev_cursor = encode_cursor(items[0]) if has_more and items else None
         
-        # 总数
-        total = self.items.count_documents(query)
+        result = {
+            'items': items,
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        }
+        if with_total:
+            total, exact = self.count_items(query)
+            result['total'] = total
+            result['total_exact'] = exact
+        return result
+    
+    def _search_items(self, sheet_name: Optional[str], limit: int, search: str,
+                      is_new: Optional[bool], after: Optional[str], before: Optional[str],
+                      with_total: bool, fields: str) -> Dict:
+        """由本地检索索引得到按相关度排序的 job_hash，再按页取回文档"""
+        ranked = self.search_index.search(search, {'sheet_name': sheet_name, 'is_new': is_new})
+        if before is not None:
+            end = decode_offset_cursor(before)
+            start = max(0, end - limit)
+        else:
+            start = decode_offset_cursor(after) if after else 0
+            end = start + limit
+        page = ranked[start:end]
         
-        return {
+        projection = build_projection(fields)
+        if projection is not None:
+            projection = {**projection, 'job_hash': 1}
+        docs = {
+            doc['job_hash']: doc
+            for doc in self.items.find(
+                {**ACTIVE_FILTER, 'job_hash': {'$in': [job_hash for job_hash, _ in page]}}, projection
+            )
+        }
+        items = []
+        for job_hash, score in page:
+            doc = docs.get(job_hash)
+            if doc is None:
+                continue
+            doc['score'] = round(score, 4)
+            doc['highlights'] = self.search_index.highlights(job_hash, search)
+            items.append(doc)
+        
+        result = {
             'items': items,
-            'total': total,
-            'page': page,
             'limit': limit,
-            'pages': (total + limit - 1) // limit
+            'next_cursor': encode_offset_cursor(end) if end < len(ranked) else None,
+            'prev_cursor': encode_offset_cursor(start) if start > 0 else None
         }
+        if with_total:
+            result['total'] = len(ranked)
+            result['total_exact'] = True
+        return result
+    
+    def count_items(self, query: Dict) -> Tuple[int, bool]:
+        """统计筛选条件下的条目数，返回 (总数, 是否精确)
+        
+        列表查询始终带 ACTIVE_FILTER，集合元数据估算的总数会包含已下线的条目，因此一律精确计数，
+        结果缓存 COUNT_CACHE_TTL 秒（导入后清空）。
+        """
+        key = json.dumps(query, sort_keys=True, ensure_ascii=False, default=str)
+        total = self._count_cache.get_or_compute(key, lambda: self.items.count_documents(query))
+        return total, True
+    
+    def invalidate_caches(self) -> None:
+        """数据变化后清空查询结果缓存和总数缓存"""
+        self.query_cache.clear()
+        self._count_cache.clear()
+    
+    def count_active_items(self) -> int:
+        """在架条目数"""
+        return self.items.count_documents(ACTIVE_FILTER)
     
     def get_item_by_id(self, item_id: str) -> Optional[Dict]:
         """根据ID获取单个条目"""
-        from bson.objectid import ObjectId
         try:
-            item = self.items.find_one({'_id': ObjectId(item_id)})
-            if item:
-                item['_id'] = str(item['_id'])
-            return item
+            return self.items.find_one({'_id': ObjectId(item_id)})
         except Exception as e:
             logger.error(f"获取条目失败: {e}")
             return None
     
     # ===== 统计数据 =====
     
-    def get_stats(self) -> Dict:
-        """获取统计数据"""
-        # 总数
-        total = self.items.count_documents({})
+    def get_stats(self, days: int = DEFAULT_TREND_DAYS) -> Dict:
+        """获取统计数据（按类型计数与按日分桶两次索引聚合，按北京时间分日）"""
+        days = max(1, min(int(days), MAX_TREND_DAYS))
         
-        # 今日新增（使用北京时间）
+        # 今日、本周与趋势窗口的起点（北京时间零点）
         today_start = datetime.now(BEIJING_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
-        today_new = self.items.count_documents({
-            '采摘时间': {'$gte': today_start}
-        })
-        
-        # 本周新增
         week_start = today_start - timedelta(days=today_start.weekday())
-        week_new = self.items.count_documents({
-            '采摘时间': {'$gte': week_start}
-        })
+        trend_start = today_start - timedelta(days=days - 1)
+        
+        # 按类型计数走指定索引；按日分桶以采摘时间范围开头，只扫描窗口内的索引区间
+        type_counts = {
+            doc['_id']: doc['count']
+            for doc in self.items.aggregate(stats_type_pipeline(), hint=STATS_TYPE_INDEX_HINT)
+        }
+        total = sum(type_counts.values())
         
         # 分类统计
-        type_distribution = {}
-        for sheet_name in ['intern', 'campus', 'experienced']:
-            count = self.items.count_documents({'sheet_name': sheet_name})
-            type_name = {'intern': '新丝瓜', 'campus': '生丝瓜', 'experienced': '熟丝瓜'}[sheet_name]
-            type_distribution[type_name] = count
+        type_distribution = {
+            type_name: type_counts.get(sheet_name, 0)
+            for sheet_name, type_name in SHEET_TYPE_NAMES.items()
+        }
+        
+        # 今日/本周新增与每日趋势都由同一组按日分桶结果得出；
+        # 分桶键为北京时间零点对应的UTC时刻，换算回北京日期
+        day_counts: Dict = {}
+        for doc in self.items.aggregate(stats_day_pipeline(min(week_start, trend_start))):
+            bucket = doc['_id']
+            if bucket is None:
+                continue
+            if bucket.tzinfo is None:
+                bucket = pytz.utc.localize(bucket)
+            day = bucket.astimezone(BEIJING_TZ).date()
+            day_counts[day] = day_counts.get(day, 0) + doc['count']
         
-        # 每日趋势（最近7天）
+        today_new = sum(count for day, count in day_counts.items() if day >= today_start.date())
+        week_new = sum(count for day, count in day_counts.items() if day >= week_start.date())
+        
+        # 每日趋势（最近days天）
         daily_trend = []
-        for i in range(6, -1, -1):
-            day_start = today_start - timedelta(days=i)
-            day_end = day_start + timedelta(days=1)
-            count = self.items.count_documents({
-                '采摘时间': {'$gte': day_start, '$lt': day_end}
-            })
+        for i in range(days - 1, -1, -1):
+            day = (today_start - timedelta(days=i)).date()
             daily_trend.append({
-                'date': day_start.strftime('%m-%d'),
-                'count': count
+                'date': day.strftime('%m-%d'),
+                'count': day_counts.get(day, 0)
             })
         
         return {
@@ -134,6 +507,102 @@ class DatabaseService:
             'daily_trend': daily_trend
         }
     
+    # ===== 索引诊断 =====
+    
+    @staticmethod
+    def _plan_stages(plan) -> List[str]:
+        """递归收集执行计划中的所有阶段名"""
+        stages = []
+        if isinstance(plan, dict):
+            if 'stage' in plan:
+                stages.append(plan['stage'])
+            for value in plan.values():
+                stages.extend(DatabaseService._plan_stages(value))
+        elif isinstance(plan, list):
+            for value in plan:
+                stages.extend(DatabaseService._plan_stages(value))
+        return stages
+    
+    @staticmethod
+    def _find_values(explain, key: str) -> List:
+        """递归收集 explain 结果中所有名为 key 的字段值"""
+        values = []
+        if isinstance(explain, dict):
+            for name, value in explain.items():
+                if name == key:
+                    values.append(value)
+                else:
+                    values.extend(DatabaseService._find_values(value, key))
+        elif isinstance(explain, list):
+            for value in explain:
+                values.extend(DatabaseService._find_values(value, key))
+        return values
+    
+    def _explain_pipeline(self, shape: Dict) -> Dict:
+        """对登记的聚合管道执行 explain（executionStats），汇总各 $cursor 阶段的执行计划"""
+        command = {'aggregate': shape['collection'], 'pipeline': shape['pipeline'], 'cursor': {}}
+        if shape.get('hint'):
+            command['hint'] = dict(shape['hint'])
+        explain = self.db.command({'explain': command, 'verbosity': 'executionStats'})
+        
+        stages = []
+        for plan in self._find_values(explain, 'winningPlan'):
+            stages.extend(self._plan_stages(plan))
+        allowed = set(shape.get('allow', []))
+        problems = [stage for stage in ('COLLSCAN', 'SORT') if stage in stages and stage not in allowed]
+        executions = self._find_values(explain, 'executionStats')
+        
+        def total(field):
+            values = [execution[field] for execution in executions if field in execution]
+            return sum(values) if values else None
+        
+        return {
+            'name': shape['name'],
+            'collection': shape['collection'],
+            'stages': stages,
+            'problems': problems,
+            'docs_examined': total('totalDocsExamined'),
+            'keys_examined': total('totalKeysExamined'),
+            'returned': total('nReturned')
+        }
+    
+    def explain_query_shapes(self) -> List[Dict]:
+        """对已登记的查询形态逐个执行explain，标记全表扫描（COLLSCAN）与内存排序（SORT）"""
+        reports = []
+        for shape in QUERY_SHAPES:
+            if shape.get('pipeline'):
+                reports.append(self._explain_pipeline(shape))
+                continue
+            
+            query = shape['filter']
+            if shape.get('keyset') == 'time':
+                keyset = _ascending_keyset_filter('time', _SAMPLE_TIME, _SAMPLE_ID)
+                query = {'$and': [query, keyset]} if query else keyset
+            elif shape.get('keyset'):
+                keyset = _keyset_filter(_SAMPLE_TIME, _SAMPLE_ID, forward=True)
+                query = {'$and': [query, keyset]} if query else keyset
+            
+            cursor = self.db[shape['collection']].find(query)
+            if shape.get('sort'):
+                cursor = cursor.sort(shape['sort'])
+            explain = cursor.limit(20).explain()
+            
+            planner = explain.get('queryPlanner', {})
+            stages = self._plan_stages(planner.get('winningPlan', {}))
+            allowed = set(shape.get('allow', []))
+            problems = [stage for stage in ('COLLSCAN', 'SORT') if stage in stages and stage not in allowed]
+            execution = explain.get('executionStats', {})
+            reports.append({
+                'name': shape['name'],
+                'collection': shape['collection'],
+                'stages': stages,
+                'problems': problems,
+                'docs_examined': execution.get('totalDocsExamined'),
+                'keys_examined': execution.get('totalKeysExamined'),
+                'returned': execution.get('nReturned')
+            })
+        return reports
+    
     # ===== 数据操作 =====
     
     def insert_item(self, item: Dict) -> str:
@@ -141,6 +610,7 @@ class DatabaseService:
         item['created_at'] = datetime.now(BEIJING_TZ)
         item['updated_at'] = datetime.now(BEIJING_TZ)
         result = self.items.insert_one(item)
+        self.invalidate_caches()
         return str(result.inserted_id)
     
     def bulk_insert_items(self, items: List[Dict]) -> int:
@@ -155,28 +625,271 @@ class DatabaseService:
         
         try:
             result = self.items.insert_many(items, ordered=False)
+            self.invalidate_caches()
             return len(result.inserted_ids)
         except Exception as e:
             # 可能有重复的job_hash
             logger.warning(f"批量插入时有重复: {e}")
             return 0
     
-    def upsert_item(self, job_hash: str, item: Dict) -> bool:
-        """更新或插入条目"""
-        item['updated_at'] = datetime.now(BEIJING_TZ)
-        if 'created_at' not in item:
-            item['created_at'] = datetime.now(BEIJING_TZ)
-        
+    def upsert_item(self, job_hash: str, item: Dict) -> str:
+        """更新或插入条目，返回 'inserted' / 'updated' / 'unchanged'"""
         result = self.items.update_one(
             {'job_hash': job_hash},
-            {'$set': item},
+            self._build_upsert_update(item),
             upsert=True
         )
-        return result.modified_count > 0 or result.upserted_id is not None
+        self.invalidate_caches()
+        if result.upserted_id is not None:
+            return 'inserted'
+        return 'updated' if result.modified_count > 0 else 'unchanged'
+    
+    @staticmethod
+    def _build_upsert_update(item: Dict) -> Dict:
+        """构造upsert更新文档：created_at / is_viewed 仅在插入时写入"""
+        now = datetime.now(BEIJING_TZ)
+        fields = {k: v for k, v in item.items() if k not in ('created_at', 'is_viewed')}
+        fields['updated_at'] = now
+        return {
+            '$set': fields,
+            '$setOnInsert': {
+                'created_at': item.get('created_at', now),
+                'is_viewed': item.get('is_viewed', False)
+            }
+        }
+    
+    def bulk_upsert_items(self, items: List[Dict], batch_size: int = 500,
+                          on_batch: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """按job_hash批量upsert条目（无序bulk_write，分块提交）
+        
+        on_batch(已写入条数, 总条数) 在每批提交后调用。
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not items:
+            return counts
+        
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+            operations = [
+                UpdateOne({'job_hash': item['job_hash']}, self._build_upsert_update(item), upsert=True)
+                for item in chunk
+            ]
+            result = self.items.bulk_write(operations, ordered=False)
+            self.invalidate_caches()
+            counts['inserted'] += result.upserted_count
+            counts['updated'] += result.modified_count
+            counts['unchanged'] += result.matched_count - result.modified_count
+            if on_batch is not None:
+                on_batch(start + len(chunk), len(items))
+        
+        return counts
+    
+    def get_content_fingerprints(self) -> Dict[str, Dict]:
+        """一次投影查询加载 job_hash -> 内容指纹 映射（用于增量导入，附带变更事件所需的标识与标题）"""
+        cursor = self.items.find(
+            {},
+            {'_id': 0, 'job_hash': 1, 'content_hash': 1, 'sheet_name': 1, 'is_active': 1,
+             'job_id': 1, 'code': 1, 'title': 1}
+        )
+        return {doc['job_hash']: doc for doc in cursor if 'job_hash' in doc}
+    
+    def get_items_by_hashes(self, job_hashes: List[str], batch_size: int = 500) -> Dict[str, Dict]:
+        """按 job_hash 批量读取完整条目（不含_id），返回 job_hash -> 条目"""
+        items = {}
+        for start in range(0, len(job_hashes), batch_size):
+            chunk = job_hashes[start:start + batch_size]
+            for doc in self.items.find({'job_hash': {'$in': chunk}}, {'_id': 0}):
+                items[doc['job_hash']] = doc
+        return items
+    
+    def iter_search_documents(self, job_hashes: Optional[List[str]] = None,
+                              updated_since: Optional[datetime] = None) -> Iterator[Dict]:
+        """读取建立检索索引所需的字段：全部、指定 job_hash，或 updated_at 不早于给定时间的条目"""
+        if job_hashes is not None:
+            for start in range(0, len(job_hashes), SEARCH_FETCH_BATCH_SIZE):
+                chunk = job_hashes[start:start + SEARCH_FETCH_BATCH_SIZE]
+                yield from self.items.find({'job_hash': {'$in': chunk}}, SEARCH_DOCUMENT_PROJECTION)
+            return
+        query = {'updated_at': {'$gte': updated_since}} if updated_since else {}
+        yield from self.items.find(query, SEARCH_DOCUMENT_PROJECTION).batch_size(SEARCH_FETCH_BATCH_SIZE)
+    
+    def mark_items_inactive(self, job_hashes: List[str], batch_size: int = 500) -> int:
+        """将已下线的条目标记为非活跃"""
+        marked = 0
+        now = datetime.now(BEIJING_TZ)
+        for start in range(0, len(job_hashes), batch_size):
+            chunk = job_hashes[start:start + batch_size]
+            result = self.items.update_many(
+                {'job_hash': {'$in': chunk}, 'is_active': {'$ne': False}},
+                {'$set': {'is_active': False, 'removed_at': now, 'updated_at': now}}
+            )
+            marked += result.modified_count
+        self.invalidate_caches()
+        return marked
     
     def clear_all_items(self):
         """清空所有条目（慎用）"""
         self.items.delete_many({})
+        self.invalidate_caches()
+    
+    # ===== 职位变更事件 =====
+    
+    def insert_posting_events(self, events: List[Dict], batch_size: int = 500) -> int:
+        """追加职位变更事件（导入时调用），返回写入条数"""
+        inserted = 0
+        for start in range(0, len(events), batch_size):
+            result = self.posting_events.insert_many(events[start:start + batch_size], ordered=False)
+            inserted += len(result.inserted_ids)
+        return inserted
+    
+    def get_posting_events(self, after: Optional[str] = None, limit: int = 100,
+                           event_type: Optional[str] = None, sheet_name: Optional[str] = None,
+                           key: Optional[str] = None, since: Optional[datetime] = None) -> Dict:
+        """按 (time, _id) 升序读取职位变更事件
+        
+        after 为上一次返回的 next_cursor；没有更多事件时 next_cursor 仍指向最后一条已读事件，
+        消费方保存后可稍后从该处继续读取增量。
+        """
+        if event_type is not None and event_type not in POSTING_EVENT_TYPES:
+            raise ValueError(f"无效的事件类型: {event_type}")
+        
+        query = {}
+        if event_type:
+            query['type'] = event_type
+        if sheet_name:
+            query['sheet_name'] = sheet_name
+        if key:
+            query['key'] = key
+        if since is not None:
+            query['time'] = {'$gte': since}
+        if after:
+            value, event_id = decode_cursor(after, kind='event')
+            if value is None:
+                raise ValueError(f"无效的分页游标: {after}")
+            keyset = _ascending_keyset_filter('time', value, event_id)
+            query = {'$and': [query, keyset]} if query else keyset
+        
+        events = list(self.posting_events.find(query).sort(_EVENT_SORT).limit(limit + 1))
+        has_more = len(events) > limit
+        events = events[:limit]
+        return {
+            'events': events,
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(events[-1], field='time', kind='event') if events else after
+        }
+    
+    # ===== 数据版本 =====
+    
+    def get_data_generation(self) -> Dict:
+        """读取数据版本号 {'value', 'updated_at'}，尚未导入过时为0"""
+        doc = self.meta.find_one({'_id': 'data_generation'})
+        if not doc:
+            return {'value': 0, 'updated_at': None}
+        return {'value': doc.get('value', 0), 'updated_at': doc.get('updated_at')}
+    
+    def bump_data_generation(self) -> Dict:
+        """数据版本号加一（每次导入产生变化后调用），返回新版本"""
+        doc = self.meta.find_one_and_update(
+            {'_id': 'data_generation'},
+            {'$inc': {'value': 1}, '$set': {'updated_at': datetime.now(BEIJING_TZ)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return {'value': doc['value'], 'updated_at': doc['updated_at']}
+    
+    # ===== 同步租约与运行记录 =====
+    
+    def acquire_sync_lease(self, owner: str, run_id: ObjectId, ttl: int) -> bool:
+        """获取同步租约（跨线程/进程/worker互斥），租约不存在或已过期时成功"""
+        now = datetime.now(BEIJING_TZ)
+        try:
+            self.meta.find_one_and_update(
+                {'_id': 'sync_lease', '$or': [{'expires_at': {'$lte': now}}, {'owner': owner}]},
+                {'$set': {'owner': owner, 'run_id': run_id, 'acquired_at': now,
+                          'expires_at': now + timedelta(seconds=ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # 租约由其他持有者占用且未过期，upsert 与已有文档冲突
+            return False
+    
+    def renew_sync_lease(self, owner: str, ttl: int) -> bool:
+        """续期同步租约，租约已被他人接管时返回False"""
+        result = self.meta.update_one(
+            {'_id': 'sync_lease', 'owner': owner},
+            {'$set': {'expires_at': datetime.now(BEIJING_TZ) + timedelta(seconds=ttl)}}
+        )
+        return result.matched_count == 1
+    
+    def release_sync_lease(self, owner: str) -> None:
+        self.meta.delete_one({'_id': 'sync_lease', 'owner': owner})
+    
+    def get_sync_lease(self) -> Optional[Dict]:
+        """读取未过期的同步租约"""
+        return self.meta.find_one({'_id': 'sync_lease', 'expires_at': {'$gt': datetime.now(BEIJING_TZ)}})
+    
+    def start_sync_run(self, run_id: ObjectId, run_type: str, owner: str,
+                       tasks: Optional[List[str]] = None) -> None:
+        """记录一次开始执行的同步（同步日志即运行历史），tasks 为本次整理的类型（None 表示全部）"""
+        now = datetime.now(BEIJING_TZ)
+        # 持有租约时不可能有其他同步在执行，遗留的运行中记录来自中断的进程
+        self.sync_logs.update_many(
+            {'status': 'running'},
+            {'$set': {'status': 'failed', 'finished_at': now, 'error_message': '同步进程中断'}}
+        )
+        self.sync_logs.insert_one({
+            '_id': run_id,
+            'type': run_type,
+            'tasks': tasks,
+            'status': 'running',
+            'owner': owner,
+            'sync_time': now,
+            'progress': 0,
+            'message': '同步已启动',
+            'coalesced': 0,
+            'coalesced_types': [],
+            'new_count': 0,
+            'total_count': None,
+            'duration': None,
+            'error_message': None,
+            'events': []
+        })
+    
+    def update_sync_run(self, run_id: ObjectId, fields: Dict) -> None:
+        self.sync_logs.update_one({'_id': run_id}, {'$set': fields})
+    
+    def append_sync_event(self, run_id: ObjectId, event: Dict, fields: Dict, max_events: int = 500) -> None:
+        """追加一条同步进度事件（只保留最近 max_events 条），同时更新运行记录字段"""
+        update = {'$push': {'events': {'$each': [event], '$slice': -max_events}}}
+        if fields:
+            update['$set'] = fields
+        self.sync_logs.update_one({'_id': run_id}, update)
+    
+    def coalesce_sync_run(self, run_id: ObjectId, run_type: str) -> None:
+        """把重复的同步请求合并到正在执行的同步"""
+        self.sync_logs.update_one(
+            {'_id': run_id},
+            {'$inc': {'coalesced': 1}, '$push': {'coalesced_types': run_type}}
+        )
+    
+    def get_sync_run(self, run_id: ObjectId) -> Optional[Dict]:
+        return self.sync_logs.find_one({'_id': run_id})
+    
+    # ===== 整理调度 =====
+    
+    def get_crawl_schedule(self) -> Dict[str, Dict]:
+        """读取各类型的整理调度状态 {sheet_name: {...}}"""
+        doc = self.meta.find_one({'_id': 'crawl_schedule'})
+        return doc.get('tasks', {}) if doc else {}
+    
+    def update_crawl_schedule(self, sheet_name: str, state: Dict) -> None:
+        self.meta.update_one(
+            {'_id': 'crawl_schedule'},
+            {'$set': {f'tasks.{sheet_name}': state}},
+            upsert=True
+        )
     
     # ===== 同步日志 =====
     
@@ -188,9 +901,6 @@ class DatabaseService:
     
     def get_latest_sync_logs(self, limit: int = 10) -> List[Dict]:
         """获取最近的同步日志"""
-        cursor = self.sync_logs.find().sort('sync_time', DESCENDING).limit(limit)
-        logs = list(cursor)
-        for log in logs:
-            log['_id'] = str(log['_id'])
-        return logs
+        cursor = self.sync_logs.find({}, {'events': 0}).sort('sync_time', DESCENDING).limit(limit)
+        return list(cursor)
 
@@ -0,0 +1,117 @@
+"""数据版本：导入产生变化时递增，用于HTTP条件请求（ETag / Last-Modified）"""
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+import logging
+import pytz
+
+from flask import make_response, request
+
+logger = logging.getLogger(__name__)
+
+# 北京时区
+BEIJING_TZ = pytz.timezone('Asia/Shanghai')
+
+
+class DataGeneration:
+    """进程内持有的数据版本号
+
+    版本号持久化在 meta 集合中；本进程的导入直接更新内存中的值，
+    其他进程（如 init_db.py，导入后同样通过 on_import 递增）的导入最多延迟 refresh_interval 秒后可见。
+    条件请求只比较内存中的值，命中时不查询数据库。
+    重新读取时发现版本已被其他进程递增，先调用 on_external_change 注册的回调（清空本进程的查询/统计缓存），
+    再启用新版本，避免新ETag对应缓存中的旧数据。
+    """
+
+    def __init__(self, db_service, refresh_interval: int = 30):
+        self.db = db_service
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._value = 0
+        self._updated_at: Optional[datetime] = None
+        self._loaded_at = 0.0
+        self._external_listeners: List[Callable[[int], None]] = []
+        self._load()
+    
+    def on_external_change(self, callback: Callable[[int], None]) -> None:
+        """注册回调 callback(新版本号)：其他进程递增了数据版本时调用"""
+        self._external_listeners.append(callback)
+
+    def _set(self, doc) -> None:
+        updated_at = doc['updated_at']
+        if updated_at is not None and updated_at.tzinfo is None:
+            updated_at = pytz.utc.localize(updated_at)
+        self._value = doc['value']
+        self._updated_at = updated_at or datetime.now(BEIJING_TZ)
+        self._loaded_at = time.monotonic()
+
+    def _load(self) -> None:
+        try:
+            doc = self.db.get_data_generation()
+            if doc['value'] != self._value and self._updated_at is not None:
+                for callback in self._external_listeners:
+                    try:
+                        callback(doc['value'])
+                    except Exception as e:
+                        logger.warning(f"数据版本变化回调失败: {e}")
+                logger.info(f"其他进程已将数据版本更新为 {doc['value']}")
+            self._set(doc)
+        except Exception as e:
+            logger.warning(f"读取数据版本失败: {e}")
+            self._loaded_at = time.monotonic()
+            if self._updated_at is None:
+                self._updated_at = datetime.now(BEIJING_TZ)
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._loaded_at >= self.refresh_interval:
+            with self._lock:
+                if time.monotonic() - self._loaded_at >= self.refresh_interval:
+                    self._load()
+
+    @property
+    def value(self) -> int:
+        self._maybe_refresh()
+        return self._value
+
+    @property
+    def updated_at(self) -> datetime:
+        self._maybe_refresh()
+        return self._updated_at
+
+    def bump(self) -> int:
+        """导入产生变化后递增版本号"""
+        with self._lock:
+            self._set(self.db.bump_data_generation())
+        logger.info(f"数据版本已更新为 {self._value}")
+        return self._value
+
+    def on_import(self, result) -> None:
+        """导入回调：清空重建或有新增、更新、下线时才递增，数据未变时客户端缓存继续有效"""
+        if result.get('cleared') or result.get('imported') or result.get('updated') or result.get('removed'):
+            self.bump()
+
+    def etag(self, *parts) -> str:
+        """由版本号和请求特征（路径、参数等）生成ETag"""
+        key = ':'.join(str(part) for part in (self.value, *parts))
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def not_modified(self, etag: str):
+        """客户端缓存仍然有效时返回304响应，否则返回None"""
+        if request.if_none_match:
+            matched = request.if_none_match.contains_weak(etag)
+        elif request.if_modified_since:
+            matched = self.updated_at.replace(microsecond=0) <= request.if_modified_since
+        else:
+            matched = False
+        if not matched:
+            return None
+        return self.tag(make_response('', 304), etag)
+
+    def tag(self, response, etag: str):
+        """为响应加上ETag / Last-Modified，要求客户端每次重新验证"""
+        response.set_etag(etag)
+        response.last_modified = self.updated_at
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
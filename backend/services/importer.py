@@ -1,49 +1,190 @@
 """数据导入服务"""
 import json
 import hashlib
+import time
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, Callable, Dict, Iterable, List, Optional
 import logging
 import pytz
 
+from job_schema import coerce_record, generate_job_hash, posting_key
+from snapshot_store import SnapshotStore
+
 logger = logging.getLogger(__name__)
 
 # 北京时区
 BEIJING_TZ = pytz.timezone('Asia/Shanghai')
 
+# 类型映射
+TYPE_MAPPING = {
+    'intern': '新丝瓜',
+    'campus': '生丝瓜',
+    'experienced': '熟丝瓜'
+}
+
+# 不参与内容指纹计算的字段（由导入流程自身维护）
+FINGERPRINT_EXCLUDED_FIELDS = {
+    '_id', 'created_at', 'updated_at', 'removed_at', 'is_viewed', 'is_active', 'content_hash'
+}
+
+
+# 变更事件中不做字段对比的字段（导入流程维护的元数据、派生字段与每次整理都会变化的标记）
+DIFF_EXCLUDED_FIELDS = FINGERPRINT_EXCLUDED_FIELDS | {'job_hash', 'type_name', 'is_new', '采摘时间'}
+
+
+def _comparable(value: Any) -> Any:
+    """数据库读出的时间为UTC无时区，导入记录的时间带时区，统一为UTC无时区后再比较"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(pytz.utc).replace(tzinfo=None)
+    return value
+
+
+def diff_fields(old: Dict, new: Dict) -> Dict[str, Dict[str, Any]]:
+    """字段级差异 {字段: {'old': 旧值, 'new': 新值}}"""
+    changes = {}
+    for field in old.keys() | new.keys():
+        if field in DIFF_EXCLUDED_FIELDS:
+            continue
+        old_value = _comparable(old.get(field))
+        new_value = _comparable(new.get(field))
+        if old_value != new_value:
+            changes[field] = {'old': old_value, 'new': new_value}
+    return changes
+
 
 class DataImporter:
-    """从JSON缓存文件导入数据到MongoDB"""
+    """从爬虫结果、快照存储或JSON缓存文件导入数据到MongoDB"""
     
-    def __init__(self, db_service, json_file_path: Path):
+    def __init__(self, db_service, json_file_path: Path, batch_size: int = 500,
+                 snapshot_dir: Optional[Path] = None):
         self.db = db_service
         self.json_file = json_file_path
+        self.batch_size = batch_size
+        self.snapshot_store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        self._listeners: List[Callable[[Dict], None]] = []
+    
+    def add_listener(self, callback: Callable[[Dict], None]) -> None:
+        """注册导入成功后的回调（参数为导入结果），用于刷新统计快照等派生数据"""
+        self._listeners.append(callback)
+    
+    def _notify_listeners(self, result: Dict) -> None:
+        for callback in self._listeners:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error(f"导入回调执行失败: {e}", exc_info=True)
     
     @staticmethod
     def _generate_job_hash(job_data: Dict) -> str:
-        """生成job_hash（与爬虫脚本保持一致）"""
-        key_fields = ['code', 'title', 'description', 'requirement']
-        hash_string = ''.join(str(job_data.get(field, '')) for field in key_fields)
-        return hashlib.md5(hash_string.encode('utf-8')).hexdigest()
+        """生成job_hash（与爬虫共用 job_schema 中的实现）"""
+        return generate_job_hash(job_data)
     
     @staticmethod
-    def _parse_time(time_str) -> datetime:
-        """解析时间字符串为北京时间"""
+    def _parse_time(time_str) -> Optional[datetime]:
+        """解析时间字符串为北京时间；空值或无法解析时返回None（不能用当前时间代替，否则内容指纹每次导入都会变化）"""
         if isinstance(time_str, datetime):
             # 如果已经是datetime对象，确保有时区信息
             if time_str.tzinfo is None:
                 # 假设无时区的datetime是北京时间
                 return BEIJING_TZ.localize(time_str)
             return time_str.astimezone(BEIJING_TZ)
-        if isinstance(time_str, str):
+        if isinstance(time_str, str) and time_str.strip():
             try:
                 # 解析字符串为datetime，假设是北京时间
-                dt = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
-                return BEIJING_TZ.localize(dt)
-            except:
-                return datetime.now(BEIJING_TZ)
-        return datetime.now(BEIJING_TZ)
+                dt = datetime.strptime(time_str.strip(), '%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                logger.debug(f"无法解析的时间: {time_str}")
+                return None
+            return BEIJING_TZ.localize(dt)
+        return None
+    
+    @staticmethod
+    def _content_fingerprint(record: Dict) -> str:
+        """计算记录内容指纹（排除导入过程维护的元数据字段）"""
+        content = {k: v for k, v in record.items() if k not in FINGERPRINT_EXCLUDED_FIELDS}
+        payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
+    
+    def _prepare_record(self, sheet_name: str, record: Dict) -> Dict:
+        """规范化单条记录，补充job_hash、类型等字段"""
+        # 按字段规格规整类型（NaN→None，整数列还原为int），保证内容指纹稳定
+        coerce_record(record)
+        
+        # 爬虫存档中已带job_hash时直接复用
+        record['job_hash'] = record.get('job_hash') or self._generate_job_hash(record)
+        record['sheet_name'] = sheet_name
+        
+        # 解析时间字段
+        for field in ('采摘时间', 'publish_time'):
+            if field in record:
+                record[field] = self._parse_time(record[field])
+        
+        # 设置类型名称
+        record['type_name'] = TYPE_MAPPING.get(sheet_name, sheet_name)
+        
+        record['content_hash'] = self._content_fingerprint(record)
+        record['is_active'] = True
+        return record
+    
+    @staticmethod
+    def _posting_event(event_type: str, doc: Dict, now: datetime) -> Dict:
+        """构造职位变更事件（按职位稳定标识 key 归属）"""
+        return {
+            'type': event_type,
+            'key': posting_key(doc),
+            'job_id': doc.get('job_id'),
+            'code': doc.get('code'),
+            'job_hash': doc['job_hash'],
+            'sheet_name': doc.get('sheet_name'),
+            'title': doc.get('title'),
+            'time': now
+        }
+    
+    def _change_events(self, changed: List[Dict], previous: Dict[str, str],
+                       old_docs: Dict[str, Dict], now: datetime) -> List[Dict]:
+        """新增/修改事件；只有元数据变化（如 is_new）的记录不产生事件"""
+        events = []
+        for record in changed:
+            old = old_docs.get(previous.get(record['job_hash']))
+            if old is None:
+                events.append(self._posting_event('added', record, now))
+                continue
+            changes = diff_fields(old, record)
+            if changes:
+                event = self._posting_event('modified', record, now)
+                if old['job_hash'] != record['job_hash']:
+                    # 描述/要求被编辑，条目以新的 job_hash 存储
+                    event['previous_hash'] = old['job_hash']
+                event['changes'] = changes
+                events.append(event)
+        return events
+    
+    def import_from_cache(self, clear_existing: bool = False) -> Dict:
+        """从爬虫存档导入：优先最新快照，没有快照时读取旧版JSON缓存"""
+        if self.snapshot_store is not None and self.snapshot_store.exists():
+            return self.import_from_snapshot(clear_existing=clear_existing)
+        return self.import_from_json(clear_existing=clear_existing)
+    
+    def import_from_snapshot(self, clear_existing: bool = False) -> Dict:
+        """从最新快照导入（内存映射按批读取，不一次性加载整份存档）"""
+        if self.snapshot_store is None:
+            return {'success': False, 'message': '未配置快照存档'}
+        
+        # 共享锁：读取期间爬虫不会清理该快照
+        with self.snapshot_store.lock(shared=True):
+            snapshot = self.snapshot_store.latest()
+            if snapshot is None:
+                logger.error("没有可用的快照存档")
+                return {'success': False, 'message': '没有可用的快照存档'}
+            
+            logger.info(f"从快照 {snapshot.id} 导入")
+            data = {
+                sheet_name: chain.from_iterable(snapshot.iter_records(sheet_name))
+                for sheet_name in snapshot.sheet_names()
+            }
+            return self.import_records(data, clear_existing=clear_existing)
     
     def import_from_json(self, clear_existing: bool = False) -> Dict:
         """从JSON文件导入数据"""
@@ -55,62 +196,139 @@ class DataImporter:
             # 读取JSON数据
             with open(self.json_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            
+        except Exception as e:
+            error_msg = f"导入失败: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return {
+                'success': False,
+                'message': error_msg
+            }
+        
+        return self.import_records(data, clear_existing=clear_existing)
+    
+    def import_records(self, data: Dict[str, Iterable[Dict]], clear_existing: bool = False,
+                       on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict:
+        """导入按类型分组的记录（爬虫进程内返回的结果或JSON缓存内容）
+        
+        on_progress(事件名, 数据) 在每批写入后（import_batch）和导入完成时（import_finished）调用。
+        新增、修改（按职位稳定标识对应，附字段级差异）与下线的职位追加到 posting_events；
+        clear_existing 为True时是整体重建，不记录变更事件。
+        """
+        start_time = time.monotonic()
+        emit = on_progress or (lambda event, data: None)
+        try:
             # 可选：清空现有数据
             if clear_existing:
                 self.db.clear_all_items()
                 logger.info("已清空现有数据")
             
-            # 导入数据
-            total_imported = 0
-            total_updated = 0
+            # 一次投影查询加载现有指纹，只写入新增或内容变化的记录
+            existing = {} if clear_existing else self.db.get_content_fingerprints()
+            # 活跃条目的稳定标识 -> job_hash：描述被编辑后 job_hash 变化，仍按标识识别为同一职位的修改
+            active_by_key = {
+                posting_key(doc): job_hash for job_hash, doc in existing.items() if doc.get('is_active', True)
+            }
+            record_events = not clear_existing
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+            incoming_hashes = set()
+            incoming_keys = set()
+            imported_sheets = set()
+            changed_hashes = []
+            events = []
+            now = datetime.now(BEIJING_TZ)
             
             for sheet_name, records in data.items():
-                if not records:
+                changed = []
+                # 被修改职位：新 job_hash -> 修改前的 job_hash（内容就地变化时两者相同）
+                previous = {}
+                total = 0
+                for record in records:
+                    total += 1
+                    prepared = self._prepare_record(sheet_name, record)
+                    job_hash = prepared['job_hash']
+                    key = posting_key(prepared)
+                    incoming_hashes.add(job_hash)
+                    incoming_keys.add(key)
+                    current = existing.get(job_hash)
+                    if (current and current.get('content_hash') == prepared['content_hash']
+                            and current.get('is_active', True)):
+                        counts['unchanged'] += 1
+                        continue
+                    changed.append(prepared)
+                    if current and current.get('is_active', True):
+                        previous[job_hash] = job_hash
+                    elif active_by_key.get(key, job_hash) != job_hash:
+                        previous[job_hash] = active_by_key[key]
+                
+                if not total:
                     continue
                 
-                logger.info(f"正在导入 {sheet_name}，共 {len(records)} 条")
+                imported_sheets.add(sheet_name)
+                logger.info(f"正在导入 {sheet_name}，共 {total} 条，其中变化 {len(changed)} 条")
                 
-                for record in records:
-                    # 生成job_hash
-                    job_hash = self._generate_job_hash(record)
-                    record['job_hash'] = job_hash
-                    record['sheet_name'] = sheet_name
-                    
-                    # 解析时间字段
-                    if '采摘时间' in record and record['采摘时间']:
-                        record['采摘时间'] = self._parse_time(record['采摘时间'])
-                    
-                    if 'publish_time' in record:
-                        record['publish_time'] = self._parse_time(record['publish_time'])
-                    
-                    # 设置类型名称
-                    type_mapping = {
-                        'intern': '新丝瓜',
-                        'campus': '生丝瓜',
-                        'experienced': '熟丝瓜'
-                    }
-                    record['type_name'] = type_mapping.get(sheet_name, sheet_name)
-                    
-                    # 设置状态
-                    if 'is_viewed' not in record:
-                        record['is_viewed'] = False
-                    
-                    # 插入或更新
-                    if self.db.upsert_item(job_hash, record):
-                        total_updated += 1
-                    else:
-                        total_imported += 1
+                # 写入前读取被修改职位的旧版本，用于字段级对比
+                if record_events and changed:
+                    old_docs = self.db.get_items_by_hashes(list(set(previous.values()))) if previous else {}
+                    events.extend(self._change_events(changed, previous, old_docs, now))
+                
+                sheet_counts = self.db.bulk_upsert_items(
+                    changed, batch_size=self.batch_size,
+                    on_batch=lambda written, count, sheet=sheet_name: emit('import_batch', {
+                        'sheet': sheet, 'written': written, 'changed': count, 'total': total
+                    })
+                )
+                changed_hashes.extend(record['job_hash'] for record in changed)
+                for key, value in sheet_counts.items():
+                    counts[key] += value
+            
+            # 本次数据中已消失的条目单独标记为非活跃
+            removed = [
+                job_hash for job_hash, doc in existing.items()
+                if doc.get('sheet_name') in imported_sheets
+                and job_hash not in incoming_hashes
+                and doc.get('is_active', True)
+            ]
+            if removed:
+                counts['removed'] = self.db.mark_items_inactive(removed, batch_size=self.batch_size)
+                if record_events:
+                    # 标识仍在本次数据中的是被编辑职位的旧版本，已记为修改
+                    events.extend(
+                        self._posting_event('removed', existing[job_hash], now) for job_hash in removed
+                        if posting_key(existing[job_hash]) not in incoming_keys
+                    )
             
-            message = f"导入完成：新增 {total_imported} 条，更新 {total_updated} 条"
+            event_counts = {event_type: 0 for event_type in ('added', 'modified', 'removed')}
+            for event in events:
+                event_counts[event['type']] += 1
+            if events:
+                self.db.insert_posting_events(events, batch_size=self.batch_size)
+                logger.info(f"已记录变更事件：新增 {event_counts['added']}，修改 {event_counts['modified']}，"
+                            f"下线 {event_counts['removed']}")
+            
+            message = (f"导入完成：新增 {counts['inserted']} 条，更新 {counts['updated']} 条，"
+                       f"未变化 {counts['unchanged']} 条，下线 {counts['removed']} 条")
             logger.info(message)
             
-            return {
+            result = {
                 'success': True,
                 'message': message,
-                'imported': total_imported,
-                'updated': total_updated
+                'imported': counts['inserted'],
+                'updated': counts['updated'],
+                'unchanged': counts['unchanged'],
+                'removed': counts['removed'],
+                # 变化集：供检索索引等监听方增量更新
+                'cleared': clear_existing,
+                'changed_hashes': changed_hashes,
+                'removed_hashes': removed,
+                'events': event_counts
             }
+            emit('import_finished', {
+                'imported': counts['inserted'], 'updated': counts['updated'],
+                'unchanged': counts['unchanged'], 'removed': counts['removed'],
+                'duration': round(time.monotonic() - start_time, 3)
+            })
+            self._notify_listeners(result)
+            return result
             
         except Exception as e:
             error_msg = f"导入失败: {str(e)}"
@@ -119,4 +337,3 @@ class DataImporter:
                 'success': False,
                 'message': error_msg
             }
-
@@ -0,0 +1,93 @@
+"""响应层：orjson 序列化与 gzip/brotli 压缩"""
+import gzip
+from datetime import date
+from typing import Any
+
+import orjson
+from bson.objectid import ObjectId
+from flask import Flask, request
+from flask.json.provider import JSONProvider
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：缺失时只使用gzip
+    brotli = None
+
+# 可压缩的响应类型
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+# orjson 选项：无时区的datetime按UTC输出（pymongo读出的时间均为UTC），非字符串键转为字符串
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """orjson 不直接支持的类型"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class OrjsonProvider(JSONProvider):
+    """基于 orjson 的 Flask JSON Provider（jsonify 自动使用）"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        """直接输出bytes，省去一次 str→bytes 编码"""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def choose_encoding(accept_encodings) -> str | None:
+    """按客户端 Accept-Encoding 选择压缩方式：优先brotli，其次gzip"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def init_response_layer(app: Flask, min_size: int = 1024) -> None:
+    """为应用启用 orjson 序列化，并对超过 min_size 字节的响应按协商结果压缩"""
+    app.json = OrjsonProvider(app)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress_body(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        # 压缩后的字节与原文不同，强ETag降为弱ETag
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
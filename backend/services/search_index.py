@@ -0,0 +1,347 @@
+"""本地全文检索：中文二元切分 + BM25 排序的进程内倒排索引
+
+MongoDB 的 $text 不对中文分词，"后端"这类检索词会漏检或误检。本索引：
+  - 中文按单字 + 相邻二元组切分，英文/数字按词切分；
+  - 检索词中连续的中文要求其所有二元组都命中（近似短语匹配），英文词支持前缀匹配；
+  - 按 BM25 排序（标题词频加权），返回每个字段的命中位置用于高亮；
+  - 持久化到本地文件，启动时加载后只补齐数据库中更新过的条目，导入后按变化集增量更新。
+"""
+import math
+import os
+import pickle
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# 参与检索的字段及其词频权重
+SEARCH_FIELD_WEIGHTS = {'title': 3, 'description': 1, 'requirement': 1}
+
+# 索引中保存的筛选字段
+FILTER_FIELDS = ('sheet_name', 'is_new')
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 前缀扩展命中的得分折扣，以及单个前缀最多扩展的词数
+PREFIX_DISCOUNT = 0.8
+MAX_PREFIX_EXPANSIONS = 50
+# 每个字段最多返回的高亮区间数
+MAX_HIGHLIGHTS_PER_FIELD = 5
+
+_TOKEN_RE = re.compile(r'[㐀-䶿一-鿿]+|[a-z0-9]+[+#]*')
+
+
+def _is_cjk(text: str) -> bool:
+    return '㐀' <= text[0] <= '鿿'
+
+
+def normalize(text: str) -> str:
+    """全角转半角并转小写"""
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """文档切分：中文输出单字和相邻二元组，英文/数字输出整词"""
+    tokens = []
+    for run in _TOKEN_RE.findall(normalize(text)):
+        if _is_cjk(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def parse_query(query: str) -> List[Tuple[str, List[str], bool]]:
+    """检索词切分为词组 [(原文片段, 需全部命中的词, 是否前缀匹配)]"""
+    groups = []
+    for run in _TOKEN_RE.findall(normalize(query)):
+        if _is_cjk(run):
+            terms = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+            groups.append((run, terms, False))
+        else:
+            groups.append((run, [run], True))
+    return groups
+
+
+class SearchIndex:
+    """倒排索引：term -> {job_hash: 加权词频}"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.RLock()
+        self.ready = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self.docs: Dict[str, Dict] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+        # 已同步到的最大 updated_at（启动时据此补齐）
+        self.synced_at: Optional[datetime] = None
+        self._sorted_terms: Optional[List[str]] = None
+
+    # ===== 文档维护 =====
+
+    @staticmethod
+    def _doc_terms(doc: Dict) -> Counter:
+        counts: Counter = Counter()
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            value = doc.get(field)
+            if value:
+                for token in tokenize(str(value)):
+                    counts[token] += weight
+        return counts
+
+    def _remove(self, job_hash: str) -> None:
+        doc = self.docs.pop(job_hash, None)
+        if doc is None:
+            return
+        for term in doc['terms']:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(job_hash, None)
+                if not postings:
+                    del self.postings[term]
+                    self._sorted_terms = None
+        self.total_length -= doc['length']
+
+    def _add(self, doc: Dict) -> None:
+        job_hash = doc['job_hash']
+        self._remove(job_hash)
+        terms = self._doc_terms(doc)
+        for term, count in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                self._sorted_terms = None
+            postings[job_hash] = count
+        length = sum(terms.values())
+        self.docs[job_hash] = {
+            'fields': {field: str(doc[field]) for field in SEARCH_FIELD_WEIGHTS if doc.get(field)},
+            'filters': {field: doc.get(field) for field in FILTER_FIELDS},
+            'terms': tuple(terms),
+            'length': length
+        }
+        self.total_length += length
+        updated_at = doc.get('updated_at')
+        if isinstance(updated_at, datetime) and (self.synced_at is None or updated_at > self.synced_at):
+            self.synced_at = updated_at
+
+    def upsert(self, docs: Iterable[Dict]) -> int:
+        """新增或替换文档；已下线（is_active 为False）的文档从索引中移除"""
+        count = 0
+        with self._lock:
+            for doc in docs:
+                if not doc.get('job_hash'):
+                    continue
+                if doc.get('is_active') is False:
+                    self._remove(doc['job_hash'])
+                else:
+                    self._add(doc)
+                count += 1
+        return count
+
+    def remove(self, job_hashes: Iterable[str]) -> None:
+        with self._lock:
+            for job_hash in job_hashes:
+                self._remove(job_hash)
+
+    # ===== 与数据库同步 =====
+
+    def rebuild(self, db_service) -> None:
+        """从数据库全量重建"""
+        start = time.perf_counter()
+        with self._lock:
+            self._reset()
+            self.upsert(db_service.iter_search_documents())
+            self.ready = True
+        logger.info(f"检索索引已重建：{len(self.docs)} 条，{len(self.postings)} 个词，"
+                    f"耗时 {time.perf_counter() - start:.2f}秒")
+        self.save()
+
+    def catch_up(self, db_service) -> None:
+        """加载磁盘上的索引后，只补齐数据库中更新过的条目；条目数不一致时全量重建
+
+        全程持有锁，期间完成的导入回调会等待补齐结束后再应用。
+        """
+        with self._lock:
+            if not self.load() or self.synced_at is None:
+                self.rebuild(db_service)
+                return
+            updated = self.upsert(db_service.iter_search_documents(updated_since=self.synced_at))
+            if db_service.count_active_items() != len(self.docs):
+                logger.info("检索索引与数据库条目数不一致，全量重建")
+                self.rebuild(db_service)
+                return
+            self.ready = True
+            logger.info(f"检索索引已加载：{len(self.docs)} 条，补齐 {updated} 条")
+            if updated:
+                self.save()
+
+    def apply_import(self, db_service, result: Dict) -> None:
+        """导入回调：按导入结果中的变化集增量更新"""
+        if result.get('cleared'):
+            self.rebuild(db_service)
+            return
+        job_hashes = list(result.get('changed_hashes', [])) + list(result.get('removed_hashes', []))
+        if not job_hashes:
+            return
+        with self._lock:
+            docs = list(db_service.iter_search_documents(job_hashes=job_hashes))
+            found = {doc['job_hash'] for doc in docs}
+            self.remove(job_hash for job_hash in job_hashes if job_hash not in found)
+            self.upsert(docs)
+        logger.info(f"检索索引已增量更新 {len(job_hashes)} 条")
+        self.save()
+
+    # ===== 持久化 =====
+
+    def save(self) -> None:
+        """写临时文件后原子替换"""
+        if self.path is None:
+            return
+        with self._lock:
+            state = {
+                'version': INDEX_FORMAT_VERSION,
+                'docs': self.docs,
+                'postings': self.postings,
+                'total_length': self.total_length,
+                'synced_at': self.synced_at
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+            try:
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"保存检索索引失败: {e}")
+                tmp_path.unlink(missing_ok=True)
+
+    def load(self) -> bool:
+        """加载磁盘上的索引，文件不存在、版本不符或损坏时返回False"""
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+            if state.get('version') != INDEX_FORMAT_VERSION:
+                return False
+        except Exception as e:
+            logger.warning(f"读取检索索引失败: {e}")
+            return False
+        with self._lock:
+            self._reset()
+            self.docs = state['docs']
+            self.postings = state['postings']
+            self.total_length = state['total_length']
+            self.synced_at = state['synced_at']
+        return True
+
+    # ===== 检索 =====
+
+    def _expand(self, term: str, prefix: bool) -> List[Tuple[str, float]]:
+        """词 -> [(索引词, 得分系数)]，前缀匹配时包含以该词开头的其他英文词"""
+        expansions = [(term, 1.0)] if term in self.postings else []
+        if prefix:
+            if self._sorted_terms is None:
+                self._sorted_terms = sorted(t for t in self.postings if not _is_cjk(t))
+            index = bisect_left(self._sorted_terms, term)
+            while (index < len(self._sorted_terms) and self._sorted_terms[index].startswith(term)
+                   and len(expansions) < MAX_PREFIX_EXPANSIONS):
+                if self._sorted_terms[index] != term:
+                    expansions.append((self._sorted_terms[index], PREFIX_DISCOUNT))
+                index += 1
+        return expansions
+
+    def search(self, query: str, filters: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """检索并按BM25得分降序返回 [(job_hash, 得分)]；所有词组都命中的条目才返回"""
+        groups = parse_query(query)
+        if not groups:
+            return []
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+
+        with self._lock:
+            doc_count = len(self.docs)
+            if not doc_count:
+                return []
+            average_length = self.total_length / doc_count
+            # 每个词都必须命中：从文档频率最低的词开始求交集，候选集尽早缩小
+            units = [self._expand(term, prefix) for _, terms, prefix in groups for term in terms]
+            units.sort(key=lambda expansions: sum(len(self.postings[t]) for t, _ in expansions))
+            scores: Optional[Dict[str, float]] = None
+
+            for expansions in units:
+                term_scores: Dict[str, float] = {}
+                for index_term, factor in expansions:
+                    postings = self.postings[index_term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if scores is None:
+                        candidates = postings.items()
+                    else:
+                        candidates = ((job_hash, postings[job_hash]) for job_hash in scores if job_hash in postings)
+                    for job_hash, tf in candidates:
+                        length = self.docs[job_hash]['length']
+                        norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+                        term_scores[job_hash] = term_scores.get(job_hash, 0.0) + factor * idf * norm
+                if scores is not None:
+                    term_scores = {job_hash: scores[job_hash] + score for job_hash, score in term_scores.items()}
+                scores = term_scores
+                if not scores:
+                    return []
+
+            if filters:
+                scores = {
+                    job_hash: score for job_hash, score in scores.items()
+                    if all(self.docs[job_hash]['filters'].get(k) == v for k, v in filters.items())
+                }
+        return sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+
+    def highlights(self, job_hash: str, query: str) -> Dict[str, List[List[int]]]:
+        """各字段中检索词的命中区间 {field: [[start, end], ...]}（按原文字符位置）"""
+        doc = self.docs.get(job_hash)
+        if doc is None:
+            return {}
+        needles = [text for text, _, _ in parse_query(query)]
+        result = {}
+        for field, text in doc['fields'].items():
+            haystack = normalize(text)
+            if len(haystack) != len(text):
+                # 归一化改变了长度时退回只转小写，保证位置与原文一致
+                haystack = text.lower()
+            spans = []
+            for needle in needles:
+                start = haystack.find(needle)
+                while start != -1 and len(spans) < MAX_HIGHLIGHTS_PER_FIELD * len(needles):
+                    spans.append([start, start + len(needle)])
+                    start = haystack.find(needle, start + len(needle))
+            if spans:
+                spans.sort()
+                merged = [spans[0]]
+                for span in spans[1:]:
+                    if span[0] <= merged[-1][1]:
+                        merged[-1][1] = max(merged[-1][1], span[1])
+                    else:
+                        merged.append(span)
+                result[field] = merged[:MAX_HIGHLIGHTS_PER_FIELD]
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'documents': len(self.docs),
+            'terms': len(self.postings),
+            'synced_at': self.synced_at
+        }
@@ -0,0 +1,84 @@
+"""统计快照缓存：导入完成后刷新，统计接口直接返回已计算好的快照"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import logging
+import pytz
+
+from services.db import DEFAULT_TREND_DAYS, MAX_TREND_DAYS
+
+logger = logging.getLogger(__name__)
+
+# 北京时区
+BEIJING_TZ = pytz.timezone('Asia/Shanghai')
+
+
+class StatsCache:
+    """按趋势窗口缓存统计快照
+
+    快照在以下情况重新计算：导入完成后主动刷新、超过TTL（兜底其他进程写入的数据）、
+    北京时间跨过零点（今日/本周/趋势窗口随日期变化）。
+    导入后只主动刷新 windows 中的常用窗口，其他窗口的快照随之失效、下次请求时再计算；
+    缓存的窗口数不超过 max_windows，超出时淘汰最久未使用的窗口（?days= 可任意取值，避免缓存无限增长）。
+    """
+
+    def __init__(self, db_service, ttl: int = 600, windows: Iterable[int] = (DEFAULT_TREND_DAYS,),
+                 max_windows: int = 16):
+        self.db = db_service
+        self.ttl = ttl
+        self.windows = {max(1, min(int(days), MAX_TREND_DAYS)) for days in windows} | {DEFAULT_TREND_DAYS}
+        self.max_windows = max(max_windows, len(self.windows))
+        self._snapshots: "OrderedDict[int, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(BEIJING_TZ).strftime('%Y-%m-%d')
+
+    def _is_fresh(self, snapshot: Optional[Dict]) -> bool:
+        return (snapshot is not None
+                and time.monotonic() < snapshot['expires_at']
+                and snapshot['date'] == self._today())
+
+    def _compute(self, days: int) -> Dict:
+        """计算并保存一个统计快照"""
+        date = self._today()
+        snapshot = {
+            'data': self.db.get_stats(days=days),
+            'date': date,
+            'computed_at': datetime.now(BEIJING_TZ),
+            'expires_at': time.monotonic() + self.ttl
+        }
+        self._snapshots[days] = snapshot
+        self._snapshots.move_to_end(days)
+        while len(self._snapshots) > self.max_windows:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    def get(self, days: int = DEFAULT_TREND_DAYS) -> Dict:
+        """获取统计快照 {'data', 'date', 'computed_at'}，过期时重新计算"""
+        days = max(1, min(int(days), MAX_TREND_DAYS))
+        with self._lock:
+            # 命中时更新最近使用顺序；并发请求同一窗口只计算一次
+            snapshot = self._snapshots.get(days)
+            if self._is_fresh(snapshot):
+                self._snapshots.move_to_end(days)
+                return snapshot
+            return self._compute(days)
+
+    def clear(self) -> None:
+        """丢弃全部快照（其他进程写入数据后调用），下次请求时重新计算"""
+        with self._lock:
+            self._snapshots.clear()
+
+    def refresh(self) -> None:
+        """数据变化后刷新常用趋势窗口，其他窗口的快照丢弃，下次请求时再计算"""
+        with self._lock:
+            for days in list(self._snapshots):
+                if days not in self.windows:
+                    del self._snapshots[days]
+            for days in sorted(self.windows):
+                self._compute(days)
+        logger.info(f"统计快照已刷新（趋势窗口: {sorted(self.windows)}）")
@@ -0,0 +1,297 @@
+"""同步协调器：所有同步（定时任务、手动触发）经由此处单飞执行
+
+- 进程内由线程锁保证同一时间只有一个同步；
+- 跨进程/多个 gunicorn worker 由 meta 集合中的租约互斥，执行期间定期续期，进程崩溃后租约过期自动释放；
+- 同步进行中再次触发时不启动新的爬虫，而是合并到当前同步（记入其运行记录）；
+- 每次同步的状态、进度与结果持久化在 sync_logs 集合中（运行历史）；
+- 同步各阶段以结构化事件汇报进度（带时间戳与耗时），events() 供 SSE 接口实时推送。
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import logging
+import pytz
+from bson.objectid import ObjectId
+
+logger = logging.getLogger(__name__)
+
+# 北京时区
+BEIJING_TZ = pytz.timezone('Asia/Shanghai')
+
+# 事件流等待新事件的最长时间（秒），超时后产出 None 供调用方发送保活
+EVENT_KEEPALIVE = 15
+# 跟随其他进程执行的同步时轮询运行记录的间隔（秒）
+EVENT_POLL_INTERVAL = 1.0
+
+
+class SyncRun:
+    """一次正在执行的同步，交给同步任务用于汇报进度事件"""
+
+    def __init__(self, coordinator: 'SyncCoordinator', run_id: ObjectId, run_type: str,
+                 tasks: Optional[List[str]] = None):
+        self.coordinator = coordinator
+        self.id = run_id
+        self.type = run_type
+        # 本次整理的类型（sheet_name），None 表示全部
+        self.tasks = tasks
+        self.started_at = datetime.now(BEIJING_TZ)
+        self._start = time.monotonic()
+        self.progress = 0
+        self.message = '同步已启动'
+        self.events: List[Dict] = []
+        self.done = False
+        # 事件来自爬虫事件循环线程与导入线程：分配事件ID与写入运行记录在同一把锁内完成，
+        # 保证运行记录中的事件按ID顺序追加（其他进程的订阅方按ID续读，乱序会漏掉事件）
+        self._emit_lock = threading.Lock()
+
+    def emit(self, event: str, progress: Optional[int] = None, message: Optional[str] = None,
+             **data: Any) -> Dict:
+        """记录一条进度事件并唤醒事件流订阅方
+
+        事件 {'id', 'run_id', 'event', 'time', 'elapsed', 'progress', 'message', ...data}，
+        id 在本次同步内从1递增（即SSE的事件ID），elapsed 为距同步开始的秒数。
+        """
+        with self._emit_lock:
+            with self.coordinator._changed:
+                if progress is not None:
+                    self.progress = progress
+                if message is not None:
+                    self.message = message
+                record = {
+                    'id': len(self.events) + 1,
+                    'run_id': str(self.id),
+                    'event': event,
+                    'time': datetime.now(BEIJING_TZ),
+                    'elapsed': round(time.monotonic() - self._start, 3),
+                    'progress': self.progress,
+                    'message': self.message,
+                    **data
+                }
+                self.events.append(record)
+                self.coordinator._changed.notify_all()
+            try:
+                self.coordinator.db.append_sync_event(self.id, record, {'progress': self.progress, 'message': self.message})
+            except Exception as e:
+                logger.warning(f"记录同步事件失败: {e}")
+        return record
+
+
+class SyncCoordinator:
+    """单飞执行同步任务 job(run) -> 导入结果"""
+
+    def __init__(self, db_service, job: Callable[[SyncRun], Dict], lease_ttl: int = 120,
+                 all_tasks: Optional[List[str]] = None,
+                 on_uncovered: Optional[Callable[[List[str]], None]] = None):
+        self.db = db_service
+        self.job = job
+        self.lease_ttl = lease_ttl
+        # 全部类型（请求未指定 tasks 时即请求全部类型），用于判断合并时正在执行的同步是否覆盖所请求的类型
+        self.all_tasks = list(all_tasks) if all_tasks is not None else None
+        # 合并时未覆盖的类型交给 on_uncovered(类型列表)，例如由调度器安排在当前同步结束后整理
+        self.on_uncovered = on_uncovered
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._lock = threading.Lock()
+        # 新事件或同步结束时通知事件流
+        self._changed = threading.Condition()
+        self._current: Optional[SyncRun] = None
+
+    def submit(self, run_type: str, tasks: Optional[List[str]] = None) -> Dict:
+        """请求一次同步，返回 {'run_id', 'coalesced', 'uncovered'}；已有同步在执行时合并到该同步
+
+        tasks 为要整理的类型（默认全部）。合并到只整理部分类型的同步时，未覆盖的类型记入 uncovered
+        并交给 on_uncovered 安排后续整理。
+        """
+        with self._lock:
+            if self._current is not None:
+                return self._coalesce(self._current.id, run_type, tasks, self._current.tasks)
+
+            run_id = ObjectId()
+            if not self.db.acquire_sync_lease(self.owner, run_id, self.lease_ttl):
+                lease = self.db.get_sync_lease()
+                running = self.db.get_sync_run(lease['run_id']) if lease else None
+                return self._coalesce(lease['run_id'] if lease else None, run_type, tasks,
+                                      running.get('tasks') if running else None)
+
+            self.db.start_sync_run(run_id, run_type, self.owner, tasks=tasks)
+            run = SyncRun(self, run_id, run_type, tasks=tasks)
+            self._current = run
+
+        threading.Thread(target=self._execute, args=(run,), name=f'sync-{run_type}', daemon=True).start()
+        logger.info(f"[{run_type}] 同步 {run_id} 已启动")
+        return {'run_id': str(run_id), 'coalesced': False, 'uncovered': []}
+
+    def _uncovered(self, requested: Optional[List[str]], running: Optional[List[str]]) -> List[str]:
+        """请求的类型中正在执行的同步未整理的部分（running 为None表示正在整理全部类型）"""
+        if running is None:
+            return []
+        wanted = requested if requested is not None else (self.all_tasks or [])
+        return [task for task in wanted if task not in running]
+
+    def _coalesce(self, run_id: Optional[ObjectId], run_type: str,
+                  requested: Optional[List[str]], running: Optional[List[str]]) -> Dict:
+        if run_id is not None:
+            self.db.coalesce_sync_run(run_id, run_type)
+        uncovered = self._uncovered(requested, running) if run_id is not None else []
+        if uncovered:
+            logger.info(f"[{run_type}] 已有同步 {run_id} 正在执行，请求已合并；未覆盖的类型: {', '.join(uncovered)}")
+            if self.on_uncovered is not None:
+                try:
+                    self.on_uncovered(uncovered)
+                except Exception as e:
+                    logger.warning(f"安排未覆盖类型的整理失败: {e}")
+        else:
+            logger.info(f"[{run_type}] 已有同步 {run_id} 正在执行，请求已合并")
+        return {'run_id': str(run_id) if run_id else None, 'coalesced': True, 'uncovered': uncovered}
+
+    def _heartbeat(self, stop: threading.Event) -> None:
+        """执行期间每 lease_ttl/3 秒续期租约"""
+        while not stop.wait(self.lease_ttl / 3):
+            if not self.db.renew_sync_lease(self.owner, self.lease_ttl):
+                logger.warning("同步租约已失效（可能被其他进程接管）")
+
+    def emit(self, event: str, **kwargs: Any) -> None:
+        """向本进程正在执行的同步汇报事件（没有时忽略），供导入回调等不持有 SyncRun 的代码使用"""
+        run = self._current
+        if run is not None:
+            run.emit(event, **kwargs)
+
+    def _execute(self, run: SyncRun) -> None:
+        stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(stop,), name='sync-lease', daemon=True).start()
+        start = time.monotonic()
+        run.emit('started', progress=5, message='同步已启动', type=run.type, tasks=run.tasks)
+        try:
+            result = self.job(run)
+            new_count = result.get('imported', 0)
+            duration = time.monotonic() - start
+            # 部分类型整理失败时状态为 partial，其余类型的结果已导入
+            failed_tasks = result.get('failed_tasks') or []
+            status = 'partial' if failed_tasks else 'success'
+            message = f"同步部分完成，整理失败的类型: {', '.join(failed_tasks)}" if failed_tasks else '同步完成！'
+            # 先写入结束事件再更新状态：跟随运行记录的事件流看到状态变化时已能读到结束事件
+            run.emit('finished', progress=100, message=message, status=status,
+                     new_count=new_count, failed_tasks=failed_tasks, duration=round(duration, 3))
+            self.db.update_sync_run(run.id, {
+                'status': status,
+                'new_count': new_count,
+                'task_results': result.get('task_results'),
+                'total_count': self.db.count_active_items(),
+                'duration': duration,
+                'finished_at': datetime.now(BEIJING_TZ)
+            })
+            logger.info(f"[{run.type}] 同步{'部分完成' if failed_tasks else '成功'}：{result.get('message')}")
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"[{run.type}] 同步失败: {error_msg}", exc_info=True)
+            duration = time.monotonic() - start
+            run.emit('finished', progress=0, message=f'同步失败: {error_msg}', status='failed',
+                     error=error_msg, duration=round(duration, 3))
+            self.db.update_sync_run(run.id, {
+                'status': 'failed',
+                'total_count': self.db.count_active_items(),
+                'duration': duration,
+                'finished_at': datetime.now(BEIJING_TZ),
+                'error_message': error_msg
+            })
+        finally:
+            stop.set()
+            with self._changed:
+                run.done = True
+                self._changed.notify_all()
+            with self._lock:
+                self._current = None
+                self.db.release_sync_lease(self.owner)
+
+    # ===== 事件流 =====
+
+    def events(self, run_id: Optional[str] = None, after: int = 0,
+               keepalive: float = EVENT_KEEPALIVE) -> Iterator[Optional[Dict]]:
+        """按顺序产出 id 大于 after 的同步事件，同步结束后停止；等待超过 keepalive 秒时产出 None
+
+        run_id 为空时跟随当前同步（本进程或其他进程正在执行的），没有正在执行的同步时立即结束；
+        指定的同步已结束时只回放其已记录的事件。
+        """
+        run = self._current
+        if run is not None and (run_id is None or run_id == str(run.id)):
+            yield from self._local_events(run, after, keepalive)
+            return
+        yield from self._stored_events(ObjectId(run_id) if run_id else None, after, keepalive)
+
+    def _local_events(self, run: SyncRun, after: int, keepalive: float) -> Iterator[Optional[Dict]]:
+        """本进程执行的同步：等待条件变量，事件产生后立即推送"""
+        while True:
+            with self._changed:
+                if len(run.events) <= after and not run.done:
+                    self._changed.wait(keepalive)
+                pending = run.events[after:]
+                done = run.done
+            if pending:
+                yield from pending
+                after += len(pending)
+            elif not done:
+                yield None
+            if done and after >= len(run.events):
+                return
+
+    def _is_running(self, doc: Dict) -> bool:
+        """运行记录是否仍在执行（执行进程退出后租约过期，视为已结束）"""
+        if doc.get('status') != 'running':
+            return False
+        lease = self.db.get_sync_lease()
+        return lease is not None and lease.get('run_id') == doc['_id']
+
+    def _stored_events(self, run_id: Optional[ObjectId], after: int,
+                       keepalive: float) -> Iterator[Optional[Dict]]:
+        """其他进程执行的同步：轮询运行记录中持久化的事件"""
+        if run_id is None:
+            logs = self.db.get_latest_sync_logs(limit=1)
+            if not logs or not self._is_running(logs[0]):
+                return
+            run_id = logs[0]['_id']
+
+        idle = 0.0
+        while True:
+            doc = self.db.get_sync_run(run_id)
+            if doc is None:
+                return
+            pending = [event for event in doc.get('events', []) if event['id'] > after]
+            for event in pending:
+                yield event
+                after = event['id']
+            if not self._is_running(doc):
+                return
+            idle = 0.0 if pending else idle + EVENT_POLL_INTERVAL
+            if idle >= keepalive:
+                yield None
+                idle = 0.0
+            time.sleep(EVENT_POLL_INTERVAL)
+
+    def status(self) -> Dict:
+        """当前同步状态：本进程正在执行的同步，否则为最近一次同步（可能由其他进程执行）"""
+        current = self._current
+        if current is not None:
+            return {
+                'running': True,
+                'run_id': str(current.id),
+                'type': current.type,
+                'progress': current.progress,
+                'message': current.message,
+                'started_at': current.started_at
+            }
+
+        logs = self.db.get_latest_sync_logs(limit=1)
+        if not logs:
+            return {'running': False, 'run_id': None, 'type': None, 'progress': 0, 'message': '', 'started_at': None}
+        latest = logs[0]
+        return {
+            'running': self._is_running(latest),
+            'run_id': str(latest['_id']),
+            'type': latest.get('type'),
+            'progress': latest.get('progress', 100 if latest.get('status') in ('success', 'partial') else 0),
+            'message': latest.get('message', ''),
+            'started_at': latest.get('sync_time')
+        }
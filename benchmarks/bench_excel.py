@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Excel导出基准测试：对比 pandas 写出 + openpyxl 重新加载高亮 与 只写模式单遍写出
+
+用法：python benchmarks/bench_excel.py [行数 ...]   （默认 10000 50000）
+"""
+import importlib.util
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import PatternFill
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_crawler():
+    """按路径加载爬虫脚本 1.py"""
+    spec = importlib.util.spec_from_file_location('bytedance_job_monitor', ROOT / '1.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_frame(count: int) -> pd.DataFrame:
+    """生成模拟清单，其中5%为新条目"""
+    return pd.DataFrame({
+        '采摘时间': ['2024-01-01 00:00:00'] * count,
+        'code': [f'A{i:07d}' for i in range(count)],
+        'title': [f'后端开发工程师-{i}' for i in range(count)],
+        'description': ['负责核心业务系统的设计与开发。' * 8] * count,
+        'requirement': ['熟悉至少一门编程语言，具备良好的沟通能力。' * 4] * count,
+        'publish_time': ['2024-01-01 10:00:00'] * count,
+        'city_list': ['北京'] * count,
+        'is_new': [i % 20 == 0 for i in range(count)],
+        'job_hash': [f'{i:032x}' for i in range(count)],
+    })
+
+
+def legacy_export(path: Path, data_frames) -> None:
+    """旧实现：pandas 写出后重新加载工作簿，逐格设置高亮再保存"""
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet_name, df in data_frames.items():
+            df.drop(columns=['is_new', 'job_hash']).to_excel(writer, sheet_name=sheet_name, index=False)
+    workbook = openpyxl.load_workbook(path)
+    highlight_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    for sheet_name, df in data_frames.items():
+        worksheet = workbook[sheet_name]
+        for row_idx, is_new in enumerate(df['is_new'], start=2):
+            if is_new:
+                for col_idx in range(1, worksheet.max_column + 1):
+                    worksheet.cell(row=row_idx, column=col_idx).fill = highlight_fill
+    workbook.save(path)
+
+
+def measure(func, *args):
+    """返回 (耗时秒, 峰值内存MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1024 / 1024
+
+
+def run(count: int, crawler) -> None:
+    data_frames = {'intern': make_frame(count)}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_seconds, legacy_peak = measure(legacy_export, Path(tmp) / 'legacy.xlsx', data_frames)
+        monitor = crawler.JobMonitor(tasks=[], filename=Path(tmp) / 'streaming.xlsx')
+        streaming_seconds, streaming_peak = measure(monitor._export_excel, data_frames)
+
+    print(f"{count:>8} 行  旧实现 {legacy_seconds:7.2f}s {legacy_peak:8.1f}MB  "
+          f"新实现 {streaming_seconds:7.2f}s {streaming_peak:8.1f}MB")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    crawler_module = load_crawler()
+    for size in sizes:
+        run(size, crawler_module)
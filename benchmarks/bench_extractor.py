@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+条目整理微基准：对比原先的字典字面量整理方式与编译后的字段提取器（JobRecord）
+
+用法：python benchmarks/bench_extractor.py [条目数]   （默认 10000）
+"""
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pytz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_schema import compile_extractor
+
+BEIJING_TZ = pytz.timezone('Asia/Shanghai')
+EXTRA_FIELDS = ('location', 'department')
+REPEAT = 5
+
+
+def make_postings(count: int):
+    """生成模拟的职位接口数据"""
+    rng = random.Random(42)
+    cities = [{'name': '北京', 'code': 'CT_11'}, {'name': '上海', 'code': 'CT_125'}, {'name': '深圳', 'code': 'CT_128'}]
+    return [
+        {
+            'id': str(7000000000000000000 + i),
+            'title': f'后端开发工程师-{i}',
+            'sub_title': '',
+            'description': '负责核心业务系统的设计与开发。' * 8,
+            'requirement': '熟悉至少一门编程语言。' * 4,
+            'publish_time': 1700000000000 + i * 1000,
+            'code': f'A{i:07d}',
+            'job_type': None,
+            'job_category': {'id': '1', 'name': '研发'},
+            'job_function': None,
+            'recruit_type': {'name': '实习', 'parent': {'name': '校招'}},
+            'job_subject': {'name': {'zh_cn': '暑期实习', 'en_us': 'Summer'}},
+            'city_list': rng.sample(cities, 2),
+            'min_salary': 0,
+            'max_salary': 0,
+            'head_count': rng.randint(1, 5),
+            'pc_job_url': f'https://jobs.bytedance.com/position/{i}',
+            'location': {'name': '北京'},
+            'department': {'name': '技术'},
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_normalize(job, extra_fields=EXTRA_FIELDS):
+    """原实现：40行字典字面量 + 二次字典清理空值"""
+    publish_time = datetime.fromtimestamp(job["publish_time"] / 1000, tz=BEIJING_TZ)
+    job_info = {
+        "title": job.get("title"),
+        "sub_title": job.get("sub_title"),
+        "description": job.get("description"),
+        "requirement": job.get("requirement"),
+        "publish_time": publish_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "code": job.get("code"),
+        "job_id": job.get("id"),
+        "job_type": job.get("job_type"),
+        "job_category": job.get("job_category", {}).get("name") if isinstance(job.get("job_category"), dict) else job.get("job_category"),
+        "job_function": job.get("job_function", {}).get("name") if isinstance(job.get("job_function"), dict) else job.get("job_function"),
+        "department_id": job.get("department_id"),
+        "job_process_id": job.get("job_process_id"),
+        "recruit_type_name": job.get("recruit_type", {}).get("name") if isinstance(job.get("recruit_type"), dict) else None,
+        "recruit_type_parent": job.get("recruit_type", {}).get("parent", {}).get("name") if isinstance(job.get("recruit_type"), dict) and job.get("recruit_type", {}).get("parent") else None,
+        "job_subject_name": job.get("job_subject", {}).get("name", {}).get("zh_cn") if isinstance(job.get("job_subject"), dict) and isinstance(job.get("job_subject", {}).get("name"), dict) else job.get("job_subject", {}).get("name") if isinstance(job.get("job_subject"), dict) else None,
+        "city_list": ", ".join([city.get("name", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
+        "city_codes": ", ".join([city.get("code", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
+        "address": job.get("address"),
+        "degree": job.get("degree"),
+        "experience": job.get("experience"),
+        "min_salary": job.get("min_salary"),
+        "max_salary": job.get("max_salary"),
+        "currency": job.get("currency"),
+        "head_count": job.get("head_count"),
+        "job_hot_flag": job.get("job_hot_flag"),
+        "is_urgent": job.get("is_urgent"),
+        "job_active_status": job.get("job_active_status"),
+        "recommend_id": job.get("recommend_id"),
+        "team_name": job.get("team_name"),
+        "brand_name": job.get("brand_name"),
+        "ats_online_apply": job.get("ats_online_apply"),
+        "pc_job_url": job.get("pc_job_url"),
+        "wap_job_url": job.get("wap_job_url"),
+        "storefront_mode": job.get("storefront_mode"),
+        "process_type": job.get("process_type"),
+    }
+
+    for field in extra_fields:
+        value = job.get(field)
+        job_info[field] = value.get('name') if isinstance(value, dict) else value
+    return {k: v for k, v in job_info.items() if v is not None and v != ''}
+
+
+def measure(label: str, func, postings):
+    # 取多轮中的最短耗时，降低噪声
+    elapsed = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        results = [func(job) for job in postings]
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    results = [func(job) for job in postings]
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+
+    per_record_us = elapsed / len(postings) * 1e6
+    print(f"{label:<10} 每条 {per_record_us:6.2f}µs  保留内存 {current / 1024 / 1024:6.2f}MB  "
+          f"峰值 {peak / 1024 / 1024:6.2f}MB  存活分配块 {blocks}")
+    return results
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    postings = make_postings(count)
+    extract = compile_extractor(EXTRA_FIELDS)
+
+    legacy = measure('字典字面量', legacy_normalize, postings)
+    compiled = measure('编译提取器', extract, postings)
+
+    # 结果一致性校验
+    assert all(old == new.to_dict() for old, new in zip(legacy, compiled)), '整理结果不一致'
+    print(f"{count} 条整理结果一致")
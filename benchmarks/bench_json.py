@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+响应序列化基准测试：100条完整条目的列表页，对比 Flask 默认JSON与 orjson 的序列化耗时，
+以及原文 / gzip / brotli 的传输字节数
+
+用法：python benchmarks/bench_json.py [条目数]   （默认 100）
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bson.objectid import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'backend'))
+
+from services.response import OrjsonProvider, brotli, compress_body  # noqa: E402
+
+REPEAT = 200
+
+
+def make_page(count: int):
+    """生成模拟的列表页数据（与数据库读出的文档结构一致）"""
+    now = datetime(2024, 1, 1, 8, 0, 0)
+    items = [
+        {
+            '_id': ObjectId(),
+            'job_hash': f'{i:032x}',
+            'sheet_name': 'intern',
+            'type_name': '新丝瓜',
+            'title': f'后端开发工程师-{i}',
+            'sub_title': '字节跳动',
+            'description': '负责核心业务系统的设计与开发，参与高并发服务的架构优化。' * 6,
+            'requirement': '熟悉至少一门编程语言，具备良好的沟通能力和团队协作精神。' * 4,
+            'publish_time': now - timedelta(days=i),
+            '采摘时间': now,
+            'code': f'A{i:07d}',
+            'job_id': str(7000000000000000000 + i),
+            'job_category': '研发',
+            'city_list': '北京, 上海, 深圳',
+            'is_new': i % 10 == 0,
+            'is_viewed': False,
+            'is_active': True,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for i in range(count)
+    ]
+    return {'success': True, 'data': {'items': items, 'limit': count, 'next_cursor': None, 'prev_cursor': None}}
+
+
+def legacy_prepare(page):
+    """旧实现：序列化前逐条把 _id 转为字符串"""
+    for item in page['data']['items']:
+        item['_id'] = str(item['_id'])
+    return page
+
+
+def measure(dumps, payload) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        dumps(payload)
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main(count: int) -> None:
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    orjson_provider = OrjsonProvider(app)
+
+    legacy_page = legacy_prepare(make_page(count))
+    page = make_page(count)
+
+    legacy_seconds = measure(default_provider.dumps, legacy_page)
+    orjson_seconds = measure(orjson_provider.dumps, page)
+    print(f"{count} 条  序列化: 默认JSON {legacy_seconds * 1000:.2f}ms  orjson {orjson_seconds * 1000:.2f}ms  "
+          f"加速 {legacy_seconds / orjson_seconds:.1f}x")
+
+    legacy_body = default_provider.dumps(legacy_page).encode('utf-8')
+    body = orjson_provider.dumps(page).encode('utf-8')
+    sizes = [f"默认JSON原文 {len(legacy_body)}B", f"orjson原文 {len(body)}B",
+             f"gzip {len(compress_body(body, 'gzip'))}B"]
+    if brotli is not None:
+        sizes.append(f"brotli {len(compress_body(body, 'br'))}B")
+    print("传输字节: " + "  ".join(sizes))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
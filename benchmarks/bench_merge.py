@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+合并阶段基准测试：对比逐行哈希（apply/iterrows）与列式哈希 + map 恢复采摘时间
+
+用法：python benchmarks/bench_merge.py [行数 ...]   （默认 10000 100000）
+"""
+import hashlib
+import importlib.util
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_crawler():
+    """按路径加载爬虫脚本 1.py"""
+    spec = importlib.util.spec_from_file_location('bytedance_job_monitor', ROOT / '1.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_jobs(count: int, offset: int = 0):
+    """生成模拟的已整理职位条目"""
+    return [
+        {
+            'code': f'A{i:07d}',
+            'title': f'后端开发工程师-{i}',
+            'description': '负责核心业务系统的设计与开发。' * 8,
+            'requirement': '熟悉至少一门编程语言，具备良好的沟通能力。' * 4,
+            'publish_time': '2024-01-01 10:00:00',
+            'city_list': '北京',
+            'job_id': str(7000000000000000000 + i),
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+def legacy_hash(job):
+    key_fields = ['code', 'title', 'description', 'requirement']
+    return hashlib.md5(''.join(str(job.get(f, '')) for f in key_fields).encode('utf-8')).hexdigest()
+
+
+def legacy_merge(existing_df: pd.DataFrame, new_jobs):
+    """旧实现：加载时 iterrows 哈希，合并时 apply(axis=1) 再哈希，iterrows 恢复采摘时间"""
+    previous_hashes = {legacy_hash(row.to_dict()) for _, row in existing_df.iterrows()}
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for job in new_jobs:
+        job_hash = legacy_hash(job)
+        job['is_new'] = job_hash not in previous_hashes
+        job['job_hash'] = job_hash
+        job['采摘时间'] = current_time if job['is_new'] else None
+    new_df = pd.DataFrame(new_jobs)
+    existing_df = existing_df.copy()
+    existing_df['job_hash'] = existing_df.apply(lambda row: legacy_hash(row.to_dict()), axis=1)
+    old_hash_to_time = dict(zip(existing_df['job_hash'], existing_df['采摘时间']))
+    for idx, row in new_df.iterrows():
+        if not row['is_new'] and row['job_hash'] in old_hash_to_time:
+            new_df.at[idx, '采摘时间'] = old_hash_to_time[row['job_hash']]
+    combined = pd.concat([existing_df, new_df], ignore_index=True)
+    return combined.drop_duplicates(subset=['job_hash'], keep='last').drop(columns=['job_hash'])
+
+
+def vectorized_merge(crawler, existing_df: pd.DataFrame, new_jobs):
+    """新实现：存档中复用job_hash，列式哈希 + 按职位稳定标识 map 恢复采摘时间"""
+    monitor = crawler.JobMonitor(tasks=[], filename=Path('/dev/null'))
+    existing_df = existing_df.copy()
+    existing_df['job_hash'] = monitor._hash_dataframe(existing_df)
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    final_df, _ = monitor._merge_sheet('intern', '实习招聘', new_jobs, {'intern': existing_df}, current_time)
+    return final_df
+
+
+def run(count: int, crawler) -> None:
+    # 5% 条目为新增，其余为已存在的条目
+    existing = pd.DataFrame(make_jobs(count))
+    existing['is_new'] = False
+    existing['采摘时间'] = '2024-01-01 00:00:00'
+    churn = count // 20
+
+    start = time.perf_counter()
+    legacy_merge(existing, make_jobs(count - churn, offset=churn) + make_jobs(churn, offset=count))
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized_merge(crawler, existing, make_jobs(count - churn, offset=churn) + make_jobs(churn, offset=count))
+    vectorized_seconds = time.perf_counter() - start
+
+    print(f"{count:>8} 行  旧实现 {legacy_seconds:8.2f}s  新实现 {vectorized_seconds:8.2f}s  "
+          f"加速 {legacy_seconds / vectorized_seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    crawler_module = load_crawler()
+    for size in sizes:
+        run(size, crawler_module)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+本地检索索引基准测试：模拟岗位语料上的建索引耗时、磁盘加载耗时与单次检索延迟
+
+用法：python benchmarks/bench_search.py [条目数]   （默认 5000）
+"""
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'backend'))
+
+from services.search_index import SearchIndex  # noqa: E402
+
+QUERIES = ['后端', '后端开发', '算法工程师', 'java', 'py', '推荐 系统', '数据 分析 sql', '产品经理']
+REPEAT = 50
+
+TITLES = ['后端开发工程师', '前端开发工程师', '算法工程师', '数据分析师', '产品经理', '测试开发工程师', '客户端开发工程师']
+PHRASES = ['负责推荐系统的设计与开发', '参与高并发服务的架构优化', '熟悉 Java / Go / Python 至少一门语言',
+           '具备良好的沟通能力', '熟悉 SQL 与数据仓库', '有大规模分布式系统经验优先', '理解机器学习基础算法']
+
+
+def make_docs(count: int):
+    rng = random.Random(42)
+    now = datetime(2024, 1, 1, 8, 0, 0)
+    return [
+        {
+            'job_hash': f'{i:032x}',
+            'title': f'{rng.choice(TITLES)}-{rng.choice(["抖音", "飞书", "火山引擎", "电商"])}',
+            'description': '，'.join(rng.sample(PHRASES, 4)),
+            'requirement': '，'.join(rng.sample(PHRASES, 3)),
+            'sheet_name': rng.choice(['intern', 'campus', 'experienced']),
+            'is_new': i % 10 == 0,
+            'updated_at': now,
+        }
+        for i in range(count)
+    ]
+
+
+def main(count: int) -> None:
+    docs = make_docs(count)
+    path = Path(tempfile.mkdtemp()) / 'search_index.pkl'
+
+    index = SearchIndex(path)
+    start = time.perf_counter()
+    index.upsert(docs)
+    build_seconds = time.perf_counter() - start
+    index.save()
+    print(f"{count} 条  建索引 {build_seconds * 1000:.1f}ms  词数 {len(index.postings)}  "
+          f"索引文件 {path.stat().st_size / 1024:.0f}KB")
+
+    start = time.perf_counter()
+    SearchIndex(path).load()
+    print(f"磁盘加载 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            ranked = index.search(query)
+            for job_hash, _ in ranked[:20]:
+                index.highlights(job_hash, query)
+        seconds = (time.perf_counter() - start) / REPEAT
+        print(f"  {query:<12} 命中 {len(ranked):>5}  检索+首页高亮 {seconds * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+统计接口基准测试：对比逐项 count_documents 与按类型、按日两次索引聚合的数据库往返次数
+
+用法：
+  python benchmarks/bench_stats.py                      模拟集合，只统计往返次数
+  python benchmarks/bench_stats.py mongodb://localhost  连接本地 mongod（写入临时库），统计往返次数与耗时
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+from pymongo import MongoClient, monitoring
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'backend'))
+
+from services.db import BEIJING_TZ, DatabaseService  # noqa: E402
+
+BENCH_DB_NAME = 'bench_stats'
+
+
+def legacy_get_stats(items) -> dict:
+    """旧实现：总数、今日、本周、3个类型、7天趋势各一次 count_documents"""
+    total = items.count_documents({})
+    today_start = datetime.now(BEIJING_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    today_new = items.count_documents({'采摘时间': {'$gte': today_start}})
+    week_start = today_start - timedelta(days=today_start.weekday())
+    week_new = items.count_documents({'采摘时间': {'$gte': week_start}})
+    type_distribution = {
+        sheet_name: items.count_documents({'sheet_name': sheet_name})
+        for sheet_name in ['intern', 'campus', 'experienced']
+    }
+    daily_trend = []
+    for i in range(6, -1, -1):
+        day_start = today_start - timedelta(days=i)
+        count = items.count_documents({'采摘时间': {'$gte': day_start, '$lt': day_start + timedelta(days=1)}})
+        daily_trend.append({'date': day_start.strftime('%m-%d'), 'count': count})
+    return {'total': total, 'today_new': today_new, 'week_new': week_new,
+            'type_distribution': type_distribution, 'daily_trend': daily_trend}
+
+
+class CommandCounter(monitoring.CommandListener):
+    """统计发往服务器的命令数（即往返次数）"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def run_mock() -> None:
+    """模拟集合：每次 count_documents / aggregate 调用计为一次往返"""
+    items = mock.MagicMock()
+    items.count_documents.return_value = 0
+    items.aggregate.side_effect = lambda pipeline, **kwargs: iter([])
+    service = DatabaseService.__new__(DatabaseService)
+    service.items = items
+
+    legacy_get_stats(items)
+    legacy_calls = items.count_documents.call_count
+    print(f"旧实现（7天趋势）: {legacy_calls} 次往返")
+
+    for days in (7, 30, 90):
+        items.reset_mock()
+        service.get_stats(days=days)
+        calls = items.count_documents.call_count + items.aggregate.call_count
+        print(f"新实现（{days}天趋势）: {calls} 次往返")
+
+
+def run_mongod(uri: str, count: int = 20000, repeat: int = 20) -> None:
+    """本地 mongod：写入模拟数据后统计命令数与平均耗时"""
+    counter = CommandCounter()
+    client = MongoClient(uri, event_listeners=[counter])
+    db = client[BENCH_DB_NAME]
+    db.sponge_items.drop()
+    now = datetime.now(BEIJING_TZ)
+    db.sponge_items.insert_many([
+        {
+            'job_hash': f'{i:032x}',
+            'sheet_name': ('intern', 'campus', 'experienced')[i % 3],
+            '采摘时间': now - timedelta(hours=i % (24 * 90)),
+        }
+        for i in range(count)
+    ])
+    service = DatabaseService.__new__(DatabaseService)
+    service.items = db.sponge_items
+
+    for name, func in (('旧实现', lambda: legacy_get_stats(db.sponge_items)),
+                       ('新实现', lambda: service.get_stats(days=7))):
+        counter.count = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{name}: 每次 {counter.count // repeat} 次往返，平均 {elapsed * 1000:.1f}ms")
+
+    client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run_mongod(sys.argv[1])
+    else:
+        run_mock()
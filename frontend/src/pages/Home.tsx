@@ -8,7 +8,6 @@ import {
   Input,
   Row,
   Col,
-  Pagination,
   Empty,
   Spin,
   Button,
@@ -16,13 +15,13 @@ import {
   message,
   Progress,
 } from 'antd';
-import { SearchOutlined, SyncOutlined, BarChartOutlined } from '@ant-design/icons';
+import { SearchOutlined, SyncOutlined, BarChartOutlined, LeftOutlined, RightOutlined } from '@ant-design/icons';
 import { motion, AnimatePresence } from 'framer-motion';
 import ItemCard from '../components/ItemCard';
 import ItemDetail from '../components/ItemDetail';
 import Dashboard from '../components/Dashboard';
 import PageHeader from '../components/PageHeader';
-import { getItems, triggerSync, getSyncStatus, type SpongeItem } from '../services/api';
+import { getItems, getItemById, triggerSync, subscribeSyncEvents, type SpongeItem } from '../services/api';
 import theme from '../styles/theme';
 import { useLocation } from 'react-router-dom';
 
@@ -38,11 +37,16 @@ const Home: React.FC = () => {
   const [total, setTotal] = useState<number>(0);
   const [page, setPage] = useState<number>(1);
   const [pageSize] = useState<number>(20);
+  // 游标分页：当前请求的游标，以及服务端返回的上一页/下一页游标
+  const [pageCursor, setPageCursor] = useState<{ after?: string; before?: string }>({});
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [prevCursor, setPrevCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState<boolean>(false);
   const [selectedItem, setSelectedItem] = useState<SpongeItem | null>(null);
   const [detailVisible, setDetailVisible] = useState<boolean>(false);
   const [syncing, setSyncing] = useState<boolean>(false);
   const [syncProgress, setSyncProgress] = useState<number>(0);
+  const [syncMessage, setSyncMessage] = useState<string>('');
   const [showDashboard, setShowDashboard] = useState<boolean>(false);
   
   // 从URL参数获取搜索关键词
@@ -57,7 +61,7 @@ const Home: React.FC = () => {
   // 加载数据
   useEffect(() => {
     loadData();
-  }, [activeTab, page, searchKeyword]);
+  }, [activeTab, pageCursor, searchKeyword]);
 
   const loadData = async () => {
     try {
@@ -69,16 +73,23 @@ const Home: React.FC = () => {
         experienced: 'experienced',
       };
 
+      const isFirstPage = !pageCursor.after && !pageCursor.before;
       const result = await getItems({
         type: typeMap[activeTab],
-        page,
         limit: pageSize,
         search: searchKeyword || undefined,
+        ...pageCursor,
+        // 总数只在第一页统计，翻页时沿用
+        with_total: isFirstPage,
       });
 
       if (result.success) {
         setItems(result.data.items);
-        setTotal(result.data.total);
+        setNextCursor(result.data.next_cursor);
+        setPrevCursor(result.data.prev_cursor);
+        if (result.data.total !== undefined) {
+          setTotal(result.data.total);
+        }
       }
     } catch (error) {
       console.error('加载数据失败:', error);
@@ -96,42 +107,41 @@ const Home: React.FC = () => {
       const result = await triggerSync();
 
       if (result.success) {
-        message.success('同步已启动');
+        if (result.data?.uncovered?.length) {
+          message.warning(result.message);
+        } else {
+          message.success(result.message);
+        }
 
-        // 轮询同步状态
-        const checkStatus = setInterval(async () => {
-          try {
-            const statusResult = await getSyncStatus();
-            if (statusResult.success) {
-              setSyncProgress(statusResult.data.progress);
+        // 订阅同步进度事件，完成时立即收到 finished 事件
+        const source = subscribeSyncEvents(result.data?.run_id ?? null, (event) => {
+          setSyncProgress(event.progress);
+          setSyncMessage(event.message);
 
-              if (!statusResult.data.running) {
-                clearInterval(checkStatus);
-                setSyncing(false);
-                setSyncProgress(0);
-
-                if (statusResult.data.progress === 100) {
-                  message.success('同步完成！');
-                  loadData(); // 重新加载数据
-                } else {
-                  message.error(statusResult.data.message || '同步失败');
-                }
-              }
-            }
-          } catch (err) {
-            console.error('获取同步状态失败:', err);
-          }
-        }, 2000);
-
-        // 最多等待5分钟
-        setTimeout(() => {
-          clearInterval(checkStatus);
-          if (syncing) {
+          if (event.event === 'idle') {
+            setSyncing(false);
+            setSyncProgress(0);
+            setSyncMessage('');
+          } else if (event.event === 'finished') {
             setSyncing(false);
             setSyncProgress(0);
-            message.warning('同步超时，请检查日志');
+            setSyncMessage('');
+
+            if (event.status === 'success') {
+              message.success('同步完成！');
+              loadData(); // 重新加载数据
+            } else if (event.status === 'partial') {
+              message.warning(event.message);
+              loadData();
+            } else {
+              message.error(event.message || '同步失败');
+            }
           }
-        }, 300000);
+        });
+        source.onerror = () => {
+          // 服务端关闭或网络中断时浏览器会自动重连（携带 Last-Event-ID 续传）
+          console.error('同步进度连接中断，正在重连');
+        };
       }
     } catch (error) {
       console.error('触发同步失败:', error);
@@ -145,18 +155,45 @@ const Home: React.FC = () => {
   const handleSearch = (value: string) => {
     setSearchKeyword(value);
     setPage(1);
+    setPageCursor({});
   };
 
   // 切换标签
   const handleTabChange = (key: string) => {
     setActiveTab(key);
     setPage(1);
+    setPageCursor({});
+  };
+
+  // 翻页
+  const handleNextPage = () => {
+    if (nextCursor) {
+      setPage(page + 1);
+      setPageCursor({ after: nextCursor });
+    }
+  };
+
+  const handlePrevPage = () => {
+    if (prevCursor) {
+      setPage(page - 1);
+      setPageCursor({ before: prevCursor });
+    }
   };
 
   // 打开详情
-  const handleItemClick = (item: SpongeItem) => {
+  const handleItemClick = async (item: SpongeItem) => {
+    // 列表只返回摘要，先展示摘要再加载完整详情
     setSelectedItem(item);
     setDetailVisible(true);
+    try {
+      const result = await getItemById(item._id);
+      if (result.success) {
+        setSelectedItem((current) => (current && current._id === item._id ? result.data : current));
+      }
+    } catch (error) {
+      console.error('加载详情失败:', error);
+      message.error('加载详情失败');
+    }
   };
 
   return (
@@ -220,6 +257,9 @@ const Home: React.FC = () => {
                   status={syncProgress === 100 ? 'success' : 'active'}
                   strokeColor={theme.colors.primary.gradient}
                 />
+                {syncMessage && (
+                  <div style={{ fontSize: '12px', color: theme.colors.neutral.text.secondary }}>{syncMessage}</div>
+                )}
               </div>
             </motion.div>
           )}
@@ -328,14 +368,17 @@ const Home: React.FC = () => {
                         transition={{ delay: 0.3 }}
                         style={{ textAlign: 'center', marginTop: theme.spacing.xl }}
                       >
-                        <Pagination
-                          current={page}
-                          total={total}
-                          pageSize={pageSize}
-                          onChange={(newPage) => setPage(newPage)}
-                          showSizeChanger={false}
-                          showTotal={(total) => `共 ${total} 条`}
-                        />
+                        <Space size="middle">
+                          <Button icon={<LeftOutlined />} disabled={!prevCursor} onClick={handlePrevPage}>
+                            上一页
+                          </Button>
+                          <span>
+                            第 {page} / {Math.max(1, Math.ceil(total / pageSize))} 页 · 共 {total} 条
+                          </span>
+                          <Button disabled={!nextCursor} onClick={handleNextPage}>
+                            下一页 <RightOutlined />
+                          </Button>
+                        </Space>
                       </motion.div>
                     </motion.div>
                   )}
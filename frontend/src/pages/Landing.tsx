@@ -34,7 +34,7 @@ const Landing: React.FC = () => {
       }
 
       // 加载推荐职位（最新3条）
-      const jobsResult = await getItems({ page: 1, limit: 3 });
+      const jobsResult = await getItems({ limit: 3 });
       if (jobsResult.success) {
         setFeaturedJobs(jobsResult.data.items);
       }
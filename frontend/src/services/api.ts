@@ -44,15 +44,19 @@ export interface SpongeItem {
   wap_job_url?: string;
   is_new?: boolean;
   is_viewed?: boolean;
+  // 本地检索命中时返回：相关度得分与各字段命中区间 [start, end)
+  score?: number;
+  highlights?: Record<string, [number, number][]>;
   [key: string]: any;
 }
 
 export interface ListResponse {
   items: SpongeItem[];
-  total: number;
-  page: number;
   limit: number;
-  pages: number;
+  next_cursor: string | null;
+  prev_cursor: string | null;
+  total?: number;
+  total_exact?: boolean;
 }
 
 export interface StatsData {
@@ -71,10 +75,13 @@ export interface StatsData {
 // 获取清单列表
 export const getItems = async (params: {
   type?: string;
-  page?: number;
   limit?: number;
   search?: string;
   is_new?: boolean;
+  after?: string;
+  before?: string;
+  with_total?: boolean;
+  fields?: string;  // summary（默认，描述为摘要）/ full / 逗号分隔的字段名
 }): Promise<{ success: boolean; data: ListResponse }> => {
   return api.get('/items', { params });
 };
@@ -84,13 +91,19 @@ export const getItemById = async (id: string): Promise<{ success: boolean; data:
   return api.get(`/items/${id}`);
 };
 
-// 获取统计数据
-export const getStats = async (): Promise<{ success: boolean; data: StatsData }> => {
-  return api.get('/stats');
+// 获取统计数据（days：每日趋势窗口天数）
+export const getStats = async (days: number = 7): Promise<{ success: boolean; data: StatsData }> => {
+  return api.get('/stats', { params: { days } });
 };
 
 // 触发同步
-export const triggerSync = async (): Promise<{ success: boolean; message: string }> => {
+export const triggerSync = async (): Promise<{
+  success: boolean;
+  message: string;
+  // coalesced 为 true 表示已有同步在执行，本次请求已合并到该同步；
+  // uncovered 为该同步未整理、已安排在其结束后整理的类型
+  data?: { run_id: string | null; coalesced: boolean; uncovered: string[] };
+}> => {
   return api.post('/sync');
 };
 
@@ -101,11 +114,47 @@ export const getSyncStatus = async (): Promise<{
     running: boolean;
     message: string;
     progress: number;
+    run_id: string | null;
+    type: string | null;
+    started_at: string | null;
   };
 }> => {
   return api.get('/sync/status');
 };
 
+export interface SyncEvent {
+  id: number;
+  run_id: string;
+  // started / crawl_started / crawl_task_started / crawl_task_finished / snapshot_saved /
+  // import_started / import_batch / import_finished / stats_refreshed / finished；
+  // idle 表示没有可跟随的同步（连接随即关闭）
+  event: string;
+  time: string;
+  elapsed: number;
+  progress: number;
+  message: string;
+  // partial：部分类型整理失败，其余类型已导入
+  status?: 'success' | 'partial' | 'failed';
+  [key: string]: any;
+}
+
+// 订阅同步进度事件（SSE），收到 finished / idle 事件后关闭连接
+export const subscribeSyncEvents = (
+  runId: string | null,
+  onEvent: (event: SyncEvent) => void,
+): EventSource => {
+  const query = runId ? `?run_id=${encodeURIComponent(runId)}` : '';
+  const source = new EventSource(`${API_BASE_URL}/sync/events${query}`);
+  source.onmessage = (message) => {
+    const event: SyncEvent = JSON.parse(message.data);
+    onEvent(event);
+    if (event.event === 'finished' || event.event === 'idle') {
+      source.close();
+    }
+  };
+  return source;
+};
+
 // 获取同步日志
 export const getSyncLogs = async (): Promise<{ success: boolean; data: any[] }> => {
   return api.get('/sync-logs');
@@ -0,0 +1,261 @@
+"""
+丝瓜条目结构定义（爬虫脚本与后端导入服务共用）
+
+字段规格表声明每个字段在接口数据中的路径、取值方式和类型，
+compile_extractor 将其一次性编译为单个提取函数，直接产出 JobRecord。
+"""
+import hashlib
+import math
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 参与生成条目标识（job_hash）的字段
+JOB_HASH_FIELDS = ('code', 'title', 'description', 'requirement')
+
+# 职位的稳定标识字段（按优先级）：job_hash 随描述/要求变化，同一职位编辑后仍以这些字段识别
+POSTING_KEY_FIELDS = ('job_id', 'code')
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """单个字段规格：name 为输出字段名，path 为接口数据中的键路径
+
+    kind 取值方式：
+      value      按路径逐层取值，中间层不是字典时为空
+      name       值为字典时取其 name，否则取值本身
+      i18n_name  取字典的 name，name 为多语言字典时取 zh_cn
+      join_name  列表中各字典的 name 以逗号拼接
+      join_code  列表中各字典的 code 以逗号拼接
+      timestamp  毫秒时间戳转换为北京时间字符串
+    type 为导入时的目标类型（None 表示保持原样）
+    """
+    name: str
+    path: Tuple[str, ...]
+    kind: str = 'value'
+    type: Optional[type] = None
+
+
+# 职位字段规格表（字段顺序即清单列顺序）
+JOB_FIELD_SPECS: Tuple[FieldSpec, ...] = (
+    FieldSpec('title', ('title',), type=str),
+    FieldSpec('sub_title', ('sub_title',), type=str),
+    FieldSpec('description', ('description',), type=str),
+    FieldSpec('requirement', ('requirement',), type=str),
+    FieldSpec('publish_time', ('publish_time',), 'timestamp'),
+    FieldSpec('code', ('code',), type=str),
+    FieldSpec('job_id', ('id',), type=str),
+    FieldSpec('job_type', ('job_type',)),
+    FieldSpec('job_category', ('job_category',), 'name'),
+    FieldSpec('job_function', ('job_function',), 'name'),
+    FieldSpec('department_id', ('department_id',)),
+    FieldSpec('job_process_id', ('job_process_id',)),
+    FieldSpec('recruit_type_name', ('recruit_type', 'name')),
+    FieldSpec('recruit_type_parent', ('recruit_type', 'parent', 'name')),
+    FieldSpec('job_subject_name', ('job_subject',), 'i18n_name'),
+    FieldSpec('city_list', ('city_list',), 'join_name'),
+    FieldSpec('city_codes', ('city_list',), 'join_code'),
+    FieldSpec('address', ('address',)),
+    FieldSpec('degree', ('degree',)),
+    FieldSpec('experience', ('experience',)),
+    FieldSpec('min_salary', ('min_salary',), type=int),
+    FieldSpec('max_salary', ('max_salary',), type=int),
+    FieldSpec('currency', ('currency',)),
+    FieldSpec('head_count', ('head_count',), type=int),
+    FieldSpec('job_hot_flag', ('job_hot_flag',)),
+    FieldSpec('is_urgent', ('is_urgent',)),
+    FieldSpec('job_active_status', ('job_active_status',)),
+    FieldSpec('recommend_id', ('recommend_id',)),
+    FieldSpec('team_name', ('team_name',)),
+    FieldSpec('brand_name', ('brand_name',)),
+    FieldSpec('ats_online_apply', ('ats_online_apply',)),
+    FieldSpec('pc_job_url', ('pc_job_url',), type=str),
+    FieldSpec('wap_job_url', ('wap_job_url',), type=str),
+    FieldSpec('storefront_mode', ('storefront_mode',)),
+    FieldSpec('process_type', ('process_type',)),
+)
+
+# 任务可选的额外字段（TASK_CONFIGS 中的 extra_fields）
+EXTRA_FIELD_SPECS: Dict[str, FieldSpec] = {
+    'location': FieldSpec('location', ('location',), 'name'),
+    'department': FieldSpec('department', ('department',), 'name'),
+}
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """整理后的丝瓜条目（空值统一为None）"""
+    title: Any = None
+    sub_title: Any = None
+    description: Any = None
+    requirement: Any = None
+    publish_time: Any = None
+    code: Any = None
+    job_id: Any = None
+    job_type: Any = None
+    job_category: Any = None
+    job_function: Any = None
+    department_id: Any = None
+    job_process_id: Any = None
+    recruit_type_name: Any = None
+    recruit_type_parent: Any = None
+    job_subject_name: Any = None
+    city_list: Any = None
+    city_codes: Any = None
+    address: Any = None
+    degree: Any = None
+    experience: Any = None
+    min_salary: Any = None
+    max_salary: Any = None
+    currency: Any = None
+    head_count: Any = None
+    job_hot_flag: Any = None
+    is_urgent: Any = None
+    job_active_status: Any = None
+    recommend_id: Any = None
+    team_name: Any = None
+    brand_name: Any = None
+    ats_online_apply: Any = None
+    pc_job_url: Any = None
+    wap_job_url: Any = None
+    storefront_mode: Any = None
+    process_type: Any = None
+    location: Any = None
+    department: Any = None
+    job_hash: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，省略空字段"""
+        result = {}
+        for name in JOB_RECORD_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value
+        return result
+
+    def compute_hash(self) -> str:
+        """生成并记录条目标识"""
+        hash_string = ''.join(
+            '' if (value := getattr(self, field)) is None else str(value)
+            for field in JOB_HASH_FIELDS
+        )
+        self.job_hash = hashlib.md5(hash_string.encode('utf-8')).hexdigest()
+        return self.job_hash
+
+
+JOB_RECORD_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(JobRecord))
+
+
+def generate_job_hash(job_data: Dict[str, Any]) -> str:
+    """为丝瓜条目生成唯一标识，用于识别重复条目（空值按空字符串处理）"""
+    hash_string = ''.join(
+        '' if job_data.get(field) is None else str(job_data[field])
+        for field in JOB_HASH_FIELDS
+    )
+    return hashlib.md5(hash_string.encode('utf-8')).hexdigest()
+
+
+def posting_key(job_data: Dict[str, Any]) -> str:
+    """职位的稳定标识：依次取 job_id、code，都为空时退回 job_hash"""
+    for field in POSTING_KEY_FIELDS:
+        value = job_data.get(field)
+        if value is not None and value != '':
+            return str(value)
+    return job_data['job_hash']
+
+
+# ===== 提取器编译 =====
+
+def _dig(value: Any, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _i18n(value: Any) -> Any:
+    return value.get('zh_cn') if isinstance(value, dict) else value
+
+
+# 北京时间自1991年起无夏令时，发布时间转换使用固定UTC+8偏移，避免逐条查询pytz时区规则
+_BEIJING_OFFSET = timezone(timedelta(hours=8))
+
+
+def _format_timestamp(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1000, tz=_BEIJING_OFFSET).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _field_expression(spec: FieldSpec, var: str) -> str:
+    """生成单个字段的取值表达式（var 为该字段根键对应的局部变量）"""
+    rest = spec.path[1:]
+    if spec.kind == 'value':
+        if not rest:
+            return var
+        if len(rest) == 1:
+            return f"{var}.get({rest[0]!r}) if isinstance({var}, dict) else None"
+        return f"_dig({var}, {rest!r})"
+    if spec.kind == 'name':
+        return f"{var}.get('name') if isinstance({var}, dict) else {var}"
+    if spec.kind == 'i18n_name':
+        return f"_i18n({var}.get('name')) if isinstance({var}, dict) else None"
+    if spec.kind in ('join_name', 'join_code'):
+        key = 'name' if spec.kind == 'join_name' else 'code'
+        return f"', '.join([c.get({key!r}, '') for c in {var} if isinstance(c, dict)]) if {var} else None"
+    if spec.kind == 'timestamp':
+        return f"_format_timestamp({var})"
+    raise ValueError(f"未知的字段取值方式: {spec.kind}")
+
+
+@lru_cache(maxsize=None)
+def compile_extractor(extra_fields: Tuple[str, ...] = ()) -> Callable[[Dict[str, Any]], JobRecord]:
+    """将字段规格表编译为单个提取函数：每个根键只查找一次，直接构造 JobRecord"""
+    specs = list(JOB_FIELD_SPECS)
+    for name in extra_fields:
+        if name not in EXTRA_FIELD_SPECS:
+            raise ValueError(f"未定义的额外字段: {name}")
+        specs.append(EXTRA_FIELD_SPECS[name])
+
+    lines = ["def extract(job):", "    get = job.get"]
+    root_vars: Dict[str, str] = {}
+    for spec in specs:
+        root = spec.path[0]
+        if root not in root_vars:
+            root_vars[root] = f"r{len(root_vars)}"
+            lines.append(f"    {root_vars[root]} = get({root!r})")
+    for spec in specs:
+        lines.append(f"    {spec.name} = {_field_expression(spec, root_vars[spec.path[0]])}")
+        lines.append(f"    if {spec.name} == '': {spec.name} = None")
+    # 按 JobRecord 字段顺序以位置参数构造（比关键字参数快），未配置的额外字段为None
+    spec_names = {spec.name for spec in specs}
+    args = [name if name in spec_names else 'None' for name in JOB_RECORD_FIELDS]
+    lines.append(f"    return JobRecord({', '.join(args)})")
+
+    namespace = {
+        'JobRecord': JobRecord, '_dig': _dig, '_i18n': _i18n, '_format_timestamp': _format_timestamp,
+    }
+    exec(compile("\n".join(lines), f"<job_extractor{extra_fields}>", "exec"), namespace)
+    return namespace['extract']
+
+
+# ===== 导入时的类型规整 =====
+
+FIELD_TYPES: Dict[str, type] = {
+    spec.name: spec.type
+    for spec in (*JOB_FIELD_SPECS, *EXTRA_FIELD_SPECS.values())
+    if spec.type is not None
+}
+
+
+def coerce_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """按字段规格规整类型：NaN 视为空，整数列从表格读出的浮点数还原为整数"""
+    for name, value in record.items():
+        if isinstance(value, float):
+            if math.isnan(value):
+                record[name] = None
+            elif FIELD_TYPES.get(name) is int and value.is_integer():
+                record[name] = int(value)
+    return record
@@ -0,0 +1,217 @@
+"""
+丝瓜清单快照存储（爬虫脚本与后端导入服务共用）
+
+每次整理写入一个不可变快照目录，每个类型一个 Arrow IPC 文件（zstd压缩），
+manifest.json 记录快照列表、最新快照和各文件的 sha256 校验值。
+读取时按类型延迟加载，并通过内存映射读取；写入方持有排他文件锁，读取方持有共享锁。
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+try:
+    import fcntl
+except ImportError:  # Windows 无 fcntl，退化为不加锁
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = 'manifest.json'
+LOCK_FILENAME = '.lock'
+SHEET_SUFFIX = '.arrow'
+
+
+def file_checksum(path: Path) -> str:
+    """计算文件的 sha256 校验值"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileLock:
+    """基于 flock 的跨进程文件锁：shared=True 为共享（读）锁，否则为排他（写）锁"""
+
+    def __init__(self, path: Path, shared: bool = False):
+        self.path = Path(path)
+        self.shared = shared
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+def _column_to_arrow(series: pd.Series) -> pa.Array:
+    """列转换为Arrow数组；混合类型的对象列退化为字符串列"""
+    try:
+        return pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        values = series.astype(object).where(series.notna(), None)
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def dataframe_to_table(df: pd.DataFrame) -> pa.Table:
+    """DataFrame 转换为 Arrow 表（忽略索引）"""
+    columns = [str(column) for column in df.columns]
+    arrays = [_column_to_arrow(df[column]) for column in df.columns]
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+class Snapshot:
+    """单个只读快照，各类型按需加载"""
+
+    def __init__(self, directory: Path, entry: Dict[str, Any]):
+        self.directory = directory
+        self.id: str = entry['id']
+        self.created_at: str = entry.get('created_at', '')
+        self.sheets: Dict[str, Dict[str, Any]] = entry.get('sheets', {})
+
+    def sheet_names(self) -> List[str]:
+        return list(self.sheets)
+
+    def sheet_path(self, sheet_name: str) -> Path:
+        return self.directory / self.sheets[sheet_name]['file']
+
+    def verify(self) -> bool:
+        """校验快照内所有文件的 sha256，文件缺失或不一致时返回False"""
+        for sheet_name, info in self.sheets.items():
+            path = self.sheet_path(sheet_name)
+            if not path.exists():
+                logger.warning(f"快照 {self.id} 缺少文件 {info['file']}")
+                return False
+            if info.get('sha256') and file_checksum(path) != info['sha256']:
+                logger.warning(f"快照 {self.id} 的 {info['file']} 校验失败")
+                return False
+        return True
+
+    def read_table(self, sheet_name: str) -> pa.Table:
+        """以内存映射方式读取某一类型的 Arrow 表"""
+        with pa.memory_map(str(self.sheet_path(sheet_name)), 'r') as source:
+            return ipc.open_file(source).read_all()
+
+    def read_frame(self, sheet_name: str) -> pd.DataFrame:
+        """读取某一类型为 DataFrame"""
+        return self.read_table(sheet_name).to_pandas()
+
+    def iter_records(self, sheet_name: str) -> Iterator[List[Dict[str, Any]]]:
+        """按记录批次逐批读取某一类型（内存映射，不一次性物化整表）"""
+        with pa.memory_map(str(self.sheet_path(sheet_name)), 'r') as source:
+            reader = ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index).to_pylist()
+
+
+class SnapshotStore:
+    """快照目录：<root>/<snapshot_id>/<sheet>.arrow + <root>/manifest.json"""
+
+    def __init__(self, root: Path, keep: int = 10, batch_size: int = 1000):
+        self.root = Path(root)
+        self.keep = keep
+        self.batch_size = batch_size
+        self.manifest_path = self.root / MANIFEST_FILENAME
+
+    # ===== manifest =====
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        if not self.manifest_path.exists():
+            return {'latest': None, 'snapshots': []}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """先写临时文件再原子替换，读取方不会看到半份manifest"""
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    # ===== 读写 =====
+
+    def lock(self, shared: bool = False) -> FileLock:
+        """快照目录锁：爬虫写入时排他，导入/加载时共享（防止读取中的快照被清理）"""
+        return FileLock(self.root / LOCK_FILENAME, shared=shared)
+
+    def exists(self) -> bool:
+        return self.latest() is not None
+
+    def latest(self) -> Optional[Snapshot]:
+        """最新的完好快照；最新快照损坏时依次回退到更早的快照，都不可用时返回None"""
+        try:
+            manifest = self._read_manifest()
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取快照清单失败: {e}")
+            return None
+        
+        entries = manifest.get('snapshots', [])
+        ids = [entry['id'] for entry in entries]
+        if manifest.get('latest') in ids:
+            entries = entries[:ids.index(manifest['latest']) + 1]
+        for entry in reversed(entries):
+            snapshot = Snapshot(self.root / entry['id'], entry)
+            if snapshot.verify():
+                if entry['id'] != manifest.get('latest'):
+                    logger.warning(f"最新快照不可用，回退到快照 {entry['id']}")
+                return snapshot
+        return None
+
+    def write(self, data_frames: Dict[str, pd.DataFrame]) -> Snapshot:
+        """写入一个新的不可变快照并更新manifest（持有排他锁）"""
+        with self.lock():
+            return self._write(data_frames)
+
+    def _write(self, data_frames: Dict[str, pd.DataFrame]) -> Snapshot:
+        self.root.mkdir(parents=True, exist_ok=True)
+        snapshot_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        tmp_dir = self.root / f'{snapshot_id}.tmp'
+        tmp_dir.mkdir()
+
+        sheets: Dict[str, Dict[str, Any]] = {}
+        options = ipc.IpcWriteOptions(compression='zstd')
+        for sheet_name, df in data_frames.items():
+            table = dataframe_to_table(df)
+            filename = f'{sheet_name}{SHEET_SUFFIX}'
+            with ipc.new_file(str(tmp_dir / filename), table.schema, options=options) as writer:
+                writer.write_table(table, max_chunksize=self.batch_size)
+            sheets[sheet_name] = {
+                'file': filename,
+                'rows': table.num_rows,
+                'sha256': file_checksum(tmp_dir / filename),
+            }
+
+        # 目录写完后整体改名，快照对读取方要么完整可见要么不可见
+        os.replace(tmp_dir, self.root / snapshot_id)
+
+        entry = {'id': snapshot_id, 'created_at': datetime.now().isoformat(), 'sheets': sheets}
+        manifest = self._read_manifest()
+        manifest['snapshots'] = manifest.get('snapshots', []) + [entry]
+        manifest['latest'] = snapshot_id
+        expired = manifest['snapshots'][:-self.keep] if self.keep else []
+        manifest['snapshots'] = manifest['snapshots'][len(expired):]
+        self._write_manifest(manifest)
+
+        for old in expired:
+            shutil.rmtree(self.root / old['id'], ignore_errors=True)
+
+        return Snapshot(self.root / snapshot_id, entry)
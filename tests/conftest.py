@@ -0,0 +1,18 @@
+"""测试公共配置：爬虫脚本与后端模块的导入路径，以及基于 mongomock 的数据库服务"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / 'backend')]
+
+
+@pytest.fixture
+def db_service(monkeypatch):
+    """每个测试独立的内存数据库"""
+    mongomock = pytest.importorskip('mongomock')
+    from services import db
+
+    monkeypatch.setattr(db, 'MongoClient', mongomock.MongoClient)
+    return db.DatabaseService('mongodb://localhost', 'test')
@@ -0,0 +1,48 @@
+"""职位接口回放：按录制的响应（tests/fixtures/*.json）应答 JobApiClient 的请求，离线测试接口直连"""
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+class ReplayTransport(httpx.MockTransport):
+    """按 offset 回放录制的搜索结果页
+
+    failures 为 {offset: [状态码或 'error', ...]}：该页前几次请求依次返回这些状态码
+    （'error' 返回录制的接口错误体），用完后才返回录制的正常页面。
+    requests 按顺序记录收到的请求（CSRF请求记为 'csrf'，搜索请求记为请求体）。
+    """
+
+    def __init__(self, fixture: str, failures: Optional[Dict[int, List]] = None):
+        self.recording = json.loads((FIXTURES_DIR / fixture).read_text(encoding='utf-8'))
+        self.pages = {page['offset']: page['body'] for page in self.recording['search']}
+        self.failures = {offset: list(codes) for offset, codes in (failures or {}).items()}
+        self.requests: List = []
+        super().__init__(self._handle)
+
+    @property
+    def search_offsets(self) -> List[int]:
+        """按顺序收到的搜索请求 offset"""
+        return [request['offset'] for request in self.requests if request != 'csrf']
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith('/csrf/token'):
+            self.requests.append('csrf')
+            csrf = self.recording['csrf']
+            return httpx.Response(200, headers=csrf['headers'], json=csrf['body'])
+
+        payload = json.loads(request.content)
+        self.requests.append(payload)
+        offset = payload['offset']
+        pending = self.failures.get(offset)
+        if pending:
+            failure = pending.pop(0)
+            if failure == 'error':
+                return httpx.Response(200, json=self.recording['error'])
+            return httpx.Response(failure, json={'code': failure, 'message': 'replayed failure'})
+        if offset not in self.pages:
+            return httpx.Response(404, json={'code': 404, 'message': f'未录制的 offset: {offset}'})
+        return httpx.Response(200, json=self.pages[offset])
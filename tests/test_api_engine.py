@@ -0,0 +1,111 @@
+"""接口直连抓取：用录制的响应回放，覆盖翻页、提前结束翻页、失败重试与单类型失败隔离"""
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from replay import ReplayTransport
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURE = 'api_intern_pages.json'
+PAGE_SIZE = 2  # 录制时的每页条数（共5条，3页）
+
+
+@pytest.fixture
+def crawler(monkeypatch):
+    """加载爬虫脚本模块，并清空进程内的完整翻页记录"""
+    pytest.importorskip('playwright')
+    from services.crawler import load_crawler_module
+    module = load_crawler_module(ROOT / '1.py')
+    monkeypatch.setattr(module, '_FULL_SWEEP_AT', {})
+    return module
+
+
+def run_task(crawler, transport, known_hashes=None, **options):
+    """用回放传输层执行实习类型的整理，返回 (条目, 整理结果)"""
+    options = {'page_size': PAGE_SIZE, 'retry_backoff': 0, **options}
+    monitor = crawler.JobMonitor(tasks=crawler.TASK_CONFIGS[:1], filename=Path('unused.xlsx'),
+                                 engine='api', **options)
+
+    async def main():
+        async with crawler.JobApiClient('https://replay.invalid', transport=transport) as api_client:
+            return await monitor._run_single_task_async(crawler.TASK_CONFIGS[0], api_client, None, known_hashes)
+
+    return asyncio.run(main())
+
+
+def test_pages_until_last_page(crawler):
+    transport = ReplayTransport(FIXTURE)
+    jobs, result = run_task(crawler, transport)
+
+    assert transport.search_offsets == [0, 2, 4]
+    assert transport.requests.count('csrf') == 1
+    assert [job.code for job in jobs] == ['A17301', 'A20452', 'A09218', 'A31177', 'A42610']
+    assert jobs[0].job_subject_name == '字节跳动日常实习'
+    assert result['status'] == 'ok'
+    assert result['complete'] is True
+    assert (result['count'], result['pages'], result['retries']) == (5, 3, 0)
+
+
+def test_stops_on_known_page(crawler):
+    transport = ReplayTransport(FIXTURE)
+    first_page, _ = run_task(crawler, ReplayTransport(FIXTURE))
+    crawler._FULL_SWEEP_AT['intern'] = time.monotonic()
+
+    jobs, result = run_task(crawler, transport, known_hashes={job.job_hash for job in first_page[:2]})
+
+    assert transport.search_offsets == [0]
+    assert len(jobs) == 2
+    assert result['status'] == 'ok'
+    assert result['complete'] is False
+
+
+def test_full_sweep_ignores_known_pages(crawler):
+    transport = ReplayTransport(FIXTURE)
+    first_page, _ = run_task(crawler, ReplayTransport(FIXTURE))
+    crawler._FULL_SWEEP_AT['intern'] = time.monotonic() - 3600
+
+    _, result = run_task(crawler, transport, known_hashes={job.job_hash for job in first_page[:2]},
+                         full_sweep_hours=0.5)
+
+    assert transport.search_offsets == [0, 2, 4]
+    assert result['complete'] is True
+
+
+def test_retries_failed_page_with_backoff(crawler, monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(crawler.asyncio, 'sleep', fake_sleep)
+    transport = ReplayTransport(FIXTURE, failures={2: [503, 'error']})
+    jobs, result = run_task(crawler, transport, page_retries=2, retry_backoff=1.5)
+
+    assert transport.search_offsets == [0, 2, 2, 2, 4]
+    assert delays == [1.5, 3.0]
+    assert len(jobs) == 5
+    assert result['status'] == 'ok'
+    assert result['retries'] == 2
+
+
+def test_exhausted_retries_keep_fetched_pages(crawler):
+    transport = ReplayTransport(FIXTURE, failures={2: [500, 500, 500]})
+    jobs, result = run_task(crawler, transport, page_retries=2)
+
+    assert transport.search_offsets == [0, 2, 2, 2]
+    assert len(jobs) == 2
+    assert result['status'] == 'partial'
+    assert result['complete'] is False
+    assert result['retries'] == 2
+    assert '500' in result['error']
+
+
+def test_api_error_fails_task(crawler):
+    transport = ReplayTransport(FIXTURE, failures={0: ['error']})
+    jobs, result = run_task(crawler, transport, page_retries=0)
+
+    assert jobs == []
+    assert result['status'] == 'failed'
+    assert result['error'] == '接口返回错误: 参数错误'
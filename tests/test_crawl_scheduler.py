@@ -0,0 +1,43 @@
+"""自适应整理调度：调度查询只读，初始状态由 seed() 写入"""
+from services.crawl_scheduler import CrawlScheduler
+
+INTERVALS = {'intern': 30, 'campus': 60}
+
+
+def test_schedule_is_read_only_until_seeded(db_service):
+    scheduler = CrawlScheduler(db_service, coordinator=None, intervals=INTERVALS)
+
+    schedule = scheduler.schedule()
+    assert db_service.get_crawl_schedule() == {}
+    assert schedule['intern']['interval'] == 30
+    assert schedule['intern']['next_run_at'] is None
+
+    seeded = scheduler.seed()
+    stored = db_service.get_crawl_schedule()
+    assert set(stored) == set(INTERVALS)
+    assert all(state['next_run_at'] is not None for state in seeded.values())
+
+    # 已安排的类型不会被再次写入
+    db_service.update_crawl_schedule('intern', {**stored['intern'], 'idle_runs': 3})
+    scheduler.seed()
+    assert db_service.get_crawl_schedule()['intern']['idle_runs'] == 3
+
+
+def test_expedite_makes_tasks_due(db_service):
+    submitted = []
+
+    class Coordinator:
+        def status(self):
+            return {'running': False}
+
+        def submit(self, run_type, tasks=None):
+            submitted.append(tasks)
+            return {'coalesced': False}
+
+    scheduler = CrawlScheduler(db_service, Coordinator(), intervals=INTERVALS)
+    scheduler.seed()
+    assert scheduler.tick() is None
+
+    scheduler.expedite(['campus'])
+    scheduler.tick()
+    assert submitted == [['campus']]
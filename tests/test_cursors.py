@@ -0,0 +1,43 @@
+"""分页游标：列表 keyset、检索 offset 与事件流游标带类型标记，混用时拒绝"""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from bson.objectid import ObjectId
+
+from services.db import decode_cursor, decode_offset_cursor, encode_cursor, encode_offset_cursor
+
+ITEM = {'_id': ObjectId(), '采摘时间': datetime(2024, 5, 1, 8, 30)}
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor(ITEM)) == (ITEM['采摘时间'], ITEM['_id'])
+    assert decode_offset_cursor(encode_offset_cursor(40)) == 40
+
+
+def test_rejects_mismatched_kind():
+    with pytest.raises(ValueError, match='不匹配'):
+        decode_cursor(encode_offset_cursor(20))
+    with pytest.raises(ValueError, match='不匹配'):
+        decode_offset_cursor(encode_cursor(ITEM))
+    with pytest.raises(ValueError, match='不匹配'):
+        decode_cursor(encode_cursor(ITEM, field='采摘时间', kind='event'))
+
+
+def test_rejects_untagged_token():
+    legacy = base64.urlsafe_b64encode(json.dumps({'o': 20}).encode()).decode().rstrip('=')
+    with pytest.raises(ValueError):
+        decode_offset_cursor(legacy)
+
+
+def test_items_route_returns_400_for_offset_token(db_service):
+    from flask import Flask
+    from routes.items import init_routes
+    from services.generation import DataGeneration
+
+    app = Flask(__name__)
+    app.register_blueprint(init_routes(db_service, DataGeneration(db_service)), url_prefix='/api')
+    response = app.test_client().get(f'/api/items?after={encode_offset_cursor(20)}&fields=full')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
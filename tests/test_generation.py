@@ -0,0 +1,19 @@
+"""数据版本：其他进程递增版本后，本进程先清空缓存再启用新版本"""
+from services.generation import DataGeneration
+
+
+def test_external_bump_clears_caches_before_new_etag(db_service):
+    local = DataGeneration(db_service, refresh_interval=0)
+    seen = []
+    local.on_external_change(lambda value: seen.append((value, local._value)))
+
+    assert local.value == 0
+    assert seen == []
+
+    DataGeneration(db_service).bump()  # 其他进程（如 init_db.py）的导入
+    assert local.value == 1
+    assert seen == [(1, 0)]
+
+    local.bump()  # 本进程的导入由导入回调清空缓存，不触发
+    assert local.value == 2
+    assert seen == [(1, 0)]
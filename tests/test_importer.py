@@ -0,0 +1,74 @@
+"""导入流程：增量写入、下线标记与变更事件"""
+from job_schema import generate_job_hash
+from services.importer import DataImporter
+
+
+def make_record(i, description='负责后端服务开发'):
+    record = {
+        'job_id': f'J{i}', 'code': f'C{i}', 'title': f'后端工程师{i}',
+        'description': description, 'requirement': '熟悉Python',
+        '采摘时间': '2024-01-02 10:00:00',
+    }
+    record['job_hash'] = generate_job_hash(record)
+    return record
+
+
+def listed_job_ids(db_service):
+    # mongomock 不支持摘要投影中的 $substrCP，取完整字段
+    result = db_service.get_items(fields='full')
+    return sorted(item['job_id'] for item in result['items']), result['total']
+
+
+def test_removed_posting_disappears_from_items(db_service, tmp_path):
+    importer = DataImporter(db_service, tmp_path / 'cache.json')
+    importer.import_records({'intern': [make_record(0), make_record(1), make_record(2)]})
+    assert listed_job_ids(db_service) == (['J0', 'J1', 'J2'], 3)
+
+    result = importer.import_records({'intern': [make_record(0), make_record(2)]})
+    db_service.invalidate_caches()
+
+    assert result['removed'] == 1
+    assert db_service.items.find_one({'job_id': 'J1'})['is_active'] is False
+    assert listed_job_ids(db_service) == (['J0', 'J2'], 2)
+    assert db_service.get_stats()['total'] == 2
+
+
+def test_edited_posting_is_listed_once(db_service, tmp_path):
+    importer = DataImporter(db_service, tmp_path / 'cache.json')
+    importer.import_records({'intern': [make_record(0), make_record(1)]})
+
+    result = importer.import_records({'intern': [make_record(0), make_record(1, description='负责推荐系统开发')]})
+    db_service.invalidate_caches()
+
+    assert result['events'] == {'added': 0, 'modified': 1, 'removed': 0}
+    assert listed_job_ids(db_service) == (['J0', 'J1'], 2)
+    event = db_service.get_posting_events(event_type='modified')['events'][0]
+    assert event['key'] == 'J1'
+    assert event['changes'] == {'description': {'old': '负责后端服务开发', 'new': '负责推荐系统开发'}}
+
+
+def test_reimport_without_publish_time_is_unchanged(db_service, tmp_path):
+    importer = DataImporter(db_service, tmp_path / 'cache.json')
+    records = lambda: [{**make_record(0), 'publish_time': None}, {**make_record(1), 'publish_time': '未知'}]
+    importer.import_records({'intern': records()})
+
+    result = importer.import_records({'intern': records()})
+
+    assert result['updated'] == 0
+    assert result['events'] == {'added': 0, 'modified': 0, 'removed': 0}
+    assert db_service.items.find_one({'job_id': 'J0'})['publish_time'] is None
+
+
+def test_rebuild_bumps_data_generation(db_service, tmp_path):
+    from services.generation import DataGeneration
+
+    importer = DataImporter(db_service, tmp_path / 'cache.json')
+    importer.import_records({'intern': [make_record(0)]})
+    generation = DataGeneration(db_service)
+    importer.add_listener(generation.on_import)
+
+    importer.import_records({'intern': [make_record(0)]})
+    assert db_service.get_data_generation()['value'] == generation.value == 0
+
+    importer.import_records({'intern': [make_record(0)]}, clear_existing=True)
+    assert db_service.get_data_generation()['value'] == 1
@@ -0,0 +1,43 @@
+"""统计快照缓存：导入后只刷新常用窗口，缓存的窗口数有上限"""
+from services.stats_cache import StatsCache
+
+
+class FakeStats:
+    """记录每次计算的趋势窗口"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_stats(self, days):
+        self.calls.append(days)
+        return {'days': days}
+
+
+def test_refresh_only_recomputes_whitelisted_windows():
+    db = FakeStats()
+    cache = StatsCache(db, windows=(7, 30), max_windows=4)
+    for days in (7, 30, 45, 200):
+        cache.get(days)
+
+    db.calls.clear()
+    cache.refresh()
+    assert db.calls == [7, 30]
+
+    # 非常用窗口在刷新后丢弃，下次请求时再计算
+    assert cache.get(45)['data'] == {'days': 45}
+    assert db.calls == [7, 30, 45]
+
+
+def test_cached_windows_are_bounded():
+    db = FakeStats()
+    cache = StatsCache(db, windows=(7,), max_windows=3)
+    for days in range(1, 50):
+        cache.get(days)
+    assert len(cache._snapshots) == 3
+
+    # 最近使用的窗口保留
+    cache.get(48)
+    cache.get(100)
+    db.calls.clear()
+    cache.get(48)
+    assert db.calls == []
@@ -0,0 +1,16 @@
+"""统计接口：趋势窗口参数校验"""
+from flask import Flask
+
+from routes.stats import init_routes
+from services.generation import DataGeneration
+from services.stats_cache import StatsCache
+
+
+def test_invalid_days_returns_400(db_service):
+    app = Flask(__name__)
+    blueprint = init_routes(db_service, StatsCache(db_service), DataGeneration(db_service))
+    app.register_blueprint(blueprint, url_prefix='/api')
+
+    response = app.test_client().get('/api/stats?days=abc')
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': '无效的天数: abc'}
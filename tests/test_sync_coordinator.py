@@ -0,0 +1,61 @@
+"""同步协调器：合并请求时未覆盖类型的后续整理，以及进度事件的持久化顺序"""
+import threading
+import time
+
+from bson.objectid import ObjectId
+
+from services.sync_coordinator import SyncCoordinator, SyncRun
+
+ALL_TASKS = ['intern', 'campus', 'experienced']
+
+
+def test_coalesced_request_reports_uncovered_tasks(db_service):
+    release = threading.Event()
+    expedited = []
+
+    def job(run):
+        release.wait(5)
+        return {'imported': 0}
+
+    coordinator = SyncCoordinator(db_service, job, all_tasks=ALL_TASKS, on_uncovered=expedited.extend)
+    try:
+        scheduled = coordinator.submit('scheduled', tasks=['intern'])
+        manual = coordinator.submit('manual')
+        partial = coordinator.submit('manual', tasks=['intern'])
+    finally:
+        release.set()
+
+    assert scheduled['coalesced'] is False
+    assert manual['coalesced'] is True
+    assert manual['run_id'] == scheduled['run_id']
+    assert manual['uncovered'] == ['campus', 'experienced']
+    assert expedited == ['campus', 'experienced']
+    assert partial['uncovered'] == []
+
+
+def test_events_are_stored_in_id_order(db_service):
+    coordinator = SyncCoordinator(db_service, job=lambda run: {})
+    run_id = ObjectId()
+    db_service.start_sync_run(run_id, 'manual', coordinator.owner)
+    run = SyncRun(coordinator, run_id, 'manual')
+
+    # 奇数ID的事件写入较慢，另一线程的事件可能在其之前写入
+    append = db_service.append_sync_event
+
+    def slow_append(run_id, event, *args, **kwargs):
+        if event['id'] % 2:
+            time.sleep(0.005)
+        append(run_id, event, *args, **kwargs)
+
+    db_service.append_sync_event = slow_append
+    threads = [
+        threading.Thread(target=lambda name=name: [run.emit(name) for _ in range(20)])
+        for name in ('crawl_task_finished', 'import_batch')
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = [event['id'] for event in db_service.get_sync_run(run_id)['events']]
+    assert stored == list(range(1, 41))